@@ -4,15 +4,28 @@
 __version__ = "0.2.11" # 08.07.2025
 __author__ = "RL"
 
-import src.GUI as GUI
-from src.utils_lib import init_settings
+import sys
 
 def main():
-    """Main function. For now no command line arguments are used."""
+    """
+    Main function. Without command line arguments GUI is started,
+    otherwise analysis is run from command line, see
+    'python ASPA_main.py --help'. GUI is imported only when needed so
+    that command line usage does not require tkinter.
+    """
+
+    if len(sys.argv) > 1:
+        import src.CLI as CLI
+        return CLI.main(sys.argv[1:])
+
+    import src.GUI as GUI
+    from src.utils_lib import init_settings
+
     settings = init_settings()
     gui = GUI.GUICLASS(settings=settings)
     gui.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
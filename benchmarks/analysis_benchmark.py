@@ -0,0 +1,339 @@
+"""
+Analysis throughput benchmark. Synthetic corpus is generated from the
+test fixtures (see corpus_generator.py) or an existing corpus is given
+with --corpus. Measured are:
+1. Throughput of default analysis of the whole corpus in files/sec.
+2. Time of each analysis stage per file: read, parse, annotate,
+   structure detection, preanalysis, each analyser, formatting and
+   writing. Stages are executed separately, therefore their sum is
+   larger than the time of the fused walks in the default analysis.
+3. Peak memory of the default analysis measured with tracemalloc.
+4. Optionally throughput of bulk analysis with --bulk-workers.
+
+Results can be stored as a baseline with --save-baseline. When
+--baseline is given, results are compared to the stored baseline and
+exit code is 1 if any metric regresses more than --tolerance. Baseline
+is machine specific, so it should be created on the same machine with
+the same corpus options.
+
+Usage: python benchmarks/analysis_benchmark.py [--corpus DIR]
+           [--students N] [--assignments N] [--files N] [--seed N]
+           [-n ROUNDS] [--bulk-workers N] [--save-baseline FILE]
+           [--baseline FILE] [--tolerance FRACTION] [--json FILE]
+"""
+
+import argparse
+import ast
+import contextlib
+import copy
+import io
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import benchmarks.corpus_generator as corpus_generator
+import src.analysers.analysis_lib as analysis
+import src.analysers.analysis_utils as a_utils
+import src.config.config as cnf
+import src.utils_lib as utils
+
+STAGES = (
+    "read", "parse", "annotate", "structure_detection", "preanalysis",
+    *(f"analyser:{i}" for i in cnf.CHECKBOX_OPTIONS),
+    "formatting", "writing"
+)
+MIN_STAGE_MS = 0.05  # Smaller stage regressions in ms/file are ignored as noise
+
+
+class BenchmarkController():
+    """Minimal MVC controller for Model, see CLI.CLICLASS."""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_settings(self):
+        return self.settings
+
+    def propagate_error_message(self, *args, **kwargs):
+        pass
+
+
+class ResultCounter():
+    """Result page which only counts the shown results."""
+
+    def __init__(self):
+        self.files = 0
+
+    def show_results(self, line_list):
+        self.files += 1
+
+
+def create_settings(result_dir, **overrides):
+    """Return: Settings based on default settings, settings.json is not used."""
+
+    settings = copy.deepcopy(cnf.DEFAULT_SETTINGS)
+    settings["excluded_directories"] = list(settings["excluded_directories"])
+    settings.update({
+        "result_dir": str(result_dir),
+        "GUI_print": False,
+        "console_print": False,
+        "file_write": True,
+        "result_cache": False
+    })
+    settings.update(overrides)
+    utils.add_fixed_settings(settings)
+    return settings
+
+
+def get_files(settings, corpus_dir, output_format="list"):
+    return utils.directory_crawler(
+        [str(corpus_dir)],
+        only_leaf_files=False,
+        excluded_dirs=settings["excluded_directories"],
+        excluded_files=settings["excluded_files"],
+        output_format=output_format
+    )
+
+
+########################################################################
+# Measurements
+def measure_throughput(corpus_dir, result_dir, rounds, selections):
+    """Return: Tuple of (files, fastest time of default analysis in seconds)"""
+
+    settings = create_settings(result_dir)
+    file_list = get_files(settings, corpus_dir)
+    times = []
+    for _ in range(rounds):
+        model = analysis.Model(BenchmarkController(settings))
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.default_analyse(selections, file_list, result_page=ResultCounter())
+        times.append(time.perf_counter() - start)
+    return len(file_list), min(times)
+
+
+def measure_memory(corpus_dir, result_dir, selections):
+    """Return: Peak memory of default analysis in MiB"""
+
+    settings = create_settings(result_dir)
+    file_list = get_files(settings, corpus_dir)
+    model = analysis.Model(BenchmarkController(settings))
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.default_analyse(selections, file_list, result_page=ResultCounter())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def measure_bulk(corpus_dir, result_dir, workers):
+    """Return: Time of bulk analysis in seconds"""
+
+    settings = create_settings(result_dir, bulk_workers=workers, bulk_resume=False)
+    student_dict = get_files(settings, corpus_dir, output_format="bulk_dict")
+    model = analysis.Model(BenchmarkController(settings))
+    selections = dict.fromkeys(cnf.CHECKBOX_OPTIONS, 1)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.bulk_analyse(selections, student_dict)
+    return time.perf_counter() - start
+
+
+def measure_stages(corpus_dir, result_dir, rounds, selections):
+    """
+    Function to measure each analysis stage separately with the same
+    methods the Model uses.
+
+    Return: Dict where key is stage and value is the fastest total time
+    of the stage in seconds over the rounds.
+    """
+
+    settings = create_settings(result_dir)
+    file_list = get_files(settings, corpus_dir)
+    selected = [opt for opt in cnf.CHECKBOX_OPTIONS if selections[opt]]
+    samples = {stage: [] for stage in STAGES}
+
+    for _ in range(rounds):
+        model = analysis.Model(BenchmarkController(settings))
+        model.clear_run_cache()
+        totals = dict.fromkeys(STAGES, 0.0)
+
+        def timed(stage, function, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[stage] += time.perf_counter() - start
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for filepath in file_list:
+                dir_path = filepath.path.parent
+                content = timed("read", utils.read_file, filepath.path)
+                try:
+                    tree = timed("parse", ast.parse, content, filepath.filename)
+                except (SyntaxError, ValueError, TypeError):
+                    tree = None
+
+                if tree is not None:
+                    model.tree_index = timed("annotate", a_utils.TreeIndex, tree)
+                    timed("structure_detection", model.detect_structures,
+                          tree, filepath.path)
+                    files = model.get_files_in_dir(dir_path)
+                    try:
+                        timed("preanalysis", model.pre_analyse_tree, tree, files, dir_path)
+                        for opt in selected:
+                            timed(f"analyser:{opt}", model.analyse_tree, tree, files,
+                                  content, {i: int(i == opt) for i in cnf.CHECKBOX_OPTIONS})
+                    except Exception:
+                        # Same error handling as in Model.analyse
+                        model.add_msg("tool_error", filepath.filename)
+                        model.save_category("analysis_error")
+
+                lines = timed("formatting", model.format_violations, model.all_results)
+                content = "\n".join(i[0] for i in lines) + "\n"
+                timed("writing", utils.write_file, settings["result_path"], content, mode="a")
+                model.clear_analysis_data()
+
+        for stage, value in totals.items():
+            samples[stage].append(value)
+
+    return {stage: min(values) for stage, values in samples.items()}
+
+
+########################################################################
+# Baseline
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Function to compare report to baseline. Higher is better for
+    files/sec and lower for the other metrics.
+
+    Return: List of regression descriptions - list[str]
+    """
+
+    regressions = []
+    if baseline.get("corpus") != report["corpus"]:
+        regressions.append(
+            f"corpus options differ from baseline: {baseline.get('corpus')}"
+        )
+        return regressions
+
+    old, new = baseline["files_per_sec"], report["files_per_sec"]
+    if new < old * (1 - tolerance):
+        regressions.append(f"throughput {new:.1f} files/sec, baseline {old:.1f}")
+
+    for key in ("bulk_files_per_sec",):
+        if key in baseline and key in report and report[key] < baseline[key] * (1 - tolerance):
+            regressions.append(f"{key} {report[key]:.1f}, baseline {baseline[key]:.1f}")
+
+    old, new = baseline.get("peak_memory_mib"), report.get("peak_memory_mib")
+    if old and new and new > old * (1 + tolerance):
+        regressions.append(f"peak memory {new:.1f} MiB, baseline {old:.1f} MiB")
+
+    for stage, new in report["stage_ms_per_file"].items():
+        old = baseline["stage_ms_per_file"].get(stage)
+        if (old is not None and new > old * (1 + tolerance)
+                and new - old > MIN_STAGE_MS):
+            regressions.append(f"stage {stage} {new:.3f} ms/file, baseline {old:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASPA analysis benchmark")
+    parser.add_argument("--corpus", help="Existing corpus directory, "
+                        "otherwise synthetic corpus is generated.")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--assignments", type=int, default=5)
+    parser.add_argument("--files", type=int, default=3,
+                        help="Number of files per assignment.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-n", "--rounds", type=int, default=3)
+    parser.add_argument("--bulk-workers", type=int,
+                        help="Measure also bulk analysis with N workers, "
+                             "0 means one per CPU core.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not measure peak memory.")
+    parser.add_argument("--save-baseline", help="Write results as baseline into file.")
+    parser.add_argument("--baseline", help="Compare results to baseline file.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression. Default is %(default)s.")
+    parser.add_argument("--json", help="Write results also into JSON file.")
+    args = parser.parse_args()
+
+    selections = dict.fromkeys(cnf.CHECKBOX_OPTIONS, 1)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.corpus:
+            corpus_dir = pathlib.Path(args.corpus)
+            corpus = {"path": str(corpus_dir.resolve())}
+        else:
+            corpus = {
+                "students": args.students, "assignments": args.assignments,
+                "files": args.files, "seed": args.seed
+            }
+            corpus_dir = corpus_generator.generate_corpus(
+                pathlib.Path(temp_dir, "corpus"), **corpus
+            )
+        result_dir = pathlib.Path(temp_dir, "results")
+
+        files, seconds = measure_throughput(corpus_dir, result_dir, args.rounds, selections)
+        if not files:
+            print("No files in the corpus.")
+            return 2
+
+        report = {
+            "corpus": corpus,
+            "files": files,
+            "files_per_sec": files / seconds
+        }
+        print(f"Corpus: {files} files")
+        print(f"Default analysis: {seconds:.2f} s, {report['files_per_sec']:.1f} files/sec")
+
+        if args.bulk_workers is not None:
+            bulk_seconds = measure_bulk(corpus_dir, result_dir, args.bulk_workers)
+            report["bulk_files_per_sec"] = files / bulk_seconds
+            print(f"Bulk analysis: {bulk_seconds:.2f} s, "
+                  f"{report['bulk_files_per_sec']:.1f} files/sec")
+
+        if not args.no_memory:
+            report["peak_memory_mib"] = measure_memory(corpus_dir, result_dir, selections)
+            print(f"Peak memory: {report['peak_memory_mib']:.1f} MiB")
+
+        stages = measure_stages(corpus_dir, result_dir, args.rounds, selections)
+        report["stage_ms_per_file"] = {
+            stage: value * 1000 / files for stage, value in stages.items()
+        }
+
+    total = sum(report["stage_ms_per_file"].values())
+    print(f"\n{'stage':<32} {'ms/file':>9} {'share':>7}")
+    for stage, value in report["stage_ms_per_file"].items():
+        print(f"{stage:<32} {value:9.3f} {value / total:7.1%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="UTF-8") as f_handle:
+            json.dump(report, f_handle, indent=4)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="UTF-8") as f_handle:
+            json.dump(report, f_handle, indent=4)
+        print(f"\nBaseline saved into {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="UTF-8") as f_handle:
+            baseline = json.load(f_handle)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond tolerance {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"    {regression}")
+            return 1
+        print(f"\nNo regressions beyond tolerance {args.tolerance:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Tree annotation benchmark. Compares time and memory use of the former
+annotation, where add_parents and add_siblings set parent_node,
+previous_sibling and next_sibling attributes to every node before the
+scope index was created, and the single pass analysis_utils.TreeIndex,
+which stores the same links in side tables. Memory is measured with
+tracemalloc while all trees of the corpus are annotated and kept alive
+at the same time, as in bulk analysis of large submission corpora.
+
+Usage: python benchmarks/annotation_benchmark.py [PATH ...] [-n ROUNDS]
+           [--copies N] [--json FILE]
+"""
+
+import argparse
+import ast
+import gc
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import src.analysers.analysis_utils as a_utils
+
+DEFAULT_PATHS = (ROOT.joinpath("tests"), ROOT.joinpath("misc"))
+
+
+########################################################################
+# Former annotation, kept here as a reference
+def add_parents(tree):
+    for node in ast.walk(tree):
+        for child_node in ast.iter_child_nodes(node):
+            child_node.parent_node = node
+
+
+def add_siblings(tree):
+    for node in ast.walk(tree):
+        for field in ast.iter_fields(node):
+            if(isinstance(field[1], (list, tuple))):
+                previous_sibling = last = None
+                for child_node in field[1]:
+                    try:
+                        if(previous_sibling):
+                            previous_sibling.next_sibling = child_node
+
+                        child_node.previous_sibling = previous_sibling
+                        previous_sibling = last = child_node
+                    except AttributeError:
+                        pass
+                if(last):
+                    last.next_sibling = None
+
+
+class ScopeIndex():
+    def __init__(self, tree):
+        self.nodes = []
+        self.ids = {}
+        self.depth = []
+        self.scopes = []
+
+        stack = [(tree, 0, {})]
+        while stack:
+            node, depth, scope = stack.pop()
+            i = len(self.nodes)
+            self.nodes.append(node)
+            self.ids[id(node)] = i
+            self.depth.append(depth)
+            self.scopes.append(scope)
+
+            node_type = type(node)
+            if node_type in a_utils.SCOPE_TYPES:
+                scope = dict(scope)
+                scope[node_type] = i
+
+            for child_node in ast.iter_child_nodes(node):
+                if not isinstance(child_node, a_utils.SHARED_TYPES):
+                    stack.append((child_node, depth + 1, scope))
+
+
+def annotate_attributes(trees):
+    indexes = []
+    for tree in trees:
+        add_parents(tree)
+        add_siblings(tree)
+        indexes.append(ScopeIndex(tree))
+    return indexes
+
+
+def annotate_index(trees):
+    return [a_utils.TreeIndex(tree) for tree in trees]
+
+
+ANNOTATORS = (
+    ("former", annotate_attributes),
+    ("tree index", annotate_index),
+)
+
+
+########################################################################
+def read_corpus(paths):
+    """Return: Source codes of parseable Python files in paths - list"""
+
+    sources = []
+    for path in map(pathlib.Path, paths):
+        files = [path] if path.is_file() else sorted(path.rglob("*.py"))
+        for filepath in files:
+            try:
+                content = filepath.read_text(encoding="UTF-8")
+                ast.parse(content)
+            except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+                continue
+            sources.append(content)
+    return sources
+
+
+def measure(annotator, sources, rounds):
+    """
+    Function to measure annotation of fresh trees parsed from sources.
+
+    Return: Tuple of (median time in milliseconds, peak memory of the
+    annotation in MiB, memory retained after annotation in MiB)
+    """
+
+    times = []
+    for _ in range(rounds):
+        trees = [ast.parse(content) for content in sources]
+        gc.collect()
+        start = time.perf_counter()
+        result = annotator(trees)
+        times.append((time.perf_counter() - start) * 1000)
+        del trees, result
+
+    trees = [ast.parse(content) for content in sources]
+    gc.collect()
+    tracemalloc.start()
+    result = annotator(trees)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del trees, result
+    return statistics.median(times), peak / 2**20, retained / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASPA tree annotation benchmark")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS,
+                        help="Files and directories of the corpus.")
+    parser.add_argument("-n", "--rounds", type=int, default=5)
+    parser.add_argument("--copies", type=int, default=20,
+                        help="Number of times corpus is repeated.")
+    parser.add_argument("--json", help="Write results also into JSON file.")
+    args = parser.parse_args()
+
+    sources = read_corpus(args.paths) * max(args.copies, 1)
+    nodes = sum(len(a_utils.TreeIndex(ast.parse(i)).nodes) for i in sources)
+    print(f"Corpus: {len(sources)} files, {nodes} indexed nodes")
+
+    report = {"files": len(sources), "nodes": nodes, "annotators": {}}
+    print(f"{'annotator':<16} {'time ms':>9} {'peak MiB':>9} {'kept MiB':>9}")
+    for name, annotator in ANNOTATORS:
+        time_ms, peak, retained = measure(annotator, sources, args.rounds)
+        report["annotators"][name] = {
+            "time_ms": time_ms, "peak_mib": peak, "retained_mib": retained
+        }
+        print(f"{name:<16} {time_ms:9.1f} {peak:9.1f} {retained:9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="UTF-8") as f_handle:
+            json.dump(report, f_handle, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Synthetic submission corpus generator for benchmarks. Realistic course
+corpora are generated by mutating and combining the test fixtures in
+tests/ and AST examples in misc/ast_examples. Generated corpus has the
+course directory structure used in bulk analysis, i.e.
+
+    COURSE/<student>/<assignment>/<files>
+
+where each student directory has metadata.json and analysed files are
+named by assignment and task, e.g. L01T2_AR5_parameters.py.
+
+Mutations are done to the abstract syntax tree and code is generated
+again with ast.unparse, therefore mutated files do not have comments of
+the original file. Mutations are:
+1. rename - Consistently rename functions, parameters and variables.
+2. combine - Add functions of another fixture file.
+3. reorder - Shuffle top level function definitions.
+4. grow - Add renamed copies of the functions.
+5. header - Add header comments with author and date.
+Files which are not parseable (e.g. syntax error fixtures) are copied
+as they are. Local libraries imported by the fixture are copied into the
+same assignment directory.
+
+Usage: python benchmarks/corpus_generator.py TARGET_DIR [--students N]
+           [--assignments N] [--files N] [--seed N]
+"""
+
+import argparse
+import ast
+import builtins
+import copy
+import json
+import pathlib
+import random
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+SOURCE_DIRS = (ROOT.joinpath("tests"), ROOT.joinpath("misc", "ast_examples"))
+
+# Names which are not renamed, e.g. main functions are looked up by name
+KEPT_NAMES = frozenset(dir(builtins)) | {"main", "paaohjelma", "self", "cls"}
+
+
+########################################################################
+# Mutations
+class Renamer(ast.NodeTransformer):
+    """Class to rename given names in functions, arguments and variables."""
+
+    def __init__(self, names):
+        self.names = names
+
+    def visit_Name(self, node):
+        node.id = self.names.get(node.id, node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self.names.get(node.arg, node.arg)
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        node.name = self.names.get(node.name, node.name)
+        return self.generic_visit(node)
+
+    def visit_keyword(self, node):
+        node.arg = self.names.get(node.arg, node.arg)
+        return self.generic_visit(node)
+
+
+def get_defined_names(tree):
+    """Return: Names of functions, parameters and variables - set"""
+
+    imported = set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imported.update((i.asname or i.name).split(".")[0] for i in node.names)
+        elif isinstance(node, ast.FunctionDef):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+    return {i for i in names - imported - KEPT_NAMES if not i.startswith("__")}
+
+
+def rename(tree, rng, suffix):
+    names = get_defined_names(tree)
+    renamed = {i: f"{i}{suffix}" for i in names if rng.random() < 0.7}
+    return Renamer(renamed).visit(tree)
+
+
+def get_functions(tree):
+    return [i for i in tree.body if isinstance(i, ast.FunctionDef)]
+
+
+def insert_functions(tree, functions):
+    """Insert functions after the last top level function definition."""
+
+    position = 0
+    for i, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)):
+            position = i + 1
+    tree.body[position:position] = functions
+    return tree
+
+
+def combine(tree, other, rng):
+    functions = [
+        copy.deepcopy(i) for i in get_functions(other)
+        if i.name not in KEPT_NAMES
+    ]
+    names = {i.name for i in get_functions(tree)}
+    functions = [i for i in functions if i.name not in names]
+    return insert_functions(tree, rng.sample(functions, min(len(functions), 3)))
+
+
+def reorder(tree, rng):
+    indexes = [i for i, node in enumerate(tree.body) if isinstance(node, ast.FunctionDef)]
+    functions = [tree.body[i] for i in indexes]
+    rng.shuffle(functions)
+    for i, node in zip(indexes, functions):
+        tree.body[i] = node
+    return tree
+
+
+def grow(tree, rng):
+    copies = []
+    for function in get_functions(tree):
+        if function.name in KEPT_NAMES:
+            continue
+        for n in range(rng.randint(0, 2)):
+            new = copy.deepcopy(function)
+            copies.append(Renamer({function.name: f"{function.name}_v{n + 2}"}).visit(new))
+    return insert_functions(tree, copies)
+
+
+def add_header(content, rng, student):
+    if rng.random() < 0.5:
+        return content
+    header = (
+        f"# Tekijä: Student {student}\n"
+        f"# Opiskelijanumero: {rng.randint(100000, 999999)}\n"
+        f"# Päivämäärä: {rng.randint(1, 28)}.{rng.randint(1, 12)}.2021\n"
+        "# Yhteistyö ja lähteet, nimi ja yhteistyön muoto:\n"
+        "# HUOM! KAIKKI KURSSIN TEHTÄVÄT OVAT HENKILÖKOHTAISIA!\n"
+    )
+    return header + content
+
+
+def mutate(content, other, rng, student):
+    """
+    Function to create mutated version of the content.
+
+    Arguments:
+    1. content - Source code of the fixture - str
+    2. other - Source code of another fixture, which functions can be
+       combined into the content - str
+    3. rng - Random number generator - random.Random
+    4. student - Student number used in names and header - int
+
+    Return: Mutated source code - str
+    """
+
+    try:
+        tree = ast.parse(content)
+        other_tree = ast.parse(other)
+    except (SyntaxError, ValueError):
+        return content
+
+    if rng.random() < 0.4:
+        tree = combine(tree, other_tree, rng)
+    if rng.random() < 0.3:
+        tree = grow(tree, rng)
+    if rng.random() < 0.3:
+        tree = reorder(tree, rng)
+    if rng.random() < 0.8:
+        tree = rename(tree, rng, f"_{student}")
+    return add_header(ast.unparse(ast.fix_missing_locations(tree)) + "\n", rng, student)
+
+
+########################################################################
+def read_sources(source_dirs=SOURCE_DIRS):
+    """Return: Dict where key is fixture path and value source code."""
+
+    sources = {}
+    for source_dir in source_dirs:
+        for filepath in sorted(source_dir.rglob("*.py")):
+            try:
+                sources[filepath] = filepath.read_text(encoding="UTF-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+    return sources
+
+
+def get_local_libraries(filepath, content):
+    """Return: Paths of local libraries imported in the fixture - list"""
+
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+
+    libraries = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [i.name for i in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            library = filepath.parent.joinpath(f"{name}.py")
+            if library != filepath and library.is_file():
+                libraries.append(library)
+    return libraries
+
+
+def generate_corpus(target_dir, students=20, assignments=5, files=3, seed=0,
+                    course="COURSE"):
+    """
+    Function to generate synthetic submission corpus.
+
+    Arguments:
+    1. target_dir - Directory where corpus is generated - str or Path
+    2. students - Number of students - int
+    3. assignments - Number of assignments per student - int
+    4. files - Number of analysed files per assignment - int
+    5. seed - Seed of the random number generator, same seed
+       generates the same corpus - int
+    6. course - Name of the course directory - str
+
+    Return: Path of the course directory
+    """
+
+    rng = random.Random(seed)
+    sources = read_sources()
+    fixtures = list(sources.keys())
+    course_dir = pathlib.Path(target_dir).joinpath(course)
+
+    for student in range(1, students + 1):
+        username = f"student_{student:04}"
+        student_dir = course_dir.joinpath(username)
+        student_dir.mkdir(parents=True, exist_ok=True)
+        metadata = {"user": {"username": username, "name": f"Student {student}", "id": student}}
+        student_dir.joinpath("metadata.json").write_text(json.dumps(metadata), encoding="UTF-8")
+
+        for assignment in range(1, assignments + 1):
+            directory = student_dir.joinpath(f"L{assignment:02}")
+            directory.mkdir(exist_ok=True)
+
+            for task, fixture in enumerate(rng.sample(fixtures, min(files, len(fixtures))), 1):
+                other = sources[rng.choice(fixtures)]
+                content = mutate(sources[fixture], other, rng, student)
+                filename = f"L{assignment:02}T{task}_{fixture.name}"
+                directory.joinpath(filename).write_text(content, encoding="UTF-8")
+
+                for library in get_local_libraries(fixture, sources[fixture]):
+                    target = directory.joinpath(library.name)
+                    if not target.exists():
+                        target.write_text(sources.get(library, ""), encoding="UTF-8")
+    return course_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASPA synthetic corpus generator")
+    parser.add_argument("target_dir")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--assignments", type=int, default=5)
+    parser.add_argument("--files", type=int, default=3,
+                        help="Number of files per assignment.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    course_dir = generate_corpus(
+        args.target_dir,
+        students=args.students,
+        assignments=args.assignments,
+        files=args.files,
+        seed=args.seed
+    )
+    print(f"Corpus generated into {course_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
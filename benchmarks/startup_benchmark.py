@@ -0,0 +1,145 @@
+"""
+Startup time benchmark. Measures interpreter startup and import time of
+ASPA modules with 'python -X importtime' and wall time of a single file
+command line analysis, which is the use case of grading hooks where ASPA
+is started once per submission.
+
+Usage: python benchmarks/startup_benchmark.py [-n ROUNDS] [--json FILE]
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+SAMPLE_FILE = ROOT.joinpath("tests", "OK_files", "paaohjelma.py")
+
+# Imported entry points, measured in separate interpreters
+ENTRY_POINTS = (
+    "src.config.config",
+    "src.utils_lib",
+    "src.analysers.analysis_lib",
+    "src.CLI",
+)
+
+# Modules which should not be imported in single file command line run
+LAZY_MODULES = (
+    "tkinter",
+    "yaml",
+    "src.bulk_analysis_utils",
+    "src.result_cache",
+    "src.BKT.BKT_analyser",
+    "concurrent.futures",
+    "src.analysers.function_analyser",
+)
+
+
+def parse_importtime(stderr):
+    """
+    Function to parse output of 'python -X importtime'.
+
+    Return: dict where key is module name and value is tuple of self
+    and cumulative import times in microseconds.
+    """
+
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure_import(module, rounds):
+    """
+    Return: Tuple of (median cumulative import time of module in
+    milliseconds, median self/cumulative times of all imported modules).
+    """
+
+    samples = {}
+    for _ in range(rounds):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        for name, value in parse_importtime(process.stderr).items():
+            samples.setdefault(name, []).append(value)
+
+    modules = {
+        name: (
+            statistics.median(i[0] for i in values) / 1000,
+            statistics.median(i[1] for i in values) / 1000
+        )
+        for name, values in samples.items()
+    }
+    return modules[module][1], modules
+
+
+def measure_cli_run(rounds):
+    """
+    Function to measure wall time of single file analysis from command
+    line with one selected analyser.
+
+    Return: Tuple of (median wall time in milliseconds, imported lazy
+    modules)
+    """
+
+    samples = []
+    imported = set()
+    with tempfile.TemporaryDirectory() as result_dir:
+        command = [
+            sys.executable, "-X", "importtime", "ASPA_main.py", str(SAMPLE_FILE),
+            "-q", "--no-file-write", "-s", "basic", "-o", result_dir
+        ]
+        for _ in range(rounds):
+            start = time.perf_counter()
+            process = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+            samples.append((time.perf_counter() - start) * 1000)
+            imported.update(
+                name for name in parse_importtime(process.stderr)
+                if name in LAZY_MODULES
+            )
+    return statistics.median(samples), sorted(imported)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASPA startup time benchmark")
+    parser.add_argument("-n", "--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Write results also into JSON file.")
+    parser.add_argument("--top", type=int, default=15,
+                        help="Number of slowest modules shown per entry point.")
+    args = parser.parse_args()
+
+    report = {"entry_points": {}, "modules": {}}
+    for entry_point in ENTRY_POINTS:
+        total, modules = measure_import(entry_point, args.rounds)
+        report["entry_points"][entry_point] = total
+        report["modules"][entry_point] = modules
+
+        print(f"\nimport {entry_point}: {total:.1f} ms")
+        print(f"    {'self ms':>8} {'cumul. ms':>9}  module")
+        slowest = sorted(modules.items(), key=lambda x: x[1][0], reverse=True)
+        for name, (self_ms, cumulative_ms) in slowest[:args.top]:
+            print(f"    {self_ms:8.2f} {cumulative_ms:9.2f}  {name}")
+
+    wall_ms, imported = measure_cli_run(args.rounds)
+    report["cli_single_file_ms"] = wall_ms
+    report["cli_lazy_modules_imported"] = imported
+    print(f"\nSingle file command line analysis: {wall_ms:.1f} ms")
+    if imported:
+        print(f"Modules which should be imported lazily: {', '.join(imported)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="UTF-8") as f_handle:
+            json.dump(report, f_handle, indent=4)
+    return 1 if imported else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
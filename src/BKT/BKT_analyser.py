@@ -1,7 +1,12 @@
 """BKT analyser file."""
 
+import array
 from typing import Iterable
 
+# Default parameters of each skill: p_Guess, p_Slip, p_T and p_L0, see
+# BayesianKnowledgeTracingAnalyser.
+DEFAULT_PARAMETERS = (0.3, 0.1, 0.7, 0)
+
 class BayesianKnowledgeTracingAnalyser():
     """
     Class to handle Bayesian Knowledge Tracing (BKT) Analysis of student
@@ -100,14 +105,226 @@ class Student():
 
         self.results.setdefault(
             key,
-            BayesianKnowledgeTracingAnalyser(
-                p_Guess=0.3,
-                p_Slip=0.1,
-                p_T=0.7,
-                p_L0=0
-            )
+            BayesianKnowledgeTracingAnalyser(*DEFAULT_PARAMETERS)
         ).update_Ln(success)
 
         return None
 
 
+class CohortBKT():
+    """
+    Class for handling Bayesian Knowledge Tracing results of all students
+    of an analysis run. Ln values and observation counts of each student
+    and skill are stored in arrays of students x skills, instead of an
+    object per student and skill as in Student. Updates are the same as
+    in BayesianKnowledgeTracingAnalyser.update_Ln, i.e. the results are
+    equal.
+
+    When record is True, observation sequences of each student and skill
+    are stored, so that parameters can be fitted (see BKT_fitting.py)
+    and Ln values recalculated with replay without analysing again.
+
+    State of the students, i.e. Ln values, observation counts and
+    analysed files, can be stored with get_state and continued in a
+    later run with set_state, so that only new files are analysed.
+    """
+
+    def __init__(self, skills, parameters=None, record=False):
+        """
+        Arguments:
+        1. skills - Violation IDs which are traced, order of the skills
+           is the order of the columns - Iterable[str]
+        2. parameters - Dict where key is skill and value is a tuple of
+           (p_Guess, p_Slip, p_T, p_L0). Missing skills use
+           DEFAULT_PARAMETERS - dict
+        3. record - Store observation sequences - bool
+        """
+
+        self.skills = list(skills)
+        self.skill_index = {skill: j for j, skill in enumerate(self.skills)}
+        self.students = []
+        self.files = []  # Row -> identifiers of analysed files
+        self._row_index = {}
+        self.Ln = array.array("d")
+        self.counts = array.array("L")
+        self.sequences = {} if record else None  # Cell -> successes
+        self.set_parameters(parameters or {})
+
+    def set_parameters(self, parameters):
+        """
+        Method to set parameters of the skills. Constants of the update
+        are calculated once per skill.
+        """
+
+        self.parameters = [
+            tuple(parameters.get(skill, DEFAULT_PARAMETERS)) for skill in self.skills
+        ]
+        self._constants = [
+            (pG, pS, pT, 1 - pS, 1 - pG) for pG, pS, pT, _ in self.parameters
+        ]
+        self._initial = array.array("d", (pL0 for *_, pL0 in self.parameters))
+
+    def add_student(self, student_id):
+        """
+        Method to add student with initial Ln values. Existing students
+        are not reset.
+
+        Return: Row of the student - int
+        """
+
+        try:
+            return self._row_index[student_id]
+        except KeyError:
+            row = self._row_index[student_id] = len(self.students)
+            self.students.append(student_id)
+            self.files.append(set())
+            self.Ln.extend(self._initial)
+            self.counts.extend(bytes(len(self.skills)))
+            return row
+
+    def add_results(self, row, results):
+        """
+        Method to update Ln values of the student with results in the
+        order they were found. Results of other than traced skills are
+        ignored.
+
+        Arguments:
+        1. row - Row of the student, see add_student - int
+        2. results - Tuples of (violation ID, success) - Iterable[tuple]
+
+        Return: None
+        """
+
+        Ln = self.Ln
+        counts = self.counts
+        skill_index = self.skill_index
+        constants = self._constants
+        sequences = self.sequences
+        offset = row * len(self.skills)
+
+        for key, success in results:
+            try:
+                j = skill_index[key]
+            except KeyError:
+                continue
+            pG, pS, pT, not_pS, not_pG = constants[j]
+            pLn = Ln[offset + j]
+            if success:
+                action = (not_pS * pLn) / ((not_pS * pLn) + (pG * (1 - pLn)))
+            else:
+                action = (pS * pLn) / ((pS * pLn) + (not_pG * (1 - pLn)))
+            Ln[offset + j] = action + ((1 - action) * pT)
+            counts[offset + j] += 1
+            if sequences is not None:
+                try:
+                    sequences[offset + j].append(1 if success else 0)
+                except KeyError:
+                    sequences[offset + j] = bytearray((1 if success else 0,))
+        return None
+
+    def get_sequences(self, skill):
+        """
+        Return: Recorded observation sequences of the skill for students
+        who have observations - list[bytearray]
+        """
+
+        j = self.skill_index[skill]
+        size = len(self.skills)
+        return [
+            self.sequences[cell] for cell in range(j, len(self.Ln), size)
+            if cell in self.sequences
+        ]
+
+    def replay(self):
+        """
+        Method to calculate Ln values again from recorded observation
+        sequences with current parameters, e.g. after set_parameters.
+        """
+
+        skills = self.skills
+        sequences = self.sequences
+        self.sequences = None  # Sequences are not recorded again
+        try:
+            for row in range(len(self.students)):
+                start = row * len(skills)
+                self.Ln[start:start + len(skills)] = self._initial
+                self.counts[start:start + len(skills)] = array.array("L", [0]) * len(skills)
+                self.add_results(row, (
+                    (skill, success)
+                    for j, skill in enumerate(skills)
+                    for success in sequences.get(start + j, ())
+                ))
+        finally:
+            self.sequences = sequences
+        return None
+
+    def get_row(self, row):
+        """Return: Tuple of Ln values and observation counts of the row."""
+
+        start = row * len(self.skills)
+        end = start + len(self.skills)
+        return self.Ln[start:end], self.counts[start:end]
+
+    def get_state(self):
+        """
+        Return: Skills, parameters and state of each student in JSON
+        serialisable format - dict
+        """
+
+        size = len(self.skills)
+        return {
+            "skills": self.skills,
+            "parameters": dict(zip(self.skills, self.parameters)),
+            "students": {
+                student: {
+                    "Ln": list(self.Ln[row * size:(row + 1) * size]),
+                    "counts": list(self.counts[row * size:(row + 1) * size]),
+                    "files": sorted(self.files[row])
+                }
+                for row, student in enumerate(self.students)
+            }
+        }
+
+    def set_state(self, state):
+        """
+        Method to continue from the state of get_state. State is used
+        only if its skills and parameters are the same as in this
+        object, because otherwise Ln values are not comparable.
+
+        Return: True if state was used, otherwise False - bool
+        """
+
+        parameters = {
+            skill: tuple(values) for skill, values in state["parameters"].items()
+        }
+        if (state["skills"] != self.skills
+                or parameters != dict(zip(self.skills, self.parameters))):
+            return False
+
+        size = len(self.skills)
+        for student, values in state["students"].items():
+            if len(values["Ln"]) != size or len(values["counts"]) != size:
+                raise ValueError(f"Invalid BKT state of student {student}")
+            row = self.add_student(student)
+            self.Ln[row * size:(row + 1) * size] = array.array("d", values["Ln"])
+            self.counts[row * size:(row + 1) * size] = array.array("L", values["counts"])
+            self.files[row].update(values["files"])
+        return True
+
+    def format_row(self, row, accuracy=3, cell_separator=";", decimal_separator=","):
+        """
+        Method to format Ln values of the student as a line of BKT
+        result file. Skills without results are 0.
+
+        Return: 'studentID;float;...;float' - str
+        """
+
+        values, counts = self.get_row(row)
+        return "{0}{1}{2}".format(
+            self.students[row],
+            cell_separator,
+            cell_separator.join(
+                str(round(value, accuracy)) if count else "0"
+                for value, count in zip(values, counts)
+            ).replace(".", decimal_separator)
+        )
@@ -0,0 +1,250 @@
+"""
+BKT parameter fitting file. Parameters p_Guess, p_Slip, p_T and p_L0 of
+each skill are estimated from the observation sequences of the whole
+cohort with expectation maximisation (Baum-Welch) of the two state
+hidden Markov model of BKT, i.e. the skill is either not known or known
+and a known skill is not forgotten.
+
+Identical sequences, e.g. students who passed every check, are
+calculated once and weighted by their count, therefore the time of an
+iteration depends on the number of distinct sequences instead of the
+number of students.
+"""
+
+import json
+import math
+from collections import Counter
+
+import src.utils_lib as utils
+from src.BKT.BKT_analyser import DEFAULT_PARAMETERS
+
+MIN_PROBABILITY = 0.001   # Parameters are kept away from 0 and 1, e.g. EM
+                          # never changes p_L0 of 0
+MAX_GUESS = 0.5           # Guess and slip over 0.5 would mean that the
+MAX_SLIP = 0.5            # known and not known states swap meaning
+MIN_SEQUENCES = 10        # Skills with fewer students keep their parameters
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6          # Minimum improvement of log-likelihood per observation
+PARAMETER_NAMES = ("p_Guess", "p_Slip", "p_T", "p_L0")
+
+
+def _clamp(value, low, high):
+    return min(max(value, low), high)
+
+
+def _expectation(sequences, parameters):
+    """
+    Function to calculate expected counts of the states with forward-
+    backward algorithm. Probabilities are normalised at each step to
+    avoid underflow.
+
+    Arguments:
+    1. sequences - Counter where key is sequence of successes (bytes)
+       and value is number of students with that sequence - Counter
+    2. parameters - Tuple of (p_Guess, p_Slip, p_T, p_L0) - tuple
+
+    Return: Tuple of expected counts and log-likelihood of the sequences
+    """
+
+    pG, pS, pT, pL0 = parameters
+    emission = ((1 - pG, pG), (pS, 1 - pS))  # State -> observation -> probability
+
+    known_first = 0.0       # Known at the first observation
+    learned = 0.0           # Transitions from not known to known
+    not_known_before = 0.0  # Not known before a transition
+    not_known = [0.0, 0.0]  # Observation -> expected count while not known
+    known = [0.0, 0.0]      # Observation -> expected count while known
+    log_likelihood = 0.0
+
+    for sequence, weight in sequences.items():
+        # Forward
+        forward = []
+        scales = []
+        a0 = (1 - pL0) * emission[0][sequence[0]]
+        a1 = pL0 * emission[1][sequence[0]]
+        for i, obs in enumerate(sequence):
+            if i:
+                a0, a1 = (
+                    a0 * (1 - pT) * emission[0][obs],
+                    (a0 * pT + a1) * emission[1][obs]
+                )
+            scale = a0 + a1
+            a0 /= scale
+            a1 /= scale
+            forward.append((a0, a1))
+            scales.append(scale)
+            log_likelihood += weight * math.log(scale)
+
+        # Backward and expected counts
+        b0 = b1 = 1.0
+        for i in range(len(sequence) - 1, -1, -1):
+            a0, a1 = forward[i]
+            g0 = a0 * b0
+            g1 = a1 * b1
+            total = g0 + g1
+            g0 /= total
+            g1 /= total
+            obs = sequence[i]
+            not_known[obs] += weight * g0
+            known[obs] += weight * g1
+
+            if i:
+                # Transition from i - 1 to i
+                p0, p1 = forward[i - 1]
+                e0 = emission[0][obs] * b0
+                e1 = emission[1][obs] * b1
+                x00 = p0 * (1 - pT) * e0
+                x01 = p0 * pT * e1
+                x11 = p1 * e1
+                total = x00 + x01 + x11
+                learned += weight * x01 / total
+                not_known_before += weight * (x00 + x01) / total
+
+                scale = scales[i]
+                b0, b1 = ((1 - pT) * e0 + pT * e1) / scale, e1 / scale
+            else:
+                known_first += weight * g1
+
+    counts = (known_first, learned, not_known_before, not_known, known)
+    return counts, log_likelihood
+
+
+def _maximisation(counts, sequence_count, parameters):
+    """Return: New parameters from the expected counts - tuple"""
+
+    known_first, learned, not_known_before, not_known, known = counts
+    pG, pS, pT, _ = parameters
+
+    if sum(not_known):
+        pG = not_known[1] / sum(not_known)
+    if sum(known):
+        pS = known[0] / sum(known)
+    if not_known_before:
+        pT = learned / not_known_before
+    pL0 = known_first / sequence_count
+
+    return (
+        _clamp(pG, MIN_PROBABILITY, MAX_GUESS),
+        _clamp(pS, MIN_PROBABILITY, MAX_SLIP),
+        _clamp(pT, MIN_PROBABILITY, 1 - MIN_PROBABILITY),
+        _clamp(pL0, MIN_PROBABILITY, 1 - MIN_PROBABILITY)
+    )
+
+
+def fit_skill(sequences, initial=DEFAULT_PARAMETERS, max_iterations=MAX_ITERATIONS,
+              tolerance=TOLERANCE):
+    """
+    Function to fit BKT parameters of a skill.
+
+    Arguments:
+    1. sequences - Observation sequences of the students, each sequence
+       contains 1 (success) or 0 (failure) values in the order of
+       observations - Iterable[bytes]
+    2. initial - Initial parameters (p_Guess, p_Slip, p_T, p_L0) - tuple
+    3. max_iterations - Maximum number of EM iterations - int
+    4. tolerance - Iteration stops when log-likelihood per observation
+       improves less than this - float
+
+    Return: Tuple of fitted parameters, log-likelihood and iterations.
+    """
+
+    sequences = Counter(bytes(i) for i in sequences if i)
+    sequence_count = sum(sequences.values())
+    observations = sum(len(i) * n for i, n in sequences.items())
+    parameters = (
+        _clamp(initial[0], MIN_PROBABILITY, MAX_GUESS),
+        _clamp(initial[1], MIN_PROBABILITY, MAX_SLIP),
+        _clamp(initial[2], MIN_PROBABILITY, 1 - MIN_PROBABILITY),
+        _clamp(initial[3], MIN_PROBABILITY, 1 - MIN_PROBABILITY)
+    )
+    if not observations:
+        return parameters, 0.0, 0
+
+    previous = -math.inf
+    iteration = 0
+    log_likelihood = previous
+    while iteration < max_iterations:
+        counts, log_likelihood = _expectation(sequences, parameters)
+        iteration += 1
+        if (log_likelihood - previous) / observations < tolerance:
+            break
+        previous = log_likelihood
+        parameters = _maximisation(counts, sequence_count, parameters)
+
+    return parameters, log_likelihood, iteration
+
+
+def fit_parameters(cohort, parameters=None, min_sequences=MIN_SEQUENCES):
+    """
+    Function to fit parameters of each skill of the cohort. Cohort has
+    to record observation sequences, see CohortBKT.
+
+    Arguments:
+    1. cohort - BKT results of the students - CohortBKT
+    2. parameters - Dict where key is skill and value is initial
+       parameters, by default parameters of the cohort - dict
+    3. min_sequences - Skills which have fewer students with
+       observations are not fitted - int
+
+    Return: Dict where key is skill and value is dict of parameters and
+    fitting information, see write_parameters.
+    """
+
+    if parameters is None:
+        parameters = dict(zip(cohort.skills, cohort.parameters))
+
+    fitted = {}
+    for skill in cohort.skills:
+        sequences = cohort.get_sequences(skill)
+        if len(sequences) < min_sequences:
+            continue
+
+        values, log_likelihood, iterations = fit_skill(
+            sequences, initial=parameters.get(skill, DEFAULT_PARAMETERS)
+        )
+        fitted[skill] = dict(zip(PARAMETER_NAMES, values))
+        fitted[skill].update({
+            "students": len(sequences),
+            "observations": sum(len(i) for i in sequences),
+            "log_likelihood": log_likelihood,
+            "iterations": iterations
+        })
+    return fitted
+
+
+def write_parameters(filepath, fitted):
+    """
+    Function to write fitted parameters into JSON file, where key is
+    skill and value is dict of p_Guess, p_Slip, p_T, p_L0, students,
+    observations, log_likelihood and iterations.
+    """
+
+    utils.write_file(filepath, json.dumps(fitted, indent=4), mode="w")
+
+
+def read_parameters(filepath):
+    """
+    Function to read fitted parameters from JSON file written by
+    write_parameters.
+
+    Return: Dict where key is skill and value is tuple of (p_Guess,
+    p_Slip, p_T, p_L0). Empty if file is not found or it is invalid.
+    """
+
+    content = utils.read_file(filepath)
+    try:
+        return {
+            skill: tuple(float(values[name]) for name in PARAMETER_NAMES)
+            for skill, values in json.loads(content).items()
+        }
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return {}
+
+
+def to_parameters(fitted):
+    """Return: Parameters of write_parameters format as tuples - dict"""
+
+    return {
+        skill: tuple(values[name] for name in PARAMETER_NAMES)
+        for skill, values in fitted.items()
+    }
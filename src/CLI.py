@@ -0,0 +1,398 @@
+"""Command line controller"""
+
+import argparse
+import json
+import sys
+
+import src.analysers.analysis_lib as analysis  # Model
+import src.config.config as cnf
+import src.utils_lib as utils
+
+# Constants
+TOOL_NAME = cnf.TOOL_NAME
+
+# Exit codes
+EXIT_OK = 0          # Analysis done and no violations detected
+EXIT_VIOLATIONS = 1  # Analysis done and violations detected
+EXIT_USAGE = 2       # Invalid arguments, no files or no selections
+EXIT_INTERRUPTED = 130  # Analysis interrupted with Ctrl+C
+
+ANALYSIS_TYPES = ("default", "bulk", "BKTA")
+OUTPUT_FORMATS = ("text", "json")
+SEVERITY_NAMES = {
+    cnf.ERROR: "error",
+    cnf.WARNING: "warning",
+    cnf.NOTE: "note",
+    cnf.GOOD: "good",
+    cnf.DEBUG: "debug"
+}
+VIOLATION_SEVERITIES = (cnf.ERROR, cnf.WARNING, cnf.NOTE)
+
+
+class ResultPrinter():
+    """
+    Command line counterpart of view.ResultPage. Model calls
+    show_results once per analysed file.
+    """
+
+    def __init__(self, settings, output_format="text"):
+        self.settings = settings
+        self.output_format = output_format
+        self.violations = 0
+        self.file_results = []  # Results of each file in JSON output
+
+    def show_results(self, line_list):
+        """Method to show analysis results in selected output channels."""
+
+        for msg in line_list:
+            if len(msg) >= 2 and msg[1] in VIOLATION_SEVERITIES:
+                self.violations += 1
+
+        # Last \n is added because of file.write() command doesn't add it.
+        content = "\n".join((map(lambda elem: elem[0], line_list))) + "\n"
+        if self.settings["console_print"]:
+            print(content, end="")
+
+        if self.settings["file_write"]:
+            utils.write_file(self.settings["result_path"], content, mode="a")
+
+        if self.output_format == "json":
+            # Filename, filepath and separator lines are GENERAL lines
+            self.file_results.append([
+                {"message": msg[0], "severity": SEVERITY_NAMES[msg[1]]}
+                for msg in line_list if msg[0] and msg[1] in SEVERITY_NAMES
+            ])
+
+    def print_json(self, file_list):
+        """Method to print results of all files as JSON document."""
+
+        content = [
+            {"file": str(filepath.path), "results": results}
+            for filepath, results in zip(file_list, self.file_results)
+        ]
+        print(json.dumps(content, indent=4, ensure_ascii=False))
+        self.file_results.clear()
+
+
+class CLICLASS():
+    """
+    Main class for command line interface. Works as a MVC model
+    controller similarly to GUI.GUICLASS, but does not import tkinter
+    and therefore can be used e.g. in servers and CI pipelines.
+    """
+
+    def __init__(self, *args, settings={}, **kwargs):
+        self.settings = settings
+        self.LANG = settings.setdefault("language", "FIN")
+
+        # Detect and solve possible settings conflicts
+        conflicts = utils.detect_settings_conflicts(settings)
+        if conflicts:
+            utils.solve_settings_conflicts(conflicts, settings)
+            for c in conflicts:
+                self.propagate_error_message(c, error_type="conflict")
+
+        self.model = analysis.Model(self)
+
+    def get_lang(self):
+        return self.LANG
+
+    def get_settings(self):
+        return self.settings
+
+    def propagate_error_message(self, error_code, *args, error_type="error"):
+        # Errors are printed to stderr so that they do not mix with results
+        if error_type == "error":
+            print(cnf.CLI_ERROR[self.LANG][error_code], file=sys.stderr)
+
+        elif error_type == "conflict":
+            print(cnf.SETTINGS_CONFLICTS[self.LANG][error_code], file=sys.stderr)
+
+    def check_selection_validity(self, selections, file_structure):
+        valid = True
+        if sum(selections.values()) == 0:
+            valid = False
+            self.propagate_error_message("NO_SELECTIONS")
+
+        if not file_structure:
+            valid = False
+            self.propagate_error_message("NO_FILES")
+        return valid
+
+    def analyse_wrapper(self, selections, filepaths, analysis_type,
+                        output_format="text"):
+        """
+        Method to execute selected analysis type for given filepaths.
+
+        Arguments:
+        1. selections - Analysis selections, key is checkbox option and
+           value is 1 or 0 - dict
+        2. filepaths - Analysed files and directories - list[str]
+        3. analysis_type - One of ANALYSIS_TYPES - str
+        4. output_format - One of OUTPUT_FORMATS, used in default
+           analysis - str
+
+        Return: Exit code - int
+        """
+
+        if analysis_type == "BKTA":
+            output_format_ = "dict"
+        elif analysis_type == "bulk":
+            output_format_ = "bulk_dict"
+        else:  # default
+            output_format_ = "list"
+
+        file_structure = utils.directory_crawler(
+            filepaths,
+            only_leaf_files=self.settings["only_leaf_files"],
+            excluded_dirs=self.settings["excluded_directories"],
+            excluded_files=self.settings["excluded_files"],
+            output_format=output_format_
+        )
+
+        if not self.check_selection_validity(selections, file_structure):
+            return EXIT_USAGE
+
+        if analysis_type == "BKTA":
+            self.model.BKT_analyse(
+                selections,
+                file_structure
+            )
+
+            self.model.count_structures(file_structure)
+
+        elif analysis_type == "bulk":
+            self.model.bulk_analyse(
+                selections,
+                file_structure
+            )
+
+        else:
+            result_printer = ResultPrinter(self.settings, output_format)
+            self.model.default_analyse(
+                selections,
+                file_structure,
+                result_page=result_printer
+            )
+
+            if output_format == "json":
+                result_printer.print_json(file_structure)
+
+            if result_printer.violations:
+                return EXIT_VIOLATIONS
+
+        return EXIT_OK
+
+
+########################################################################
+# Command line arguments
+
+def parse_selections(value):
+    """
+    Function to parse comma separated analysis selections, e.g.
+    'basic,function'. Value 'all' selects all analysers.
+
+    Return: selections - dict
+    """
+
+    selected = {i.strip() for i in value.split(",") if i.strip()}
+    if "all" in selected:
+        selected = set(cnf.CHECKBOX_OPTIONS)
+
+    unknown = selected.difference(cnf.CHECKBOX_OPTIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown selection(s): {', '.join(sorted(unknown))}, "
+            f"choose from: all, {', '.join(cnf.CHECKBOX_OPTIONS)}"
+        )
+    return {key: int(key in selected) for key in cnf.CHECKBOX_OPTIONS}
+
+
+def create_argument_parser():
+    parser = argparse.ArgumentParser(
+        prog="ASPA_main.py",
+        description=f"{TOOL_NAME}. Without arguments graphical user "
+                    "interface is started.",
+        epilog=f"Exit codes: {EXIT_OK} no violations, {EXIT_VIOLATIONS} "
+               f"violations detected (default analysis), {EXIT_USAGE} "
+               "invalid arguments, files or selections, "
+               f"{EXIT_INTERRUPTED} interrupted."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Analysed files and directories, optional with --clear-cache."
+    )
+    parser.add_argument(
+        "-t", "--type",
+        dest="analysis_type",
+        choices=ANALYSIS_TYPES,
+        default="default",
+        help="Analysis type, BKTA also counts the structures. "
+             "Default is %(default)s."
+    )
+    parser.add_argument(
+        "-s", "--select",
+        dest="selections",
+        type=parse_selections,
+        default=parse_selections("all"),
+        help="Comma separated analysers: "
+             f"{', '.join(cnf.CHECKBOX_OPTIONS)}. Default is all."
+    )
+    parser.add_argument(
+        "-f", "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="Format of default analysis results printed to standard "
+             "output. Default is %(default)s."
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="Worker processes in bulk analysis, 0 means one per CPU core."
+    )
+    parser.add_argument(
+        "-l", "--language",
+        choices=tuple(cnf.CLI_ERROR.keys()),
+        help="Language of the results."
+    )
+    parser.add_argument(
+        "-o", "--result-dir",
+        help="Directory of the result files."
+    )
+    parser.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Do not print results to standard output, cannot be used "
+             "with -f json."
+    )
+    parser.add_argument(
+        "--no-file-write",
+        action="store_true",
+        help="Do not write default analysis results into result file."
+    )
+    parser.add_argument(
+        "--only-leaf-files",
+        action="store_true",
+        default=None,
+        help="Analyse only files in directories without subdirectories."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=None,
+        help="Continue interrupted bulk analysis."
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=None,
+        help="Use persistent result cache."
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Invalidate all results in the result cache before the "
+             "analysis. Without paths only the cache is cleared."
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        default=None,
+        help="Report time spent in each analyser method and counts of "
+             "each violation ID at the end of the analysis."
+    )
+    parser.add_argument(
+        "--fit-bkt",
+        action="store_true",
+        default=None,
+        help="Fit BKT parameters of each skill from the analysed students "
+             "and store them for --fitted-bkt."
+    )
+    parser.add_argument(
+        "--fitted-bkt",
+        action="store_true",
+        default=None,
+        help="Use BKT parameters stored by --fit-bkt."
+    )
+    parser.add_argument(
+        "--incremental-bkt",
+        action="store_true",
+        default=None,
+        help="Continue BKT values stored by previous runs and analyse "
+             "only new files. Files of each student are analysed in "
+             "natural order of week, exercise and path."
+    )
+    return parser
+
+
+def get_setting_overrides(args):
+    """
+    Function to convert parsed command line arguments into settings.
+    Arguments which are not given do not override the settings file.
+
+    Return: overrides - dict
+    """
+
+    overrides = {
+        "GUI_print": False,
+        "console_print": not args.quiet and args.output_format == "text"
+    }
+    if args.no_file_write:
+        overrides["file_write"] = False
+
+    for key, value in (
+            ("bulk_workers", args.workers),
+            ("language", args.language),
+            ("result_dir", args.result_dir),
+            ("only_leaf_files", args.only_leaf_files),
+            ("bulk_resume", args.resume),
+            ("result_cache", args.cache),
+            ("instrumentation", args.instrument),
+            ("BKT_fit_parameters", args.fit_bkt),
+            ("BKT_use_fitted_parameters", args.fitted_bkt),
+            ("BKT_incremental", args.incremental_bkt)):
+        if value is not None:
+            overrides[key] = value
+    return overrides
+
+
+def main(argv=None):
+    """
+    Main function of command line interface.
+
+    Arguments:
+    1. argv - Command line arguments without program name, default is
+       sys.argv[1:] - list[str]
+
+    Return: Exit code - int
+    """
+
+    parser = create_argument_parser()
+    args = parser.parse_args(argv)
+    if not args.paths and not args.clear_cache:
+        parser.error("the following arguments are required: paths")
+    if args.quiet and args.output_format == "json":
+        parser.error("argument -q/--quiet: not allowed with -f json")
+    settings = utils.init_settings(overrides=get_setting_overrides(args))
+    cli = CLICLASS(settings=settings)
+
+    if args.clear_cache:
+        cli.model.clear_result_cache()
+        if not args.paths:
+            return EXIT_OK
+
+    try:
+        return cli.analyse_wrapper(
+            args.selections,
+            args.paths,
+            args.analysis_type,
+            output_format=args.output_format
+        )
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
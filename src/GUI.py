@@ -14,6 +14,9 @@ except ModuleNotFoundError as e:
           " please contact course's teaching staff.")
     sys.exit(0)
 
+import queue
+import threading
+
 import src.analysers.analysis_lib as analysis  # Model
 import src.config.config as cnf
 import src.utils_lib as utils
@@ -21,6 +24,24 @@ import src.view_lib as view  # View
 
 # Constants
 TOOL_NAME = cnf.TOOL_NAME
+POLL_INTERVAL = 50  # Milliseconds between checks of analysis worker queue
+POLL_BATCH = 100    # Maximum number of worker messages handled per check
+
+
+class QueuedResultPage():
+    """
+    Result page for analysis worker thread. Tkinter widgets can be used
+    only from the main thread, therefore results are put into queue
+    and shown in ResultPage by the main thread, see
+    GUICLASS.poll_analysis.
+    """
+
+    def __init__(self, result_queue):
+        self.result_queue = result_queue
+
+    def show_results(self, line_list):
+        # Copy because Model clears the list after showing it
+        self.result_queue.put(("results", list(line_list)))
 
 
 class GUICLASS(tk.Tk):
@@ -49,6 +70,12 @@ class GUICLASS(tk.Tk):
         self.model = analysis.Model(self)
         self.main_frame = view.MainFrame(self, self.LANG)
 
+        # Analysis is executed in worker thread, which sends results and
+        # end of the analysis to the main thread through the queue.
+        self._worker = None
+        self._progress = None
+        self._queue = queue.Queue()
+
         # Display the menu at the top
         tk.Tk.config(self, menu=self.main_frame.menu)
 
@@ -87,16 +114,78 @@ class GUICLASS(tk.Tk):
                     selections[key] = int(selections[key].get())
         return selections
 
+    def is_analysing(self):
+        return self._worker is not None
+
+    def clear_result_cache(self):
+        # Cache is in use during analysis
+        if not self.is_analysing():
+            self.model.clear_result_cache()
+
+    def cancel_analysis(self):
+        """
+        Method to cancel running analysis. Analysis stops cleanly after
+        the file (or student in bulk analysis) which is being analysed.
+        """
+
+        if self._progress is not None:
+            self._progress.cancel()
+            self.main_frame.progress_panel.cancel()
+
     def analyse_wrapper(self, selected_analysis, filepaths, analysis_type):
         """
-        Method to call when starting analysis. Calls correct functions
-        to execute selected analysis type.
+        Method to call when starting analysis. Analysis is executed in
+        a worker thread so that GUI is responsive and analysis can be
+        cancelled. Only one analysis is executed at a time.
         """
 
+        if self.is_analysing():
+            return None
+
         selections = self.tkvar_2_var(selected_analysis, "int")
         if not self.check_selection_validity(selections, filepaths):
             return None
 
+        result_page = self.main_frame.get_page(view.ResultPage)
+        result_page.clear_result()  # Clears previous results
+
+        if analysis_type in ("BKTA", "bulk"):
+            self.main_frame.show_page(view.AnalysePage)  # Show "front page"
+        else:
+            result_page.show_info()  # Init new results with default info
+            self.main_frame.show_page(view.ResultPage)  # Show "result page"
+
+        self._progress = analysis.AnalysisProgress()
+        self._worker = threading.Thread(
+            target=self.run_analysis,
+            args=(selections, filepaths, analysis_type, self._progress),
+            daemon=True
+        )
+        self.main_frame.progress_panel.start(self.cancel_analysis)
+        self._worker.start()
+        self.after(POLL_INTERVAL, self.poll_analysis)
+        return None
+
+    def run_analysis(self, selections, filepaths, analysis_type, progress):
+        """
+        Method to execute selected analysis type in the worker thread.
+        Results of default analysis are sent through the queue, and
+        finally either "done" or "error" message.
+        """
+
+        try:
+            self.execute_analysis(selections, filepaths, analysis_type, progress)
+        except Exception as e:
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", analysis_type))
+
+    def execute_analysis(self, selections, filepaths, analysis_type, progress):
+        """
+        Method to call correct functions to execute selected analysis
+        type.
+        """
+
         if analysis_type == "BKTA":
             output_format = "dict"
         elif analysis_type == "bulk":
@@ -112,35 +201,69 @@ class GUICLASS(tk.Tk):
             output_format=output_format
         )
 
-        result_page = self.main_frame.get_page(view.ResultPage)
-        result_page.clear_result()  # Clears previous results
-
         if analysis_type == "BKTA":
-            self.main_frame.show_page(view.AnalysePage)  # Show "front page"
-
             self.model.BKT_analyse(
                 selections,
-                file_structure
+                file_structure,
+                progress=progress
             )
 
             self.model.count_structures(file_structure)
 
         elif analysis_type == "bulk":
-            self.main_frame.show_page(view.AnalysePage)  # Show "front page"
             self.model.bulk_analyse(
                 selections,
-                file_structure
+                file_structure,
+                progress=progress
             )
 
         else:
-            result_page.show_info()  # Init new results with default info
-            self.main_frame.show_page(view.ResultPage)  # Show "result page"
-
             self.model.default_analyse(
                 selections,
                 file_structure,
-                result_page=result_page
+                result_page=QueuedResultPage(self._queue),
+                progress=progress
             )
-            result_page.set_line_counter(0)
 
+        return None
+
+    def poll_analysis(self):
+        """
+        Method to show results and progress of the analysis worker in
+        the main thread. Called periodically with after until the
+        analysis is finished.
+        """
+
+        result_page = self.main_frame.get_page(view.ResultPage)
+        finished = None
+        for _ in range(POLL_BATCH):
+            try:
+                message, value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if message == "results":
+                result_page.show_results(value)
+            elif message == "error":
+                # Failed analysis is finished like completed one
+                self.propagate_error_message("ANALYSIS_ERROR", value)
+                finished = "error"
+            elif message == "done":
+                finished = value
+
+        progress = self._progress
+        self.main_frame.progress_panel.update_progress(
+            progress.done,
+            progress.total,
+            progress.get_eta()
+        )
+
+        if finished is None:
+            self.after(POLL_INTERVAL, self.poll_analysis)
+            return None
+
+        self.main_frame.progress_panel.finish()
+        self._worker.join()
+        self._worker = None
+        self._progress = None
         return None
\ No newline at end of file
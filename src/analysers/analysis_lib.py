@@ -3,37 +3,96 @@
 import ast
 import copy      # for deepcopy
 import datetime  # for timestamp
+import importlib # for lazy loading of analysers
 import json      # for statistics
 import os
 import pathlib
 import re
+import threading # for cancelling analysis from user interface
+import time      # for analysis server latency and progress
 
 # Utility libraries
 from ..config import config as cnf
 from ..config import templates
 import src.utils_lib as utils
-import src.bulk_analysis_utils as bulk_utils
 import src.analysers.analysis_utils as a_utils
 
 # AST analysers
+import src.analysers.fused_visitor as fused_visitor
 import src.analysers.pre_analyser as pre_analyser
-import src.analysers.data_structure_analyser as data_structure_analyser
-import src.analysers.exception_handling_analyser as exception_handling_analyser
-import src.analysers.basic_command_analyser as basic_command_analyser
-import src.analysers.file_handling_analyser as file_handling_analyser
-import src.analysers.file_structure_analyser as file_structure_analyser
-import src.analysers.function_analyser as function_analyser
-
-# BKT analyser
-import src.BKT.BKT_analyser as BKT_A
 import src.analysers.structure_detector as structure_detector
 
+# Selectable AST analysers as (module, class) in the order of checkbox
+# options. Modules are imported when the analyser is selected first time,
+# so that e.g. single file analysis imports only the selected analysers.
+# Similarly bulk analysis utilities, result cache and BKT analyser are
+# imported only in methods which use them.
+ANALYSERS = (
+    ("src.analysers.basic_command_analyser", "BasicsAnalyser"),
+    ("src.analysers.function_analyser", "FunctionAnalyser"),
+    ("src.analysers.file_handling_analyser", "FileHandlingAnalyser"),
+    ("src.analysers.data_structure_analyser", "DataStructureAnalyser"),
+    ("src.analysers.file_structure_analyser", "FileStructureAnalyser"),
+    ("src.analysers.exception_handling_analyser", "ExceptionHandlingAnalyser")
+)
+EMPTY_CONTEXT = templates.AnalysisContext()  # Context between analysed files
+# Model methods which are measured when instrumentation is in use
+INSTRUMENTED_METHODS = (
+    "execute_analysis", "parse_ast", "pre_analyse_tree", "preanalyse_library",
+    "analyse_tree", "format_violations"
+)
+
+class AnalysisProgress():
+    """
+    Class to follow progress of an analysis run and to cancel the run
+    from another thread, e.g. from GUI while analysis is executed in a
+    worker thread. Model checks cancellation between analysed files
+    (between students in bulk analysis) and stops the run cleanly, i.e.
+    results of already analysed files are written as usual.
+    """
+
+    def __init__(self):
+        self.total = 0    # Number of files in the run
+        self.done = 0     # Number of analysed files
+        self.started = None
+        self._cancelled = threading.Event()
+
+    def start(self, total, done=0):
+        self.total = total
+        self.done = done
+        self.started = time.perf_counter()
+
+    def advance(self, count=1):
+        self.done += count
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def get_eta(self):
+        """
+        Return: Estimated remaining time of the run in seconds based on
+        the average time of analysed files, None if no file is analysed
+        yet.
+        """
+
+        if not self.done or self.started is None:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return elapsed / self.done * max(self.total - self.done, 0)
+
+
 class Model:
     def __init__(self, controller):
         self.controller = controller
         self.settings = self.controller.get_settings()
         self.violation_occurances = {} # TEMP NOT USED?
-        self.statistics = {"ALL": {}}
+
+        # Violation statistics of students, see cohort_statistics.py.
+        # None when "show_statistics" setting is not in use.
+        self.reset_statistics()
 
         try:
             self.language = self.settings["language"]
@@ -55,80 +114,119 @@ class Model:
             ]
         # There is possibility that there are no 6 elements in checkbox options,
         # but that is modified in the code then, i.e. not by user
-        try:
-            self.analysers = {
-                self.checkbox_options[0]: basic_command_analyser.BasicsAnalyser(self),
-                self.checkbox_options[1]: function_analyser.FunctionAnalyser(self),
-                self.checkbox_options[2]: file_handling_analyser.FileHandlingAnalyser(self),
-                self.checkbox_options[3]: data_structure_analyser.DataStructureAnalyser(self),
-                self.checkbox_options[4]: file_structure_analyser.FileStructureAnalyser(self),
-                self.checkbox_options[5]: exception_handling_analyser.ExceptionHandlingAnalyser(self)
-            }
-        except IndexError:
-            pass
+        self.analysers = {}  # Created analysers, see get_analyser
+        self._analyser_classes = dict(zip(self.checkbox_options, ANALYSERS))
         # Pre analyser
         self.pre_analyser = pre_analyser.PreAnalyser()
-        self.constant_variables = {}
 
         # Structure/command detector
         self.structure_detector = structure_detector.StructureDetector()
         self.structures = {}
 
-        # Variable data structures (used by function_analyser)
-        self.global_variables = {}
-        self.local_variables = set()
-        self.call_dict = {}
-        self.same_names_dict = {}
+        # Parent, sibling and scope links of the analysed tree, created
+        # in analyse and released in clear_analysis_data
+        self.tree_index = None
+
+        # Opt-in instrumentation, which measures time of the analysis
+        # methods, see instrumentation.py. None when not in use.
+        self.instrumentation = None
+        if self.settings.get("instrumentation", False):
+            import src.analysers.instrumentation as instrumentation
+            self.instrumentation = instrumentation.Instrumentation()
+            for name in INSTRUMENTED_METHODS:
+                setattr(self, name, self.instrumentation.wrap(
+                    f"{type(self).__name__}.{name}", getattr(self, name)
+                ))
 
-        # File handling (used by file_handling_analyser)
-        self.files_opened = []
-        self.files_closed =  []
+        # Structure detection and preanalysis are done with the same walk
+        # and selected analysers with another single walk. Analyser walkers
+        # are cached by selected checkbox options.
+        self._pre_walker = self._create_walker(
+            (self.pre_analyser, self.structure_detector)
+        )
+        self._analyser_walkers = {}
+        self._category_buffers = []
+
+        # Per run caches for directory listings and preanalysed local
+        # libraries, which are shared by all files in the same directory.
+        self._directory_index = {}  # Directory path -> filenames
+        self._library_cache = {}    # Library path -> (mtime, size, function dict)
 
-        # File structure list and dict used by file_structure_analyser
-        # and data_structure_analyser
-        self.function_dict = {}
-        self.class_dict = {}
+        # Read-only results of preanalysis, i.e. variables, calls,
+        # functions, classes, imports, opened files and local libraries,
+        # which analysers read through the getters without copying.
+        self.context = EMPTY_CONTEXT
 
-        # File structure lists used by file_structure_analyser
-        self.file_list = []
-        self.lib_list = []
-        self.import_dict = {}
+        # File handling (used by file_handling_analyser), closed files
+        # are collected during the analysis.
+        self.files_closed =  []
 
-        # Result list for checks from each category and list for storing
-        # category_result lists
-        self._category_results = []
-        self.all_results = []
+        # Result buffer for checks of the current category and buffer of
+        # all saved categories, see templates.ResultBuffer. Passed results
+        # are only counted when keep_passed is False.
+        self._category_results = templates.ResultBuffer()
+        self.all_results = templates.ResultBuffer()
+        self.keep_passed = True
+
+        # Persistent cache for results of unchanged files
+        self.result_cache = None
+        if self.settings.get("result_cache", False):
+            import src.result_cache as result_cache
+            self.result_cache = result_cache.ResultCache(
+                self.settings["result_cache_path"],
+                self.settings.get("result_cache_max_mb", 100) * 1024 * 1024
+            )
 
    # Datastructure getters
+    def get_analyser(self, option):
+        """
+        Method to get analyser of given checkbox option. Analyser module
+        is imported and analyser is created when it is needed first time.
+        """
+
+        try:
+            return self.analysers[option]
+        except KeyError:
+            module_name, class_name = self._analyser_classes[option]
+            module = importlib.import_module(module_name)
+            analyser = getattr(module, class_name)(self)
+            if self.instrumentation is not None:
+                self.instrumentation.wrap_checks(analyser)
+            self.analysers[option] = analyser
+            return analyser
+
     def get_call_dict(self):
-        return dict(self.call_dict)
+        return self.context.call_dict
 
     def get_global_variables(self):
-        return dict(self.global_variables)
+        return self.context.global_variables
 
     def get_local_variables(self):
-        return set(self.local_variables)
+        return self.context.local_variables
 
     def get_import_dict(self):
-        return dict(self.import_dict)
+        return self.context.import_dict
 
     def get_files_opened(self):
-        return list(self.files_opened)
+        return self.context.files_opened
 
     def get_files_closed(self):
         return list(self.files_closed)
 
+    def get_file_handle_dict(self):
+        return self.context.file_handle_dict
+
     def get_file_list(self):
-        return list(self.file_list)
+        return self.context.file_list
 
     def get_lib_list(self):
-        return list(self.lib_list)
+        return self.context.lib_list
 
     def get_function_dict(self):
-        return dict(self.function_dict)
+        return self.context.function_dict
 
     def get_class_dict(self):
-        return dict(self.class_dict)
+        return self.context.class_dict
 
 
    # List, dict and set setters
@@ -138,29 +236,26 @@ class Model:
     #     else:
     #         self.global_variables = set(value)
 
-    def set_call_dict(self, value, key=None):
+    def _set_context_mapping(self, name, value, key=None):
         if(key):
-            self.call_dict[key] = value
-        else:
-            self.call_dict = dict(value)
+            value = {**getattr(self.context, name), key: value}
+        self.context = self.context.replace(**{name: dict(value)})
+
+    def set_call_dict(self, value, key=None):
+        self._set_context_mapping("call_dict", value, key)
 
     def set_global_variables(self, value, key=None):
-        if(key):
-            self.global_variables[key] = value
-        else:
-            self.global_variables = dict(value)
+        self._set_context_mapping("global_variables", value, key)
 
     def set_local_variables(self, value, add=False):
         if(add):
-            self.local_variables.add(value)
-        else:
-            self.local_variables = set(value)
+            value = self.context.local_variables.union((value,))
+        self.context = self.context.replace(local_variables=value)
 
     def set_files_opened(self, value, append=False):
         if(append):
-            self.files_opened.append(value)
-        else:
-            self.files_opened = list(value)
+            value = self.context.files_opened + (value,)
+        self.context = self.context.replace(files_opened=value)
 
     def set_files_closed(self, value, append=False):
         if(append):
@@ -169,43 +264,50 @@ class Model:
             self.files_closed = list(value)
 
     def set_file_list(self, value):
-        self.file_list = list(value)
+        self.context = self.context.replace(file_list=value)
 
     def set_import_dict(self, value, key=None):
-        if(key):
-            self.import_dict[key] = value
-        else:
-            self.import_dict = dict(value)
+        self._set_context_mapping("import_dict", value, key)
 
     def set_function_dict(self, value, key=None):
-        if(key):
-            self.function_dict[key] = value
-        else:
-            self.function_dict = dict(value)
+        self._set_context_mapping("function_dict", value, key)
 
     def set_class_dict(self, value):
-        self.class_dict = dict(value)
+        self._set_context_mapping("class_dict", value)
 
     def set_lib_list(self, value, append=False):
         if(append):
-            self.lib_list.append(value)
-        else:
-            self.lib_list = list(value)
+            value = self.context.lib_list + (value,)
+        self.context = self.context.replace(lib_list=value)
 
    # General methods
     def clear_analysis_data(self):
         self.all_results.clear()
-        self.global_variables.clear()
-        self.local_variables.clear()
-        self.files_opened.clear()
+        self.context = EMPTY_CONTEXT
         self.files_closed.clear()
-        self.function_dict.clear()
-        self.class_dict.clear()
-        self.file_list.clear()
-        self.lib_list.clear()
-        self.import_dict.clear()
-        self.call_dict.clear()
-        self.constant_variables.clear() # Not yet used but cleared anyway
+        self.tree_index = None
+
+    def clear_run_cache(self):
+        """
+        Method to clear directory listings and preanalysed libraries.
+        Called at the beginning of each analysis run so that changes
+        made between the runs are noticed.
+        """
+
+        self._directory_index.clear()
+        self._library_cache.clear()
+
+    def reset_statistics(self):
+        """
+        Method to create empty violation statistics for an analysis run
+        if "show_statistics" setting is in use. Called at the beginning
+        of each run, so that the setting can be changed between the runs.
+        """
+
+        self.statistics = None
+        if self.settings.get("show_statistics", False):
+            import src.analysers.cohort_statistics as cohort_statistics
+            self.statistics = cohort_statistics.CohortStatistics()
 
 # TODO rename this method to something better, e.g. add_result
     def add_msg(self, code, *args, lineno=-1, status=False):
@@ -225,9 +327,12 @@ class Model:
         """
 
         if not utils.ignore_check(code):
-            self._category_results.append(
-                templates.ViolationTemplate(code, args, lineno, status)
-            )
+            if status and not self.keep_passed:
+                self._category_results.add_passed(code)
+            else:
+                self._category_results.add(code, args, lineno, status)
+            if self.instrumentation is not None:
+                self.instrumentation.add_result(code, status)
 
             # Very primitive statistic calculation
             try:
@@ -237,10 +342,10 @@ class Model:
         return None
 
     def save_category(self, title):
-        self.all_results.append((title, tuple(self._category_results)))
-        self._category_results.clear()
+        self.all_results.save_category(title, self._category_results)
 
-    def default_analyse(self, selections, file_list, result_page, *args, **kwargs):
+    def default_analyse(self, selections, file_list, result_page, *args,
+                        progress=None, **kwargs):
         """
         Method to handle default analysis steps where coding convention
         violations are detected. This includes:
@@ -249,33 +354,42 @@ class Model:
         3. Formating each file's results
         4. Showing results.
         5. Clearing results.
+
+        Progress of the run is updated to progress (AnalysisProgress)
+        and the run stops after current file when it is cancelled.
         """
 
+        if progress is None:
+            progress = AnalysisProgress()
+        progress.start(len(file_list))
+
+        self.clear_run_cache()
+        self.reset_statistics()
+        # Only violations are shown, but cached results are complete
+        self.keep_passed = self.result_cache is not None
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         utils.write_file(self.settings["result_path"], timestamp + "\n")
-        current_statistics = {}
         yaml_dict = {}  # TA yaml data
 
         for filepath in file_list:
+            if progress.is_cancelled():
+                break
+
             results = self.execute_analysis(filepath, selections)
 
             # Statistics
             # FIX currently "student" only works for course project directory
             # structure
-            if self.settings.get("show_statistics", False):
-                current_statistics = a_utils.calculate_statistics(results)
+            if self.statistics is not None:
                 # TODO change to filepath.path.student when it is ready in template
                 # TODO add setting for this, i.e. is it file or directory/folder
 
                 student = f"{filepath.path.parents[1].name}/{filepath.path.parents[0].name}"
                 # student = f"{filepath.path.parents[0].name}/{filepath.filename}"
                 # student = filepath.path.parents[0].name
-                a_utils.sum_statistics(
-                    self.statistics,
-                    student,
-                    current_statistics
+                self.statistics.add_file(
+                    student, results.count_violations(), course=filepath.course
                 )
-                current_statistics.clear()
 
             # Format results
             formated_results = self.format_violations(results)
@@ -327,25 +441,15 @@ class Model:
             result_page.show_results(formated_results)
             self.clear_analysis_data()
             formated_results.clear()
+            progress.advance()
 
-        if self.settings.get("show_statistics", False):
-            if self.settings.get("console_print", False):
-                a_utils.print_statistics(self.statistics)
-
-            if self.settings.get("file_write", False):
-                content = json.dumps(self.statistics, indent=4)
-                utils.write_file(
-                    self.settings["statistics_path"],
-                    content,
-                    mode="w"
-                )
-
-            self.statistics.clear()
-            self.statistics = {"ALL": {}}
+        self.report_statistics()
 
         # Write TA yaml results
-        utils.write_yaml_file(self.settings["yaml_result_path"], yaml_dict)
+        if self.settings.get("file_write", True):
+            utils.write_yaml_file(self.settings["yaml_result_path"], yaml_dict)
 
+        self.report_instrumentation()
         return None
 
     def default_analyse_web(self, selections, file_list, *args, **kwargs):
@@ -359,9 +463,12 @@ class Model:
         5. Clearing results.
         """
 
+        self.clear_run_cache()
+        self.reset_statistics()
+        # Only violations are shown, but cached results are complete
+        self.keep_passed = self.result_cache is not None
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         utils.write_file(self.settings["result_path"], timestamp + "\n")
-        current_statistics = {}
 
         for filepath in file_list:
             results = self.execute_analysis(filepath, selections)
@@ -369,20 +476,16 @@ class Model:
             # Statistics
             # FIX currently "student" only works for course project directory
             # structure
-            if self.settings.get("show_statistics", False):
-                current_statistics = a_utils.calculate_statistics(results)
+            if self.statistics is not None:
                 # TODO change to filepath.path.student when it is ready in template
                 # TODO add setting for this, i.e. is it file or directory/folder
 
                 student = f"{filepath.path.parents[1].name}/{filepath.path.parents[0].name}"
                 # student = f"{filepath.path.parents[0].name}/{filepath.filename}"
                 # student = filepath.path.parents[0].name
-                a_utils.sum_statistics(
-                    self.statistics,
-                    student,
-                    current_statistics
+                self.statistics.add_file(
+                    student, results.count_violations(), course=filepath.course
                 )
-                current_statistics.clear()
 
             # Format results
             formated_results = self.format_violations_web(results)
@@ -404,91 +507,241 @@ class Model:
             #formated_results.clear()
             return formated_results
 
-        if self.settings.get("show_statistics", False):
-            if self.settings.get("console_print", False):
-                a_utils.print_statistics(self.statistics)
-
-            if self.settings.get("file_write", False):
-                content = json.dumps(self.statistics, indent=4)
-                utils.write_file(
-                    self.settings["statistics_path"],
-                    content,
-                    mode="w"
-                )
-
-            self.statistics.clear()
-            self.statistics = {"ALL": {}}
+        self.report_statistics()
 
         return None
 
-    def bulk_analyse(self, selections, student_dict):
+    def bulk_analyse(self, selections, student_dict, resume=None, progress=None):
         """
         Method to control bulk analysis steps.
         This includes:
         1. Iterating analysed files.
         2. Formatting results and feedback.
         3. Clearing results for new analysis
-        4. Write students all results at once
+        4. Write each student's results when all of their assignments
+           are analysed.
+        5. Merge written results into single result file.
+
+        If "bulk_workers" setting is other than 1, students are analysed
+        in parallel worker processes. If resume is True (default is
+        "bulk_resume" setting), students already written by previous
+        interrupted run are not analysed again.
+
+        Progress of the run is updated to progress (AnalysisProgress).
+        When progress is cancelled, the run stops after the students
+        which are being analysed, and it can be continued with resume.
+        Students which are analysed before cancel or KeyboardInterrupt
+        are written, so that resume does not analyse them again.
+        Statistics (see "show_statistics" setting) contain only the
+        students analysed in this run.
         """
 
+        import src.bulk_analysis_utils as bulk_utils
+
         print(f"Bulk analysis function starts at {datetime.datetime.now().strftime('%H:%M:%S')}")
 
+        if resume is None:
+            resume = self.settings.get("bulk_resume", False)
+
+        self.clear_run_cache()
+        self.reset_statistics()
         original_selections = copy.deepcopy(selections)
+        student_amount = len(student_dict.keys())
+
+        writer = bulk_utils.StreamingResultWriter(
+            self.settings["bulk_stream_path"],
+            resume=resume
+        )
+        pending = {
+            student_id: student_obj for student_id, student_obj in student_dict.items()
+            if not writer.is_completed(student_id)
+        }
+        student_counter = student_amount - len(pending.keys())
+
+        if progress is None:
+            progress = AnalysisProgress()
+        file_counts = {
+            student_id: self._count_student_files(student_obj)
+            for student_id, student_obj in student_dict.items()
+        }
+        progress.start(
+            sum(file_counts.values()),
+            done=sum(file_counts[i] for i in student_dict.keys() if i not in pending)
+        )
+
+        workers = self.settings.get("bulk_workers", 1)
+        if not workers or workers < 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(pending.keys()))
+
+        analysed = None
+        try:
+            # Both analyses stop starting new students when progress is
+            # cancelled, and give the students which are already started.
+            if workers > 1:
+                analysed = self._bulk_analyse_parallel(
+                    original_selections, pending, workers, progress
+                )
+            else:
+                analysed = (
+                    (student_id, student_obj, self.bulk_analyse_student(original_selections, student_obj))
+                    for student_id, student_obj in pending.items()
+                    if not progress.is_cancelled()
+                )
+
+            for student_id, student_obj, course_id in analysed:
+                student_counter += 1
+                writer.write_student(student_id, student_obj, course_id)
+                progress.advance(file_counts[student_id])
+                print(f"Student {student_counter}/{student_amount} analysed, '{student_obj.name}'.")
+
+            if progress.is_cancelled():
+                print("Bulk analysis cancelled, continue it with resume.")
+        finally:
+            if analysed is not None:
+                analysed.close()  # Cancels students waiting for workers
+            writer.close()
+            bulk_utils.close_archives()
+
+        # Write results
+        # Result strcuture requires all files from same student being
+        # analysed before writing, therefore complete file is merged from
+        # the students' results after analysis.
+        bulk_utils.merge_results(
+            self.settings["bulk_stream_path"],
+            self.settings["bulk_result_path"],
+            order=student_dict.keys()
+        )
+        self.report_statistics()
+        self.report_instrumentation()
+
+        print(f"Bulk analysis function finished at {datetime.datetime.now().strftime('%H:%M:%S')}")
+        return None
+
+    def _count_student_files(self, student_obj):
+        return sum(
+            len(assignment_obj.get_filepaths())
+            for assignment_obj in student_obj.get_assignments().values()
+        )
+
+    def bulk_analyse_student(self, original_selections, student_obj):
+        """
+        Method to analyse all assignments of a single student in bulk
+        analysis. Feedback and violations are added to assignment
+        objects of the student.
+
+        Return: course_id - Course of the analysed files or None.
+        """
+
+        import src.bulk_analysis_utils as bulk_utils
+
         week_patt = re.compile(bulk_utils.WEEK_PATT)
         course_id = None
-        student_counter = 0
-        student_amount = len(student_dict.keys())
+        self.keep_passed = self.result_cache is not None
 
-        for student_obj in student_dict.values():
-            student_counter += 1
-            for assignment_obj in student_obj.get_assignments().values():
+        for assignment_obj in student_obj.get_assignments().values():
 
-                # Use fixed selections for each week, if course project or other not detected,
-                # then just analyse everything
-                if ((match := (week_patt.match(assignment_obj.assignment_name)))
-                    and (weekly_selection := (bulk_utils.ASSIGNMENT_TO_ASPA_ANALAYSER.get(match.group("week"), None)))
-                ):
-                    # If weekly selection is not None, then use it
-                    selections = weekly_selection
-                else: # Otherwise use original selections
-                    selections = original_selections
+            # Use fixed selections for each week, if course project or other not detected,
+            # then just analyse everything
+            if ((match := (week_patt.match(assignment_obj.assignment_name)))
+                and (weekly_selection := (bulk_utils.ASSIGNMENT_TO_ASPA_ANALAYSER.get(match.group("week"), None)))
+            ):
+                # If weekly selection is not None, then use it
+                selections = weekly_selection
+            else: # Otherwise use original selections
+                selections = original_selections
 
 
-                for filepath in assignment_obj.get_filepaths():
+            for filepath in assignment_obj.get_filepaths():
 
-                    results = self.execute_analysis(filepath, selections)
+                results = self.execute_analysis(filepath, selections)
 
-                    # Format results
-                    formated_results = self.format_violations(results)
+                # Format results
+                formated_results = self.format_violations(results)
 
-                    # Add feedback
-                    assignment_obj.append_feedback("\n{}\n{}{}".format(
-                        utils.create_dash(character="=", get_dash=True),
-                        filepath.filename,
-                        "\n".join(map(lambda x: x[0], formated_results)) #0th value is the message
-                    ))
+                # Add feedback
+                assignment_obj.append_feedback("\n{}\n{}{}".format(
+                    utils.create_dash(character="=", get_dash=True),
+                    filepath.filename,
+                    "\n".join(map(lambda x: x[0], formated_results)) #0th value is the message
+                ))
 
-                    # Violations
-                    # Count violations and update assignment object violation data structure
-                    assignment_obj.update_violations(
-                        a_utils.results_to_violation_dict(results)
+                # Violations
+                # Count violations and update assignment object violation data structure
+                violation_dict = a_utils.results_to_violation_dict(results)
+                assignment_obj.update_violations(violation_dict)
+                if self.statistics is not None:
+                    self.statistics.add_file(
+                        student_obj.student_number, violation_dict, course=filepath.course
                     )
 
-                    self.clear_analysis_data()
+                self.clear_analysis_data()
 
-                    if not course_id: # Hotfix to get course_id to result file
-                        course_id = filepath.course
-            print(f"Student {student_counter}/{student_amount} analysed, '{student_obj.name}'.")
+                if not course_id: # Hotfix to get course_id to result file
+                    course_id = filepath.course
 
-        # Write results
-        # Result strcuture requires all files from same student being
-        # analysed before writing, therefore writing is after analysis.
-        bulk_utils.write_results(self.settings["bulk_result_path"], student_dict, course_id)
+        return course_id
 
-        print(f"Bulk analysis function finished at {datetime.datetime.now().strftime('%H:%M:%S')}")
-        return None
+    def _bulk_analyse_parallel(self, selections, student_dict, workers, progress):
+        """
+        Generator to analyse students in worker processes. Each worker
+        process has its own Model, because Model and analysers store
+        per file state. Results of the analysed copies are merged back
+        into the student objects of student_dict.
+
+        When progress is cancelled, students which are not started yet
+        are not analysed, and students which are being analysed are
+        yielded when they are finished. On KeyboardInterrupt students
+        which are already finished are yielded before it is raised again.
+
+        Yield: Tuple of (student_id, student_obj, course_id) in completion
+        order.
+        """
+
+        import concurrent.futures
+
+        def merge(future):
+            student_id = futures.pop(future)
+            student_obj = student_dict[student_id]
+            analysed_obj, course_id, reports = future.result()
+            student_obj.update_results(analysed_obj)
+            if "instrumentation" in reports:
+                self.instrumentation.merge(reports["instrumentation"])
+            if "statistics" in reports:
+                self.statistics.merge(reports["statistics"])
+            return student_id, student_obj, course_id
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.settings,)
+        ) as executor:
+            futures = {
+                executor.submit(_bulk_analyse_student, selections, student_obj): student_id
+                for student_id, student_obj in student_dict.items()
+            }
 
-    def BKT_analyse(self, selections, file_dict, *args, **kwargs):
+            try:
+                for future in concurrent.futures.as_completed(tuple(futures)):
+                    if future.cancelled():
+                        continue
+                    yield merge(future)
+                    if progress.is_cancelled():
+                        executor.shutdown(wait=False, cancel_futures=True)
+
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                for future in tuple(futures):
+                    if future.done() and not future.cancelled():
+                        yield merge(future)
+                raise
+
+            finally:
+                # When generator is closed early, students which are not
+                # started yet are not analysed.
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def BKT_analyse(self, selections, file_dict, *args, progress=None, **kwargs):
         """
         Method to control Bayesian Knowledge Tracing analysis steps.
         This includes:
@@ -496,25 +749,100 @@ class Model:
         2. Iterating analysed files.
         3. Showing results.
         4. Clearing results.
+
+        Progress of the run is updated to progress (AnalysisProgress).
+        When progress is cancelled, the run stops before the next
+        student, so that written rows contain all files of the student.
+
+        With "BKT_fit_parameters" setting parameters of each skill are
+        fitted from all students before results are written, and they
+        are stored for later runs with "BKT_use_fitted_parameters". A
+        cancelled run is not used for fitting.
+
+        With "BKT_incremental" setting Ln values, observation counts,
+        analysed files and their structures are stored after the run. Next
+        run continues from the stored state and analyses only the files
+        which are not analysed before. Result file contains all students
+        of the state. Files of each student are then analysed in natural
+        order of week, exercise and path, e.g. week2 before week10, so that
+        runs give the same values regardless of which files are new. Without
+        the setting files are analysed in the given order.
         """
 
         # round handles also negative accuracy so no need to check that. However
         # user might get undesired results with that (in BKT case basically 0.0)
         # 0 is also allowed setting therefore using default value instead of
         # "or"-operator to give value 3 as default.
+        import src.BKT.BKT_analyser as BKT_A
+        import src.BKT.BKT_fitting as BKT_F
+
+        self.clear_run_cache()
+        self.keep_passed = True  # Passed results update BKT values
         _ACC = self.settings.get("BKT_decimal_places", 3)
         _DESIM_SEP = self.settings.get("BKT_decimal_separator") or ","
         _CELL_SEP = self.settings.get("BKT_cell_separator") or ";"
 
 
-        # Create indexes for titles and sort them from A to Z (ascending order).
+        # Sort titles from A to Z (ascending order), they are the columns.
         # TODO add setting which allow sorting by selected value
         BKT_title_sorted = sorted(cnf.BKT_TITLES[self.language].keys())
-        BKT_index = {}
-        for i, title in enumerate(BKT_title_sorted):
-            BKT_index[title] = i
+        fit = self.settings.get("BKT_fit_parameters", False)
+        save_state = self.settings.get("BKT_incremental", False)
+        incremental = save_state and not fit  # Fitting uses all files
+        parameters = None
+        if self.settings.get("BKT_use_fitted_parameters", False):
+            parameters = BKT_F.read_parameters(self.settings["BKT_parameters_path"])
+        cohort = BKT_A.CohortBKT(BKT_title_sorted, parameters=parameters, record=fit)
+
+        # --- Continue from the state of previous runs with new files ---
+        state_path = self.settings["BKT_state_path"]
+        if incremental and pathlib.Path(state_path).is_file():
+            try:
+                state = json.loads(utils.read_file(state_path))
+                loaded = cohort.set_state(state)
+                if loaded:
+                    # Structures of the files of previous runs are
+                    # counted with the new files, see count_structures.
+                    for path, structures in state["structures"].items():
+                        self.structures[pathlib.Path(path)] = [
+                            templates.StructureTemplate(identifier, lineno, None)
+                            for identifier, lineno in structures
+                        ]
+            except (TypeError, ValueError, KeyError, AttributeError):
+                loaded = False
+
+            if not loaded:
+                print(f"BKT state '{state_path}' is not used, because it is "
+                      "invalid or its skills or parameters differ. "
+                      "All files are analysed.")
+                cohort = BKT_A.CohortBKT(BKT_title_sorted, parameters=parameters)
+
+            new_files = {}
+            for student_name, filepaths in file_dict.items():
+                analysed = cohort.files[cohort.add_student(student_name)]
+                new_files[student_name] = [
+                    filepath for filepath in filepaths if str(filepath.path) not in analysed
+                ]
+            file_dict = new_files
+
+        # With stored state files of each student are analysed in the order
+        # of week, exercise and path, so that the first and later runs give
+        # the same values as analysing all files at once.
+        if save_state:
+            file_dict = {
+                student_name: sorted(filepaths, key=lambda filepath: (
+                    utils.natural_sort_key(filepath.week or ""),
+                    utils.natural_sort_key(filepath.exercise or ""),
+                    utils.natural_sort_key(str(filepath.path))
+                ))
+                for student_name, filepaths in file_dict.items()
+            }
 
-        # --- 1. Initialise result file with title line and content lines -list ---
+        if progress is None:
+            progress = AnalysisProgress()
+        progress.start(sum(len(filepaths) for filepaths in file_dict.values()))
+
+        # --- 1. Initialise result file with title line ---
         BKT_result_path = self.settings.get("BKT_path")
         title_line = "{0:s}{1:s}{2:s}\n".format(
                 cnf.BKT_TEXT[self.language]["student_name"],
@@ -523,53 +851,63 @@ class Model:
             )
         utils.write_file(BKT_result_path, title_line, mode="w")
 
-        content_lines = []
-        initial_line = [0] * len(BKT_title_sorted)
-
         # --- 2. BKT analyse all files in given paths ---
         for student_name, filepaths in file_dict.items():
-            student = BKT_A.Student(student_name)
+            if progress.is_cancelled():
+                break
+
+            row = cohort.add_student(student_name)
             for filepath in filepaths:
-                results_per_title = self.execute_analysis(filepath, selections)
+                results = self.execute_analysis(filepath, selections)
 
-                # --- Add results to student object to update BKTA values ---
-                for title, results in results_per_title:
-                    student.add_results(results, key="vid", success="status")
+                # --- Update BKTA values of the student with the results ---
+                cohort.add_results(row, results.iter_results())
+                cohort.files[row].add(str(filepath.path))
 
                 self.clear_analysis_data()
+                progress.advance()
 
-            # --- Format results into writable list ---
-            result_line = initial_line[:] # copy to allow separate changes
-            for key, result in student.get_results().items():
-                try:
-                    result_line[BKT_index[key]] = round(result.Ln, _ACC)
-                except (KeyError, IndexError):
-                    pass
-
-            content_lines.append(
-                "{0}{1}{2}".format(  # Basically 'studentID;float;...;float' as str
-                    student.student_id,
-                    _CELL_SEP,
-                    _CELL_SEP.join(map(str, result_line)).replace(".", _DESIM_SEP)
+            # --- 3. Write results of the student to BKT result file ---
+            # When fitting or continuing previous runs, results of all
+            # students are written after the analysis.
+            if not fit and not incremental:
+                utils.write_file(
+                    BKT_result_path,
+                    cohort.format_row(row, _ACC, _CELL_SEP, _DESIM_SEP) + "\n",
+                    mode="a"
                 )
-            )
 
-            # --- 3. Write results to BKT result file ---
+        if fit and not progress.is_cancelled():
+            fitted = BKT_F.fit_parameters(cohort)
+            BKT_F.write_parameters(self.settings["BKT_parameters_path"], fitted)
+            cohort.set_parameters({**(parameters or {}), **BKT_F.to_parameters(fitted)})
+            cohort.replay()
+
+        if fit or incremental:
             utils.write_file(
                 BKT_result_path,
-                "\n".join(content_lines) + "\n",
+                "".join(
+                    cohort.format_row(row, _ACC, _CELL_SEP, _DESIM_SEP) + "\n"
+                    for row in range(len(cohort.students))
+                ),
                 mode="a"
             )
 
-            # --- 4. Clear written results before next iteration ---
-            result_line.clear()
-            content_lines.clear()
+        # --- 4. Store state for the next incremental run ---
+        if save_state:
+            state = cohort.get_state()
+            state["structures"] = {
+                path: [
+                    [i.identifier, i.lineno]
+                    for i in self.structures.get(pathlib.Path(path), ())
+                ]
+                for files in cohort.files for path in sorted(files)
+            }
+            utils.write_file(state_path, json.dumps(state), mode="w")
 
-        # At the end clear created data structures
-        initial_line.clear()
-        BKT_index.clear()
         BKT_title_sorted.clear()
 
+        self.report_instrumentation()
         return None
 
     def execute_analysis(self, filepath, selections):
@@ -580,13 +918,55 @@ class Model:
         3. Calling AST analyser.
         4. Returning results.
 
-        Return: List of tuples, where tuples include result messages.
+        If result cache is in use, results of unchanged files are
+        returned from the cache instead of steps 2 and 3.
+
+        Files in zip and tar archives are analysed in memory, see
+        analyse_source. Their cached results are keyed also by the other
+        files in the same directory of the archive, and their structures
+        are not detected.
+
+        Return: Results - templates.ResultBuffer
         """
 
+        if filepath.archive is not None:
+            import src.bulk_analysis_utils as bulk_utils
+
+            content, modules = bulk_utils.open_archive(filepath.archive).read_modules(filepath.path)
+            cache_key = None
+            if self.result_cache is not None and content is not None:
+                cache_key = self.result_cache.create_key(
+                    content, filepath.filename, selections, modules=modules
+                )
+                if (cached := self.result_cache.get(cache_key, None)):
+                    self.all_results.extend(cached[0])
+                    return self.all_results
+
+            results = self.analyse_source(
+                content,
+                selections,
+                filename=filepath.filename,
+                modules=modules
+            )
+            if cache_key and "analysis_error" not in results.get_titles():
+                self.result_cache.set(cache_key, None, (), results, None)
+            self.all_results.extend(results)
+            return self.all_results
+
         content = utils.read_file(filepath.path)
         filename = filepath.filename
         dir_path = filepath.path.parent
 
+        cache_key = None
+        if self.result_cache is not None and content is not None:
+            cache_key = self.result_cache.create_key(content, filename, selections)
+            if (cached := self.result_cache.get(cache_key, dir_path)):
+                results, structures = cached
+                if structures is not None:
+                    self.structures[pathlib.Path.joinpath(dir_path, filename)] = structures
+                self.all_results.extend(results)
+                return self.all_results
+
         # No check for tree being None etc. before analysis because analyses
         # will create violation if tree is not valid. Only in dumping checks
         # if tree exist.
@@ -604,12 +984,37 @@ class Model:
             filename,
             selections
         )
+
+        # Results with analysis error are not cached because then imported
+        # libraries are not known.
+        if cache_key and "analysis_error" not in results.get_titles():
+            self.result_cache.set(
+                cache_key,
+                dir_path,
+                self.context.import_dict.keys(),
+                results,
+                self.structures.get(pathlib.Path.joinpath(dir_path, filename))
+            )
         return results
 
+    def clear_result_cache(self):
+        """Method to invalidate all results in the result cache."""
+
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        else:
+            import src.result_cache as result_cache
+            cache = result_cache.ResultCache(
+                self.settings["result_cache_path"],
+                self.settings.get("result_cache_max_mb", 100) * 1024 * 1024
+            )
+            cache.clear()
+            cache.close()
+        return None
+
     def parse_ast(self, content, filename, create_msg=True):
         """
-        Creates an abstract syntax tree and adds both parent and sibling
-        nodes.
+        Creates an abstract syntax tree.
 
         Return: Python ast typed tree or None if parse fails.
         """
@@ -630,29 +1035,38 @@ class Model:
                 self.add_msg("type_error")
                 self.save_category("file_error")
 
-        else:
-            a_utils.add_parents(tree)
-            a_utils.add_siblings(tree)
-
         finally:
             return tree
 
-    def analyse(self, tree, content, dir_path, filename, selections):
+    def analyse(self, tree, content, dir_path, filename, selections,
+                files_in_dir=None, modules=None):
         """
         Analysis wrapper for preanalyser and analyser which do analysis
         for abstract syntax tree and file content from the ast is
-        created.
+        created. If files_in_dir is given, directory is not listed and
+        structures are not detected, i.e. analysed content does not need
+        to be a file. Content of local libraries can be given in modules
+        argument, see analyse_source.
 
-        Return: List of violation messages.
+        Return: Results - templates.ResultBuffer
         """
 
         try:
-            # TODO: optimise such that os.listdir is done only once per directory
-            # TODO make paths Pathlib compatible such that os is not neede
-            files_in_dir = os.listdir(dir_path)
-            # files_in_dir = list(dir_path.iterdir())
-            self.detect_structures(tree, pathlib.Path.joinpath(dir_path, filename))
-            self.pre_analyse_tree(tree, files_in_dir, dir_path)
+            if tree is not None:
+                self.tree_index = a_utils.TreeIndex(tree)
+
+            filepath = None
+            if files_in_dir is None:
+                files_in_dir = self.get_files_in_dir(dir_path)
+                filepath = pathlib.Path.joinpath(dir_path, filename)
+
+            self.pre_analyse_tree(
+                tree,
+                files_in_dir,
+                dir_path,
+                filepath=filepath,
+                modules=modules
+            )
             self.analyse_tree(tree, files_in_dir, content, selections)
 
         except Exception as e:
@@ -664,77 +1078,254 @@ class Model:
 
         return self.all_results
 
-    def detect_structures(self, tree, filepath):
+    def analyse_source(self, content, selections, filename="main.py", modules=None):
+        """
+        Method to analyse source code which is already in memory, e.g.
+        code sent from web interface or read from an archive. Nothing is
+        read from or written to the file system, instead local libraries
+        are given as virtual sibling modules.
+
+        Arguments:
+        1. content - Analysed source code - str
+        2. selections - Analysis selections, key is checkbox option and
+           value is 1 or 0 - dict
+        3. filename - Name of the analysed file - str
+        4. modules - Other files in the same virtual directory, key is
+           filename (e.g. 'library.py') and value is source code - dict
+           or other mapping
+
+        Return: Copy of the results, i.e. same format as execute_analysis
+        returns. Model is cleared for the next analysis, therefore
+        returned results are not changed afterwards.
+        """
+
+        if modules is None:
+            modules = {}
+
+        tree = self.parse_ast(content, filename)
+        results = self.analyse(
+            tree,
+            content,
+            None,
+            filename,
+            selections,
+            files_in_dir=frozenset(modules.keys()).union((filename,)),
+            modules=modules
+        ).copy()
+        self.clear_analysis_data()
+        return results
+
+    def get_files_in_dir(self, dir_path):
         """
-        Execute structure detection for abstract syntax tree.
+        Method to get names of the files in directory. Directory is
+        listed only once per analysis run.
+
+        Return: Set of filenames.
         """
 
         try:
-            self.structure_detector.visit(tree)
-        except Exception:
-            pass
-        else:
+            return self._directory_index[dir_path]
+        except KeyError:
+            # TODO make paths Pathlib compatible such that os is not neede
+            files = self._directory_index[dir_path] = frozenset(os.listdir(dir_path))
+            return files
+
+    def get_library_functions(self, lib_path, library):
+        """
+        Method to preanalyse imported local library and get functions
+        defined in it. Results are cached by path and modification time,
+        therefore each library is read and parsed only once per run
+        even if it is imported by many files.
+
+        Return: Function dictionary or None if library is not parseable.
+        """
+
+        try:
+            stat = lib_path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+
+        if (version is not None
+                and (cached := self._library_cache.get(lib_path))
+                and cached[0] == version):
+            return cached[1]
+
+        function_dict = self.preanalyse_library(
+            utils.read_file(lib_path),
+            lib_path.name,
+            library
+        )
+
+        if version is not None:
+            self._library_cache[lib_path] = (version, function_dict)
+        return function_dict
+
+    def preanalyse_library(self, content, filename, library):
+        """
+        Method to preanalyse content of imported local library.
+
+        Return: Function dictionary or None if library is not parseable.
+        """
+
+        function_dict = None
+        if (tree := self.parse_ast(content, filename, create_msg=False)):
+            # Preanalysing imported local files
+            analyser = pre_analyser.PreAnalyser(
+                library=library,
+                tree_index=a_utils.TreeIndex(tree)
+            )
+            analyser.visit(tree)
+            function_dict = analyser.get_function_dict()
+            analyser.clear_all()
+        return function_dict
+
+    def detect_structures(self, tree, filepath, error=None):
+        """
+        Store structures detected for abstract syntax tree. If tree is
+        given, structure detection is executed separately, otherwise
+        structures are expected to be detected already in preanalysis
+        walk, which then gives possible error as an argument.
+        """
+
+        if tree is not None:
+            try:
+                self.structure_detector.tree_index = self.tree_index
+                self.structure_detector.visit(tree)
+            except Exception as e:
+                error = e
+
+        if error is None:
             self.structures[pathlib.Path(filepath)] = self.structure_detector.get_structures()
         self.structure_detector.clear_all()
 
-    def pre_analyse_tree(self, tree, files, dir_path):
+    def pre_analyse_tree(self, tree, files, dir_path, filepath=None, modules=None):
         """
         Preanalyses abstract syntax tree and all imported local
-        libraries.
+        libraries. If filepath is given, structures are detected during
+        the same walk (see detect_structures). If modules is given,
+        libraries are preanalysed from its contents instead of files.
         """
 
-        self.pre_analyser.visit(tree)
+        self.pre_analyser.tree_index = self.tree_index
+        if filepath is None:
+            self.pre_analyser.visit(tree)
+        else:
+            self.structure_detector.tree_index = self.tree_index
+            errors = self._pre_walker.visit(tree)
+            self.detect_structures(None, filepath, error=errors.get(1))
+            if 0 in errors:
+                raise errors[0]
         self.pre_analyser.lock_constants()
 
-        self.class_dict = self.pre_analyser.get_class_dict()
-        self.function_dict = self.pre_analyser.get_function_dict()
-        self.import_dict = self.pre_analyser.get_import_dict()
-        self.global_variables = self.pre_analyser.get_global_dict()
-         # This needs setter, getter and initialisation if used
-        self.constant_variables = self.pre_analyser.get_constant_dict()
-        self.call_dict = self.pre_analyser.get_call_dict()
-        self.files_opened = self.pre_analyser.get_file_list()
-        # This needs setter and getter
-        self.same_names_dict = self.pre_analyser.get_local_global_dict()
+        # Getters of preanalyser return copies, which are frozen into
+        # the context without copying again.
+        function_dict = self.pre_analyser.get_function_dict()
+        import_dict = self.pre_analyser.get_import_dict()
+        lib_list = []
+        context = {
+            "class_dict": self.pre_analyser.get_class_dict(),
+            "function_dict": function_dict,
+            "import_dict": import_dict,
+            "global_variables": self.pre_analyser.get_global_dict(),
+            # This needs getter if used
+            "constant_variables": self.pre_analyser.get_constant_dict(),
+            "call_dict": self.pre_analyser.get_call_dict(),
+            "files_opened": self.pre_analyser.get_file_list(),
+            "file_handle_dict": self.pre_analyser.get_file_handle_dict(),
+            # This needs getter if used
+            "same_names_dict": self.pre_analyser.get_local_global_dict(),
+            "lib_list": lib_list
+        }
         self.pre_analyser.clear_all()
 
-        imported = self.import_dict.keys()
-        for i in imported:
+        for i in import_dict.keys():
             filename = f"{i}.py"
             if(filename in files):
-                self.lib_list.append(i)
-                content = utils.read_file(pathlib.Path.joinpath(dir_path, filename))
+                lib_list.append(i)
+                if modules is not None:
+                    lib_functions = self.preanalyse_library(
+                        modules.get(filename),
+                        filename,
+                        i
+                    )
+                else:
+                    lib_functions = self.get_library_functions(
+                        pathlib.Path.joinpath(dir_path, filename),
+                        i
+                    )
 
-                if not (tree := self.parse_ast(content, filename, create_msg=False)):
+                if not lib_functions:
                     continue
 
-                # Preanalysing imported local files
-                analyser = pre_analyser.PreAnalyser(library=i)
-                analyser.visit(tree)
-                for func, value in analyser.get_function_dict().items():
-                    if(not func in self.function_dict.keys()):
-                        self.function_dict[func] = value
-                analyser.clear_all()
+                for func, value in lib_functions.items():
+                    if(not func in function_dict.keys()):
+                        function_dict[func] = value
+
+        self.context = templates.AnalysisContext(**context)
+
+    def _get_analyser_walker(self, selected):
+        """
+        Method to get FusedVisitor for selected analysers. Results of
+        each analyser are directed to own category buffer.
+        """
+
+        try:
+            return self._analyser_walkers[selected]
+        except KeyError:
+            walker = self._create_walker(
+                [self.get_analyser(opt) for opt in selected],
+                on_switch=self._switch_category
+            )
+            self._analyser_walkers[selected] = walker
+            return walker
+
+    def _create_walker(self, visitors, on_switch=None):
+        if self.instrumentation is not None:
+            import src.analysers.instrumentation as instrumentation
+            return instrumentation.InstrumentedVisitor(
+                visitors, self.instrumentation, on_switch=on_switch
+            )
+        return fused_visitor.FusedVisitor(visitors, on_switch=on_switch)
+
+    def _switch_category(self, index):
+        self._category_results = self._category_buffers[index]
 
     def analyse_tree(self, tree, file_list, content, selections):
         """
         Analyses abstract syntax tree and file content from the ast is
         created. Execute only analyses marked with selections argument.
+        All selected analysers visit the tree during one walk and checks
+        which need the whole tree are executed after the walk.
 
         Return: List of violation messages.
         """
 
         # self.file_list = file_list
 
-        for opt in self.checkbox_options:
-            if(selections[opt]):
-                analyser = self.analysers[opt]
-                analyser.visit(tree)
+        selected = tuple(opt for opt in self.checkbox_options if selections[opt])
+        walker = self._get_analyser_walker(selected)
+        category_results = self._category_results
+        self._category_buffers = [templates.ResultBuffer() for _ in selected]
+
+        try:
+            errors = walker.visit(tree)
+
+            for i, opt in enumerate(selected):
+                if i in errors:
+                    # Recursive calls would remain for the next file
+                    # because clear_all is called after function checks.
+                    if "function" in selected[i:]:
+                        self.get_analyser("function").clear_all()
+                    raise errors[i]
+
+                analyser = self.get_analyser(opt)
+                self._category_results = self._category_buffers[i]
 
                 if(opt == "file_handling"):
                     # Check left open files
                     analyser.check_left_open_files(
-                        self.files_opened,
+                        self.context.files_opened,
                         self.files_closed
                     )
 
@@ -742,8 +1333,8 @@ class Model:
                     analyser.check_main_function()
                     analyser.check_element_order(tree.body, cnf.ELEMENT_ORDER)
                     analyser.check_global_variables()
-                    analyser.check_local_global_names(self.same_names_dict)
-                    analyser.check_recursive_functions(self.function_dict)
+                    analyser.check_local_global_names(self.context.same_names_dict)
+                    analyser.check_recursive_functions(self.context.function_dict)
                     analyser.clear_all()
 
                 elif(opt == "library"):
@@ -751,7 +1342,7 @@ class Model:
                     analyser.check_info_comments(content)
 
                     # Duplicate import check
-                    analyser.check_duplicate_imports(self.import_dict)
+                    analyser.check_duplicate_imports(self.context.import_dict)
 
                     # Main file check
                     if(analyser.has_main_function(tree)): # True this should be a main file
@@ -761,6 +1352,10 @@ class Model:
 
                 self.save_category(opt)
 
+        finally:
+            self._category_results = category_results
+            self._category_buffers = []
+
     def format_violations(self, all_results):
         """
         Method to format results to violations. Category titles are
@@ -771,18 +1366,10 @@ class Model:
         """
 
         line_list = []
-        violations = []
-        for title_key, results in all_results:
-            violations.clear()
-
+        for title_key, violations in all_results.iter_violations():
             # Every line after each topics is empty to make view less crowded.
             line_list.append(("", cnf.GENERAL))
 
-            # Include only violations
-            for violation in results:
-                if violation.status == False:  # False means there is a violation
-                    violations.append(violation)
-
             # Check if there are violations in this topic/title, if not go to
             # next title/analysis category.
             if len(violations) == 0:
@@ -797,9 +1384,8 @@ class Model:
                 utils.create_title('NOTE', title_key, lang=self.language)
             )
 
-            for violation in violations: # TODO sort by lineno?
-                line_list.append(violation.get_msg(self.language))
-        violations.clear()
+            for i in violations: # TODO sort by lineno?
+                line_list.append(all_results.get_msg(i, self.language))
 
         return line_list
 
@@ -813,18 +1399,10 @@ class Model:
         """
 
         line_list = []
-        violations = []
-        for title_key, results in all_results:
-            violations.clear()
-
+        for title_key, violations in all_results.iter_violations():
             # Every line after each topics is empty to make view less crowded.
             #line_list.append(("", cnf.GENERAL))
 
-            # Include only violations
-            for violation in results:
-                if violation.status == False:  # False means there is a violation
-                    violations.append(violation)
-
             # Check if there are violations in this topic/title, if not go to
             # next title/analysis category.
             if len(violations) == 0:
@@ -839,12 +1417,72 @@ class Model:
                 utils.create_title('NOTE', title_key, lang=self.language)
             )
 
-            for violation in violations: # TODO sort by lineno?
-                line_list.append(violation.get_msg(self.language))
-        violations.clear()
+            for i in violations: # TODO sort by lineno?
+                line_list.append(all_results.get_msg(i, self.language))
 
         return line_list
 
+    def report_statistics(self):
+        """
+        Method to print summary of violation statistics and write
+        statistics and the summary into JSON files and the student x
+        violation ID matrix into CSV file at the end of analysis run.
+        Statistics are cleared for the next run. Does nothing if
+        statistics are not in use.
+        """
+
+        if self.statistics is None:
+            return None
+
+        if self.settings.get("console_print", False):
+            a_utils.print_statistics(self.statistics.get_summary())
+
+        if self.settings.get("file_write", False):
+            utils.write_file(
+                self.settings["statistics_path"],
+                json.dumps(self.statistics.to_dict(), indent=4),
+                mode="w"
+            )
+            utils.write_file(
+                self.settings["statistics_summary_path"],
+                json.dumps(self.statistics.get_summary(), indent=4),
+                mode="w"
+            )
+            utils.write_file(
+                self.settings["statistics_csv_path"],
+                self.statistics.to_csv(self.settings.get("statistics_cell_separator", ";")),
+                mode="w"
+            )
+
+        self.statistics.clear()
+        return None
+
+    def report_instrumentation(self):
+        """
+        Method to print instrumentation report and write it into JSON
+        file at the end of analysis run. Measurements are cleared for
+        the next run. Does nothing if instrumentation is not in use.
+        """
+
+        if self.instrumentation is None:
+            return None
+
+        data = self.instrumentation.get_data()
+        if self.settings.get("console_print", False):
+            utils.create_dash()
+            print(self.instrumentation.format_report(data))
+            utils.create_dash()
+
+        if self.settings.get("file_write", True):
+            utils.write_file(
+                self.settings["instrumentation_path"],
+                json.dumps(data, indent=4),
+                mode="w"
+            )
+
+        self.instrumentation.clear()
+        return None
+
     def count_structures(self, file_dict):
         """
         Method to write detected structures into a result file.
@@ -932,4 +1570,73 @@ class Model:
         print()
         print(ast.dump(tree, annotate_fields=False,
                        include_attributes=False, indent=indent))
-        utils.create_dash()
\ No newline at end of file
+        utils.create_dash()
+
+########################################################################
+# Worker processes
+
+class WorkerController():
+    """
+    Controller for Model objects created without user interface, e.g.
+    in worker processes of parallel bulk analysis and analysis server.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.LANG = settings.get("language", "FIN")
+
+    def get_settings(self):
+        return self.settings
+
+    def propagate_error_message(self, error_code, *args, error_type="error"):
+        if error_type == "error":
+            print(cnf.CLI_ERROR[self.LANG][error_code])
+
+        elif error_type == "conflict":
+            print(cnf.SETTINGS_CONFLICTS[self.LANG][error_code])
+
+
+_WORKER_MODEL = None  # Model of the current worker process
+
+
+def _init_worker(settings):
+    """Initialiser of bulk analysis and analysis server worker process."""
+
+    global _WORKER_MODEL
+    _WORKER_MODEL = Model(WorkerController(settings))
+
+
+def _bulk_analyse_student(selections, student_obj):
+    """
+    Function to analyse single student in bulk analysis worker process.
+
+    Return: Tuple of analysed student_obj, course_id and reports, which
+    is a dict containing measurements of instrumentation and statistics
+    of the student when they are in use.
+    """
+
+    course_id = _WORKER_MODEL.bulk_analyse_student(selections, student_obj)
+    # Structures are not used in bulk analysis
+    _WORKER_MODEL.structures.clear()
+
+    reports = {}
+    if _WORKER_MODEL.instrumentation is not None:
+        reports["instrumentation"] = _WORKER_MODEL.instrumentation.get_data()
+        _WORKER_MODEL.instrumentation.clear()
+    if _WORKER_MODEL.statistics is not None:
+        reports["statistics"] = _WORKER_MODEL.statistics
+        _WORKER_MODEL.statistics = type(_WORKER_MODEL.statistics)()
+    return student_obj, course_id, reports
+
+
+def _analyse_source(selections, content, filename):
+    """
+    Function to analyse source code in analysis server worker process.
+
+    Return: Tuple of formatted results and analysis time in seconds.
+    """
+
+    start = time.perf_counter()
+    results = _WORKER_MODEL.analyse_source(content, selections, filename=filename)
+    formated_results = _WORKER_MODEL.format_violations_web(results)
+    return formated_results, time.perf_counter() - start
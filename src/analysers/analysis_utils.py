@@ -1,5 +1,6 @@
 """Library containing utility functions for static analysers."""
 
+import array
 import ast
 from collections import defaultdict
 from collections import Counter
@@ -11,124 +12,234 @@ LIST_MODIFICATION_ATTRIBUTES = LIST_ADDITION_ATTRIBUTES | { # Union of sets
 }
 DICT_MODIFICATION_ATTRIBUTES = {"clear", "pop", "popitem", "setdefault", "update"}
 
-# AST improvement utilities
-def add_parents(tree):
-    """Function to add parent_node attribute to each node in AST."""
-
-    for node in ast.walk(tree):
-        for child_node in ast.iter_child_nodes(node):
-            child_node.parent_node = node
-
-
-def add_siblings(tree):
+# Tree index
+class TreeIndex():
     """
-    Function to add previous_sibling and next_sibling attributes to each
-    node in AST, which are inside iterable body of parent node. For
-    nodes which are inside these iterable bodies, if no there is no
-    previous or next sibling the respective value will be None.
-
-    NOTE 1:
-    Useful iterable bodies are body, orelse, handlers and finalbody,
-    however, also type_ignores, decorator_list, argument lists (e.g.
-    args and kw_defaults) will get sibling attributes.
-
-    NOTE 2:
-    In addition global-keyword creates Global node which has str typed
-    elements and this creates attribute error when trying to assign
-    values to next_sibling and previous_sibling attrbutes.
+    Class for parent, sibling and scope links of an AST. Tree is
+    annotated in a single breadth-first pass and links are stored in
+    side tables indexed by per-node integer id, so that the nodes
+    themselves are not modified.
+
+    Tables:
+    1. parents - Index of the parent node, -1 for the root.
+    2. previous and next - Index of the previous and next node in the
+       same list field (e.g. body, orelse, handlers, finalbody, args),
+       -1 if there is no such node and NO_SIBLINGS if the node is not
+       inside a list field.
+    3. scopes - Dict where key is node type and value is index of the
+       nearest ancestor of that type, recorded for SCOPE_TYPES
+       (functions, classes, loops, with and try statements). Scope
+       dicts are shared by all nodes between two scope nodes, therefore
+       new dict is created only for the children of scope nodes.
+
+    Because nodes are numbered in breadth-first order, ancestor always
+    has smaller index than its descendants.
+
+    Index belongs to single tree, e.g. Model keeps the index of the
+    analysed tree and gives it to preanalyser and structure detector,
+    while each imported library gets an own index.
     """
 
-    for node in ast.walk(tree):
-        for field in ast.iter_fields(node): # Yield a tuple of (fieldname, value)
-
-            # There could be check that name of the field is either
-            # body, orelse, handlers or finalbody
-            # but not in 'names' used in Global node.
-            if(isinstance(field[1], (list, tuple))):
-                previous_sibling = last = None
-                for child_node in field[1]:
-                    try:
-                        if(previous_sibling):
-                            previous_sibling.next_sibling = child_node
-
-                        child_node.previous_sibling = previous_sibling
-                        previous_sibling = last = child_node
-
-                    # This error may occur e.g. when
-                    #   'str' object has no attribute 'previous_sibling'
-                    # which is case e.g. with global-keyword creating node
-                    #   Global(names=['with_global_keyword']),
-                    except AttributeError:
-                        pass
-                if(last):
-                    last.next_sibling = None
-
-    # # Print siblings
-    # for node in ast.walk(tree):
-    #     try:
-    #         pl = nl = ""
-    #         if(node.previous_sibling):
-    #             pl = node.previous_sibling.lineno
-
-    #         if(node.next_sibling):
-    #             nl = node.next_sibling.lineno
-
-    #         print(f"{node.lineno:4}: {node}, PREV {pl}: {node.previous_sibling}, NEXT {nl}: {node.next_sibling}")
-    #     except AttributeError:
-    #         print("---", node)
-
-# AST search utilities
-def get_parent(node, allowed, denied=tuple()):
-    """
-    Function to get parent instance of a node.
-    'allowed' argument defines type of the desired parent, it should be
-    any of the ast node types and can be tuple. Optional argument '
-    denied' defines not allowed parents as ast node types.
-
-    If allowed type is found, returns found node, if denied type is
-    found first or neither of them is found returns None.
-    """
-
-    temp = node
-    parent = None
-    while(hasattr(temp, "parent_node") and not isinstance(temp, denied)):
-        temp = temp.parent_node
-        if isinstance(temp, allowed):
-            parent = temp
-            break
-    return parent
-
-
-def get_outer_parent(node, allowed, **kwargs):
-    """
-    Function to get outermost parent instance with allowed type. Uses
-    get_parent function until denied is found or no more allowed type is
-    found.
-
-    Return:
-    IF parent is found: outer_parent - ast Node - Outermost parent node
-                        of a reguested type.
-    ELSE: node - the parameter node itself.
-    """
-
-    outer_parent = node
-    while (temp := get_parent(outer_parent, allowed, **kwargs)):
-        outer_parent = temp
-    return outer_parent
-
-
-def has_same_parent(node, others, allowed, **kwargs): #denied=tuple()):
-    # NOT YET TESTED
-    parent = get_parent(node, allowed, **kwargs)
-    if isinstance(others, (list, tuple, set)):
-        for i in others:
-            if not parent or (parent != get_parent(i, allowed, **kwargs)):
-                return False
-    elif not parent or (parent != get_parent(others, allowed, **kwargs)):
-        return False
-    return True
+    def __init__(self, tree):
+        self.tree = tree
+        self.nodes = [tree]      # Index -> node
+        self.ids = {tree: 0}     # Node -> index
+        self.parents = array.array("i", (-1,))
+        self.previous = array.array("i", (NO_SIBLINGS,))
+        self.next = array.array("i", (NO_SIBLINGS,))
+        self.scopes = [{}]       # Index -> scope
+
+        i = 0
+        while i < len(self.nodes):
+            node = self.nodes[i]
+            scope = self.scopes[i]
+            node_type = type(node)
+            if node_type in SCOPE_TYPES:
+                scope = dict(scope)
+                scope[node_type] = i
+
+            # Children in the same order as ast.iter_child_nodes gives
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    previous = -1
+                    for child_node in value:
+                        # Skips e.g. str names of Global and None keys
+                        # of Dict. Context and operator nodes are shared
+                        # between parents and therefore not indexed.
+                        if(isinstance(child_node, ast.AST)
+                                and not isinstance(child_node, SHARED_TYPES)):
+                            j = self._add(child_node, i, scope, previous)
+                            if(previous >= 0):
+                                self.next[previous] = j
+                            previous = j
+
+                elif(isinstance(value, ast.AST)
+                        and not isinstance(value, SHARED_TYPES)):
+                    self._add(value, i, scope, NO_SIBLINGS)
+            i += 1
+
+    def _add(self, node, parent, scope, previous):
+        i = len(self.nodes)
+        self.nodes.append(node)
+        self.ids[node] = i
+        self.parents.append(parent)
+        self.previous.append(previous)
+        self.next.append(-1 if previous != NO_SIBLINGS else NO_SIBLINGS)
+        self.scopes.append(scope)
+        return i
+
+    def _find(self, node):
+        try:
+            return self.ids[node]
+        except KeyError:
+            raise ValueError(
+                f"'{type(node).__name__}' node is not in the indexed tree"
+            ) from None
+
+    def _get_scope_parent(self, i, allowed, denied):
+        """
+        Method to get parent as get_parent does by using the scopes.
+        Allowed and denied must be tuples of SCOPE_TYPES.
+
+        Return: Parent node or None
+        """
+
+        if denied and isinstance(self.nodes[i], denied):
+            return None
+
+        scope = self.scopes[i]
+        parent = -1
+        for node_type in allowed:
+            if (j := scope.get(node_type, -1)) > parent:
+                parent = j
+        if parent < 0:
+            return None
+
+        # Ancestor which is both allowed and denied is allowed
+        for node_type in denied:
+            if node_type not in allowed and scope.get(node_type, -1) > parent:
+                return None
+        return self.nodes[parent]
+
+    def _walk_parents(self, i, allowed, denied):
+        """
+        Method to get parent as get_parent does by walking the parents
+        table.
+
+        Return: Parent node or None
+        """
+
+        nodes = self.nodes
+        parents = self.parents
+        while((j := parents[i]) >= 0 and not isinstance(nodes[i], denied)):
+            i = j
+            if isinstance(nodes[i], allowed):
+                return nodes[i]
+        return None
+
+   # ------------------------------------------------------------------------- #
+   # AST search utilities
+    def get_parent(self, node, allowed, denied=tuple()):
+        """
+        Method to get parent instance of a node.
+        'allowed' argument defines type of the desired parent, it should be
+        any of the ast node types and can be tuple. Optional argument '
+        denied' defines not allowed parents as ast node types.
+
+        If allowed type is found, returns found node, if denied type is
+        found first or neither of them is found returns None.
+
+        Parents of SCOPE_TYPES are looked up from the scopes, other
+        types are searched by walking the parents.
+        Raises ValueError if node is not in the indexed tree.
+        """
+
+        i = self._find(node)
+        allowed_types = allowed if isinstance(allowed, tuple) else (allowed,)
+        denied_types = denied if isinstance(denied, tuple) else (denied,)
+        if (SCOPE_TYPES.issuperset(allowed_types)
+                and SCOPE_TYPES.issuperset(denied_types)):
+            return self._get_scope_parent(i, allowed_types, denied_types)
+        return self._walk_parents(i, allowed_types, denied_types)
+
+    def get_parent_node(self, node):
+        """
+        Method to get direct parent of a node.
+
+        Return: Parent node or None if node is root of the tree.
+        Raises ValueError if node is not in the indexed tree.
+        """
+
+        if (j := self.parents[self._find(node)]) < 0:
+            return None
+        return self.nodes[j]
+
+    def _get_sibling(self, node, table):
+        if (j := table[self._find(node)]) == NO_SIBLINGS:
+            raise AttributeError(f"'{type(node).__name__}' node has no siblings")
+        return self.nodes[j] if j >= 0 else None
+
+    def get_previous_sibling(self, node):
+        """
+        Method to get previous node in the same list field, e.g. body.
+
+        Return: Previous node or None if node is the first one.
+        Raises AttributeError if node is not inside list field.
+        """
+
+        return self._get_sibling(node, self.previous)
+
+    def get_next_sibling(self, node):
+        """
+        Method to get next node in the same list field, e.g. body.
+
+        Return: Next node or None if node is the last one.
+        Raises AttributeError if node is not inside list field.
+        """
+
+        return self._get_sibling(node, self.next)
+
+    def get_outer_parent(self, node, allowed, **kwargs):
+        """
+        Method to get outermost parent instance with allowed type. Uses
+        get_parent method until denied is found or no more allowed type
+        is found.
+
+        Return:
+        IF parent is found: outer_parent - ast Node - Outermost parent node
+                            of a reguested type.
+        ELSE: node - the parameter node itself.
+        """
+
+        outer_parent = node
+        while (temp := self.get_parent(outer_parent, allowed, **kwargs)):
+            outer_parent = temp
+        return outer_parent
+
+    def has_same_parent(self, node, others, allowed, **kwargs): #denied=tuple()):
+        # NOT YET TESTED
+        parent = self.get_parent(node, allowed, **kwargs)
+        if isinstance(others, (list, tuple, set)):
+            for i in others:
+                if not parent or (parent != self.get_parent(i, allowed, **kwargs)):
+                    return False
+        elif not parent or (parent != self.get_parent(others, allowed, **kwargs)):
+            return False
+        return True
+
+
+# Node types recorded into the scopes of tree index
+SCOPE_TYPES = frozenset((
+    ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef,
+    ast.For, ast.While, ast.With, ast.Try, ast.ExceptHandler
+))
+# Node types which are same objects in every parent and therefore not indexed
+SHARED_TYPES = (ast.expr_context, ast.boolop, ast.operator, ast.unaryop, ast.cmpop)
+NO_SIBLINGS = -2  # Sibling index of a node which is not inside list field
 
 
+# AST search utilities
 def get_child_instance(node, allowed, denied=tuple()):
     """
     Function to get child instance of a node.
@@ -167,14 +278,16 @@ def is_always_true(test):
     return is_true
 
 
-def is_added_to_data_structure(node, data_stuct_node, data_stuct_name, add_attrs):
+def is_added_to_data_structure(tree_index, node, data_stuct_node, data_stuct_name,
+                               add_attrs):
     """
     Helper function to detect if node is added to a datastucture.
-    So far tested and commented only with ast.List.
+    So far tested and commented only with ast.List. Tree index is the
+    TreeIndex of the tree containing the node.
     """
 
     is_added = False
-    parent = get_parent(node, (data_stuct_node, ast.Call))
+    parent = tree_index.get_parent(node, (data_stuct_node, ast.Call))
 
     # This detect list_name += [...] and list_name = list_name + [...]
     # and cases with extend where list_name.extend([...])
@@ -301,67 +414,16 @@ def get_class_name(node, **kwargs):
 
 ####################################################################
 # TA and bulkanalysis functions
-def results_to_violation_dict(results: list) -> dict:
-    violation_dict = defaultdict(int)
-    for category_name, result_tuple in results:
-        for i in result_tuple:
-            if i.status == False: # = violation
-                violation_dict[i.vid] += 1
-    return violation_dict
-
-####################################################################
-# Statistic functions
-def calculate_statistics(results):
-    statistics = {}
-    found_violation = False
-
-    for result in results:
-        for violation in result[1]:
-            try:
-                if violation.status == False: # = violation
-                    try:
-                        statistics[violation.vid] += 1
-                    except KeyError:
-                        statistics[violation.vid] = 1
-                    found_violation = True
-            except AttributeError as e:
-                print("error....", e) # TODO remove this
-                pass
-
-    statistics["all_ok"] = not found_violation
-    statistics["file_count"] = 1
-    return statistics
-
-def sum_statistics(all_statistics, student, new):
+def results_to_violation_dict(results) -> dict:
     """
+    Return: Number of violations per violation ID in results, see
+    templates.ResultBuffer - defaultdict
     """
 
-    # def add_to_dict(d, k, v):
-    #     try:
-    #         d[k] += v
-    #     except KeyError:
-    #         d[k] = v
-    #     return None
-
-    submission = all_statistics.setdefault(student, {})
-
-    # add_to_dict(all_statistics["ALL"], "file_count", 1)
-
-    for key, value in new.items():
-        # TODO setting absolute value / number of submissions where this occur
-        # v = value
-        v = 1 # With this and all_ok does not work because if it was False
-              # it is counted as 0 now it will be forced to be 1.
-        try:
-            all_statistics["ALL"][key] += v
-        except KeyError:
-            all_statistics["ALL"][key] = v
-
-        try:
-            submission[key] += value
-        except KeyError:
-            submission[key] = value
+    return defaultdict(int, results.count_violations())
 
+####################################################################
+# Statistic functions
 def print_statistics(statistics):
     try:
         import pprint
@@ -116,7 +116,7 @@ class BasicsAnalyser(ast.NodeVisitor):
                 "PT5",
                 command_name,
                 lineno=node.lineno,
-                status=(node.next_sibling is None)
+                status=(self.model.tree_index.get_next_sibling(node) is None)
             )
         except AttributeError:
             pass
@@ -148,7 +148,7 @@ class BasicsAnalyser(ast.NodeVisitor):
         # This variable is used to guarantee that line number of the
         # first if in an if-pyramid is used in violation message.
         min_lineno = node.lineno
-        parent = node.parent_node
+        parent = self.model.tree_index.get_parent_node(node)
 
         if parent in self._checked_if_pyramid_parents:
             return None
@@ -212,12 +212,12 @@ class BasicsAnalyser(ast.NodeVisitor):
             # Unreachable code check
             if call_name == "exit":
                 self._check_unreachable_code(
-                    a_utils.get_parent(node, ast.Expr),
+                    self.model.tree_index.get_parent(node, ast.Expr),
                     "exit"
                 )
             elif call_name == "quit":
                 self._check_unreachable_code(
-                    a_utils.get_parent(node, ast.Expr),
+                    self.model.tree_index.get_parent(node, ast.Expr),
                     "quit"
                 )
         except AttributeError:
@@ -228,7 +228,7 @@ class BasicsAnalyser(ast.NodeVisitor):
                 # Unreachable code check
                 if attribute_name == "sys" and call_name == "exit":
                     self._check_unreachable_code(
-                        a_utils.get_parent(node, ast.Expr),
+                        self.model.tree_index.get_parent(node, ast.Expr),
                         "sys.exit"
                     )
 
@@ -0,0 +1,237 @@
+"""
+Class file. Contains CohortStatistics class for violation statistics of
+all students of an analysis run.
+"""
+
+import array
+import bisect
+
+PERCENTILES = (50, 75, 90, 95)  # Percentiles of violations per student
+
+
+def percentile(values, p):
+    """
+    Function to calculate percentile with linear interpolation between
+    the closest ranks.
+
+    Arguments:
+    1. values - Sorted values - Sequence
+    2. p - Percentile between 0 and 100 - int or float
+
+    Return: Percentile or 0 if values is empty - float
+    """
+
+    if not values:
+        return 0
+    position = (len(values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class CohortStatistics():
+    """
+    Class to accumulate dense matrix of violation counts, where each row
+    is a student and each column a violation ID. Rows are arrays of the
+    same length, i.e. all rows are widened together when a new violation
+    ID is found. Totals per violation
+    ID are updated while files are added and other statistics are
+    calculated from the columns of the matrix, i.e. analysis results are
+    not iterated again.
+
+    NumPy is not a dependency of ASPA, therefore the matrix is stored in
+    arrays of the standard library.
+    """
+
+    def __init__(self):
+        self.students = []  # Row -> student
+        self.courses = []   # Row -> course of the student or None
+        self.codes = []     # Column -> violation ID
+        self.rows = []      # Row -> violation counts of the student
+        self.file_counts = array.array("L")      # Row -> analysed files
+        self.ok_counts = array.array("L")        # Row -> files without violations
+        self.totals = array.array("L")           # Column -> all violations
+        self.file_prevalence = array.array("L")  # Column -> files with violation
+        self._row_index = {}     # Student -> row
+        self._column_index = {}  # Violation ID -> column
+
+   # ------------------------------------------------------------------------- #
+   # Accumulation
+    def _get_row(self, student, course):
+        try:
+            return self._row_index[student]
+        except KeyError:
+            i = self._row_index[student] = len(self.students)
+            self.students.append(student)
+            self.courses.append(course)
+            self.rows.append(array.array("L", [0]) * len(self.codes))
+            self.file_counts.append(0)
+            self.ok_counts.append(0)
+            return i
+
+    def _get_column(self, code):
+        try:
+            return self._column_index[code]
+        except KeyError:
+            j = self._column_index[code] = len(self.codes)
+            self.codes.append(code)
+            self.totals.append(0)
+            self.file_prevalence.append(0)
+            for row in self.rows:
+                row.append(0)
+            return j
+
+    def add_file(self, student, violations, course=None):
+        """
+        Method to add violations of single analysed file.
+
+        Arguments:
+        1. student - Student or submission which the file belongs - str
+        2. violations - Number of violations per violation ID, e.g.
+           templates.ResultBuffer.count_violations - dict
+        3. course - Course of the student or None - str
+        """
+
+        i = self._get_row(student, course)
+        self.file_counts[i] += 1
+        if not violations:
+            self.ok_counts[i] += 1
+
+        row = self.rows[i]
+        for code, count in violations.items():
+            j = self._get_column(code)
+            row[j] += count
+            self.totals[j] += count
+            self.file_prevalence[j] += 1
+
+    def merge(self, other):
+        """
+        Method to add statistics of other CohortStatistics object, e.g.
+        statistics of parallel bulk analysis worker.
+        """
+
+        columns = [self._get_column(code) for code in other.codes]
+        for j, code in zip(columns, other.codes):
+            k = other._column_index[code]
+            self.totals[j] += other.totals[k]
+            self.file_prevalence[j] += other.file_prevalence[k]
+
+        for k, student in enumerate(other.students):
+            i = self._get_row(student, other.courses[k])
+            self.file_counts[i] += other.file_counts[k]
+            self.ok_counts[i] += other.ok_counts[k]
+            row = self.rows[i]
+            for j, count in zip(columns, other.rows[k]):
+                row[j] += count
+
+    def clear(self):
+        self.__init__()
+
+   # ------------------------------------------------------------------------- #
+   # Statistics
+    def get_column(self, code):
+        """Return: Violation counts of each student - list"""
+
+        j = self._column_index[code]
+        return [row[j] for row in self.rows]
+
+    def get_violation_statistics(self, code):
+        """
+        Return: Statistics of the violation ID. Prevalence is the share
+        of students who have the violation and percentiles describe
+        the distribution of violations per student - dict
+        """
+
+        j = self._column_index[code]
+        column = sorted(self.get_column(code))
+        students = len(column) - bisect.bisect_right(column, 0)
+        statistics = {
+            "total": self.totals[j],
+            "files": self.file_prevalence[j],
+            "students": students,
+            "prevalence": students / len(column) if column else 0,
+            "mean": self.totals[j] / len(column) if column else 0,
+            "max": column[-1] if column else 0
+        }
+        for p in PERCENTILES:
+            statistics[f"p{p}"] = percentile(column, p)
+        return statistics
+
+    def get_course_totals(self):
+        """
+        Return: Dict where key is course and value contains number of
+        students, files and violations per violation ID of the course.
+        """
+
+        courses = {}
+        for i, course in enumerate(self.courses):
+            course = "" if course is None else str(course)
+            totals = courses.setdefault(course, {
+                "students": 0, "files": 0, "files_ok": 0, "violations": {}
+            })
+            totals["students"] += 1
+            totals["files"] += self.file_counts[i]
+            totals["files_ok"] += self.ok_counts[i]
+            violations = totals["violations"]
+            for code, count in zip(self.codes, self.rows[i]):
+                if count:
+                    violations[code] = violations.get(code, 0) + count
+        return courses
+
+    def get_summary(self):
+        """Return: Statistics of the cohort without students - dict"""
+
+        return {
+            "students": len(self.students),
+            "files": sum(self.file_counts),
+            "files_ok": sum(self.ok_counts),
+            "violations": {
+                code: self.get_violation_statistics(code) for code in sorted(self.codes)
+            },
+            "courses": self.get_course_totals()
+        }
+
+    def to_dict(self):
+        """
+        Return: Statistics in the format of statistics file, where "ALL"
+        contains number of files with each violation ID and each student
+        contains number of each violation ID. Both contain number of
+        files without violations ("all_ok") and number of files
+        ("file_count") - dict
+        """
+
+        statistics = {"ALL": {
+            code: self.file_prevalence[j] for j, code in enumerate(self.codes)
+        }}
+        statistics["ALL"]["all_ok"] = sum(self.ok_counts)
+        statistics["ALL"]["file_count"] = sum(self.file_counts)
+
+        for i, student in enumerate(self.students):
+            submission = {
+                code: count for code, count in zip(self.codes, self.rows[i]) if count
+            }
+            submission["all_ok"] = self.ok_counts[i]
+            submission["file_count"] = self.file_counts[i]
+            statistics[student] = submission
+        return statistics
+
+    def to_csv(self, separator=";"):
+        """
+        Return: Matrix as CSV, where each line is a student and columns
+        are course, files, files without violations and number of each
+        violation ID - str
+        """
+
+        codes = sorted(self.codes)
+        columns = [self._column_index[code] for code in codes]
+        lines = [separator.join(("student", "course", "files", "files_ok", *codes))]
+        for i, student in enumerate(self.students):
+            row = self.rows[i]
+            lines.append(separator.join((
+                str(student),
+                "" if self.courses[i] is None else str(self.courses[i]),
+                str(self.file_counts[i]),
+                str(self.ok_counts[i]),
+                *(str(row[j]) for j in columns)
+            )))
+        return "\n".join(lines) + "\n"
@@ -10,7 +10,15 @@ class DataStructureAnalyser(ast.NodeVisitor):
    # Initialisations
     def __init__(self, model):
         self.model = model
-        self._local_objects = {}    # store objects created in analysed functions
+        # Objects created in each function of the module, function node ->
+        # {object name: ObjectTemplate}, built in _detect_objects.
+        self._object_index = {}
+        # Objects of the functions analysed so far, function node ->
+        # {object name: ObjectTemplate} and object name -> ObjectTemplate
+        # of the first function where object with the name is created.
+        self._local_objects = {}
+        self._all_objects = {}
+        self._list_additions = {}   # loop -> {name: nodes added to a list}
         self._analysed_TR3_2 = {}   # store analysed (function, object) tuples
         self._list_addition_attributes = a_utils.LIST_ADDITION_ATTRIBUTES
 
@@ -18,63 +26,69 @@ class DataStructureAnalyser(ast.NodeVisitor):
    # ------------------------------------------------------------------------- #
    # General methods
     def _detect_objects(self, tree):
-        _objects = []
+        """
+        Method to index objects created in each function of the module
+        with one walk. Object is created in the function, which is the
+        nearest function or class containing the assignment, i.e.
+        objects of nested functions and classes are not included in the
+        outer function.
+
+        Only the first object with the same name in the function is
+        indexed, because it is the one returned by _get_object_by_name.
+        """
 
         classes = self.model.get_class_dict().keys()
-        parent = tree.name
+        self._object_index = {}
+        self._local_objects = {}
+        self._all_objects = {}
+        self._list_additions = {}
+        self._analysed_TR3_2 = {}
 
-        # Linenumber are positive therefore this inactivate skip
-        skip_end = -1
         for node in ast.walk(tree):
-
-            # Used to skip nested functions and classes
-            try:
-                if skip_end >= node.lineno:
-                    continue
-                elif isinstance(node, cnf.CLS_FUNC) and node is not tree:
-                    skip_end = node.end_lineno
-                    continue
-            except AttributeError:
-                continue
-
             # Object detection
             try:
+                if not isinstance(node, ast.Assign):
+                    continue
                 name = node.value.func.id
-                if (isinstance(node, ast.Assign)
-                    and ((name in classes)
-                        or (f"{parent}.{name}" in classes))
+                func = self.model.tree_index.get_parent(node, cnf.CLS_FUNC)
+                if (not isinstance(func, cnf.FUNC)
+                    or not ((name in classes)
+                        or (f"{func.name}.{name}" in classes))
                 ):
-                    for i in node.targets:
-                        _objects.append(
-                            templates.ObjectTemplate(
-                                a_utils.get_attribute_name(i),
-                                node.lineno,
-                                i
-                            )
+                    continue
+
+                objects = self._object_index.setdefault(func, {})
+                for i in node.targets:
+                    obj_name = a_utils.get_attribute_name(i)
+                    if obj_name not in objects:
+                        objects[obj_name] = templates.ObjectTemplate(
+                            obj_name,
+                            node.lineno,
+                            i
                         )
             except AttributeError:
                 pass
+        return None
+
+    def _add_local_objects(self, func):
+        """Method to add objects of the function to analysed objects."""
 
-        self._local_objects[tree] = _objects
+        objects = self._object_index.get(func, {})
+        self._local_objects[func] = objects
+        for name, obj in objects.items():
+            self._all_objects.setdefault(name, obj)
         return None
 
-    def _get_local_object_names(self, func=None):
+    def _has_local_object(self, obj_name, func=None):
         """
-        Method to return names of the objects within given function. If
-        no func-argument is given search objects from every function.
-
-        Names are returned as a list of strings.
+        Method to check if object with given name is created within
+        given function. If no func-argument is given search objects from
+        every function.
         """
 
-        names = []
         if func:
-            for i in self._local_objects.get(func, []):
-                names.append(i.name)
-        else:
-            for value in self._local_objects.values():
-                for i in value:
-                    names.append(i.name)
-        return names
+            return obj_name in self._local_objects.get(func, {})
+        return obj_name in self._all_objects
 
     def _get_object_by_name(self, obj_name, func=None):
         """
@@ -82,22 +96,33 @@ class DataStructureAnalyser(ast.NodeVisitor):
         func-argument is given search objects only from that function.
         """
 
-        obj = None
         if func:
-            for i in self._local_objects.get(func, []):
-                if i.name == obj_name:
-                    obj = i
-                    break
-        else:
-            for value in self._local_objects.values():
-                for i in value:
-                    if i.name == obj_name:
-                        obj = i
-                        # NOTE: using break instead of return would allow same
-                        # object from different function to be returned,
-                        # therefore it would not be the first object.
-                        return obj
-        return obj
+            return self._local_objects.get(func, {}).get(obj_name)
+        return self._all_objects.get(obj_name)
+
+    def _get_list_additions(self, loop, obj_name):
+        """
+        Method to return nodes inside the loop, which have name
+        obj_name and are added to a list. Loop is walked only once and
+        the nodes of all names are stored.
+        """
+
+        if (additions := self._list_additions.get(loop)) is None:
+            additions = self._list_additions[loop] = {}
+            for elem in ast.walk(loop):
+                try:
+                    name = a_utils.get_attribute_name(elem)
+                    if a_utils.is_added_to_data_structure(
+                            self.model.tree_index,
+                            elem,
+                            ast.List,
+                            "list",
+                            self._list_addition_attributes
+                    ):
+                        additions.setdefault(name, []).append(elem)
+                except AttributeError:
+                    continue
+        return additions.get(obj_name, ())
 
     def _check_creation_without_parenthesis(self, node):
         """
@@ -109,7 +134,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
         classes = self.model.get_class_dict().keys()
 
         try:
-            parent = a_utils.get_parent(node, cnf.CLS_FUNC)
+            parent = self.model.tree_index.get_parent(node, cnf.CLS_FUNC)
 
             if (temp := self._is_class_call(node, parent, classes)):
                 self.model.add_msg(
@@ -138,8 +163,8 @@ class DataStructureAnalyser(ast.NodeVisitor):
             # the param creates the outermost Attribute node. In this case the
             # last attribute is ommitted because it is ATTRIBUTE's name not name
             # of the OBJECT.
-            func = a_utils.get_parent(node, cnf.FUNC)
-            outermost_attr = a_utils.get_outer_parent(
+            func = self.model.tree_index.get_parent(node, cnf.FUNC)
+            outermost_attr = self.model.tree_index.get_outer_parent(
                 node,
                 ast.Attribute,
                 denied=(ast.List, ast.Call)
@@ -153,9 +178,10 @@ class DataStructureAnalyser(ast.NodeVisitor):
 
             # Test if object (or its attribute) is added to the list inside a
             # loop
-            if (obj in self._get_local_object_names(func)
-                and a_utils.get_parent(node, cnf.LOOP)
+            if (self._has_local_object(obj, func)
+                and self.model.tree_index.get_parent(node, cnf.LOOP)
                 and a_utils.is_added_to_data_structure(
+                        self.model.tree_index,
                         node,
                         ast.List,
                         "list",
@@ -180,7 +206,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
 
         # Get the function where object is created, if there is no parent
         # function, func is None and all the objects are searched in later step.
-        func = a_utils.get_parent(node, cnf.FUNC)
+        func = self.model.tree_index.get_parent(node, cnf.FUNC)
 
         for var in node.targets:
             try:
@@ -200,44 +226,29 @@ class DataStructureAnalyser(ast.NodeVisitor):
                 ):
                     continue
 
-                creation_loop = a_utils.get_parent(obj.astree, cnf.LOOP)
+                creation_loop = self.model.tree_index.get_parent(obj.astree, cnf.LOOP)
 
             except AttributeError:
                 continue
 
-            # TODO: This is now done everytime object attribute is assigned
-            # inside a loop. Optimize this such that objects are first gathered
-            # and then only one walk to check all of them.
-            for elem in ast.walk(assing_loop):
-                try:
-                    # NOTE: condition "not (func, obj.name) in self._analysed_TR3_2.keys()"
-                    # would limit analysis of each object to single case
-                    # because otherwise each list.append(obj) and obj.attr
-                    # triggers new BTKA result
-                    if ((obj.name == a_utils.get_attribute_name(elem))
-                        # and not (func, obj.name) in self._analysed_TR3_2.keys()
-                        and a_utils.is_added_to_data_structure(
-                            elem,
-                            ast.List,
-                            "list",
-                            self._list_addition_attributes
-                        )
-                    ):
-                    # 'status' tells if creation of object is in the same
-                    # loop as value is assigned to the attribute. If yes, no
-                    # violation.
-                        self.model.add_msg(
-                            "TR3-2",
-                            lineno=obj.lineno,
-                            status=(creation_loop == assing_loop)
-                        )
+            # NOTE: condition "not (func, obj.name) in self._analysed_TR3_2.keys()"
+            # would limit analysis of each object to single case
+            # because otherwise each list.append(obj) and obj.attr
+            # triggers new BTKA result
+            for elem in self._get_list_additions(assing_loop, obj.name):
+                # 'status' tells if creation of object is in the same
+                # loop as value is assigned to the attribute. If yes, no
+                # violation.
+                self.model.add_msg(
+                    "TR3-2",
+                    lineno=obj.lineno,
+                    status=(creation_loop == assing_loop)
+                )
 
-                        self._analysed_TR3_2.setdefault(
-                            (func, obj.name),
-                            []
-                        ).append(elem.lineno)
-                except AttributeError:
-                    continue
+                self._analysed_TR3_2.setdefault(
+                    (func, obj.name),
+                    []
+                ).append(elem.lineno)
         return None
 
     def _is_class_call(self, node, parent, classes):
@@ -264,7 +275,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
 
         is_call = False
         try:
-            if (temp := a_utils.get_parent(
+            if (temp := self.model.tree_index.get_parent(
                     node,
                     ast.Call,
                     denied=(ast.Assign,) + cnf.CLS_FUNC)):
@@ -272,7 +283,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
                 is_call = True
                 name = a_utils.get_class_name(temp)
 
-            elif (temp := a_utils.get_outer_parent(
+            elif (temp := self.model.tree_index.get_outer_parent(
                     node,
                     ast.Attribute,
                     denied=(ast.Assign, ast.Call) + cnf.CLS_FUNC)):
@@ -311,7 +322,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
             lineno=node.lineno,
             status=(
                 node.col_offset == 0
-                or a_utils.get_parent(node, cnf.CLS_FUNC) is None
+                or self.model.tree_index.get_parent(node, cnf.CLS_FUNC) is None
             )
         )
 
@@ -325,6 +336,12 @@ class DataStructureAnalyser(ast.NodeVisitor):
 
    # ------------------------------------------------------------------------- #
    # Visits
+    def visit_Module(self, node, *args, **kwargs):
+        """Method to index objects of the module."""
+
+        self._detect_objects(node)
+        self.generic_visit(node)
+
     def visit_Assign(self, node, *args, **kwargs):
         """Method to find:
         1. Direct usage of CLASS variables via class itself.
@@ -349,7 +366,7 @@ class DataStructureAnalyser(ast.NodeVisitor):
 
         # Check if assigning value to object attribute is inside a loop,
         # if not, no other target can be inside a loop either.
-        if (loop := a_utils.get_parent(node, cnf.LOOP)):
+        if (loop := self.model.tree_index.get_parent(node, cnf.LOOP)):
             self._check_object_outside_loop(node, loop)
 
         self.generic_visit(node)
@@ -368,13 +385,13 @@ class DataStructureAnalyser(ast.NodeVisitor):
         self.generic_visit(node)
 
     def visit_FunctionDef(self, node, *args, **kwargs):
-        """Method to call detect objects for current namespace."""
+        """Method to add objects of current namespace."""
 
-        self._detect_objects(node)
+        self._add_local_objects(node)
         self.generic_visit(node)
 
     def visit_AsyncFunctionDef(self, node, *args, **kwargs):
-        """Method to call detect objects for current namespace."""
+        """Method to add objects of current namespace."""
 
-        self._detect_objects(node)
+        self._add_local_objects(node)
         self.generic_visit(node)
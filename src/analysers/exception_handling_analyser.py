@@ -26,7 +26,7 @@ class ExceptionHandlingAnalyser(ast.NodeVisitor):
     def _has_exception_handling(self, node, denied=cnf.FUNC):
         """Check to determine if node is inside exception handling."""
 
-        if a_utils.get_parent(node, ast.Try, denied=denied) is None:
+        if self.model.tree_index.get_parent(node, ast.Try, denied=denied) is None:
             return False
         return True
 
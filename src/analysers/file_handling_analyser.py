@@ -19,6 +19,16 @@ class FileHandlingAnalyser(ast.NodeVisitor):
     def check_left_open_files(self, opened_files, closed_files):
         """Method to detect left open filehandles."""
 
+        # Opened filehandles by function and name, which are looked up
+        # for each closed filehandle.
+        opened_dict = {}
+        for opened_obj in opened_files:
+            key = (
+                self.model.tree_index.get_parent(opened_obj.astree, cnf.FUNC),
+                opened_obj.filehandle
+            )
+            opened_dict.setdefault(key, []).append(opened_obj)
+
         for closed in closed_files:
             try:
                 closed_name = a_utils.get_attribute_name(closed)
@@ -26,11 +36,9 @@ class FileHandlingAnalyser(ast.NodeVisitor):
                 continue
 
             temp = None
-            for opened_obj in opened_files:
-                if (closed_name == opened_obj.filehandle
-                        and closed.lineno >= opened_obj.lineno
-                        and a_utils.get_parent(opened_obj.astree, cnf.FUNC)
-                        is a_utils.get_parent(closed, cnf.FUNC)):
+            key = (self.model.tree_index.get_parent(closed, cnf.FUNC), closed_name)
+            for opened_obj in opened_dict.get(key, ()):
+                if closed.lineno >= opened_obj.lineno:
                     # Lineno check is used to detect correct order when multiple
                     # filehandles have same name in same function. However, this
                     # can fail if opening and closing are e.g. in different
@@ -56,6 +64,9 @@ class FileHandlingAnalyser(ast.NodeVisitor):
     def _has_open_and_close(self, node, func_handle, parent=cnf.FUNC):
         """Method to detect both, open() and close(), inside function
         and used for same filehandle as defined in "func_handle".
+        Openings and closings are looked up from the filehandle index
+        of the function created in preanalysis, see
+        PreAnalyser._store_file_handle.
 
         Check has three return points:
         1. True if parent is with.
@@ -63,48 +74,16 @@ class FileHandlingAnalyser(ast.NodeVisitor):
            file handle as the "func_handle" parameter.
         3. False otherwise.
         """
-        try:
-            # Check usage of "with" keyword
-            if a_utils.get_parent(node, ast.With) is not None:
-                return True
-
-            # Otherwise check function body
-            func_node = a_utils.get_parent(node, parent)
-            has_close = has_open = False
-
-            # while (not has_open or not has_close) and (subnode := ast.walk(func_node)):
-            for subnode in ast.walk(func_node):
-                try:
-                    if (not has_close
-                        and isinstance(subnode, ast.Attribute)
-                        and (subnode.attr == "close")
-                        and (a_utils.get_attribute_name(
-                                subnode,
-                                omit_n_last=1
-                            ) == func_handle)):
-                        # When attribute is close and functionhandles have same name
-                        # e.g. file_h.close()
-                        has_close = True
-
-                    elif (not has_open
-                        and isinstance(subnode, ast.Assign)
-                        and (subnode.value.func.id == "open")
-                        and (a_utils.get_attribute_name(
-                                subnode.targets[0]
-                            ) == func_handle)):
-                        # When filehandle is assigned for open()-call value.
-                        has_open = True
-
-                except AttributeError:
-                    continue
-
-                else:
-                    if has_open and has_close:
-                        return True
 
-        except AttributeError:
-            pass
-        return False
+        # Check usage of "with" keyword
+        if self.model.tree_index.get_parent(node, ast.With) is not None:
+            return True
+
+        # Otherwise check function body
+        func_node = self.model.tree_index.get_parent(node, parent)
+        handles = self.model.get_file_handle_dict().get(func_node, {})
+        opened, closed = handles.get(func_handle, ((), ()))
+        return bool(opened and closed)
 
     def _check_same_parent(self, node, attr, parent):
         """
@@ -130,7 +109,7 @@ class FileHandlingAnalyser(ast.NodeVisitor):
             "TK1-2",
             attr_name,
             lineno=node.lineno,
-            status=(a_utils.get_parent(node, ast.ExceptHandler) is None)
+            status=(self.model.tree_index.get_parent(node, ast.ExceptHandler) is None)
         )
 
         # TK1-3 close has not parenthesis i.e. close not close().
@@ -139,7 +118,7 @@ class FileHandlingAnalyser(ast.NodeVisitor):
             attr_name,
             "close",
             lineno=node.lineno,
-            status=(a_utils.get_parent(
+            status=(self.model.tree_index.get_parent(
                 node,
                 ast.Call,
                 denied=(ast.Expr,)) is not None
@@ -132,7 +132,7 @@ class FileStructureAnalyser(ast.NodeVisitor):
             "MR4",
             lib_name,
             lineno=node.lineno,
-            status=(a_utils.get_parent(node, cnf.CLS_FUNC) is None)
+            status=(self.model.tree_index.get_parent(node, cnf.CLS_FUNC) is None)
         )
 
    # ------------------------------------------------------------------------- #
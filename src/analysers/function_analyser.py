@@ -67,7 +67,7 @@ class FunctionAnalyser(ast.NodeVisitor):
         self.model.add_msg(
             "AR6-2",
             lineno=node.lineno,
-            status=(isinstance(node.parent_node, cnf.FUNC))
+            status=(isinstance(self.model.tree_index.get_parent_node(node), cnf.FUNC))
         )
 
     def _check_return_value(self, node, *args, **kwargs):
@@ -169,13 +169,13 @@ class FunctionAnalyser(ast.NodeVisitor):
         status = True
         # Col offset should detect every function definition which is indended
         if (node.col_offset > 0
-            or a_utils.get_parent(node, cnf.CLS_FUNC) is not None
+            or self.model.tree_index.get_parent(node, cnf.CLS_FUNC) is not None
         ):
 
             # This if check if there are allowed names for methods given.
             if (((not "*" in self.ALLOWED_FUNC and not name in self.ALLOWED_FUNC)
                     and (name in self.DENIED_FUNC or "*" in self.DENIED_FUNC))
-                or (a_utils.get_parent(node, ast.ClassDef) is None)
+                or (self.model.tree_index.get_parent(node, ast.ClassDef) is None)
             ):
                 # If function name is not in denied and not in allowed
                 # AND there is class as parent, then no error.
@@ -216,18 +216,17 @@ class FunctionAnalyser(ast.NodeVisitor):
             func()
             ...
 
-        If recursion is found, adds function to recursive_calls
-        dictonary and adds the function call node to FunctionTemplate
-        object in that dictionary.
+        If recursion is found, adds the function call node to list of
+        the function in recursive_calls dictonary. Calls are not stored
+        into FunctionTemplate objects, because they are part of the
+        read-only analysis context of the model.
         """
 
         try:
             # Recursive function calls
-            if func == a_utils.get_parent(node, cnf.FUNC).name:
-                self.recursive_calls.setdefault(
-                    func,
-                    self.model.get_function_dict().get(func)
-                ).add_recursive_call(node)
+            if(func == self.model.tree_index.get_parent(node, cnf.FUNC).name
+                    and func in self.model.get_function_dict()):
+                self.recursive_calls.setdefault(func, []).append(node)
         except AttributeError:
             # AttributeError occurs e.g. when function name is searched from
             # the global scope OR when get_parent no match and returns value
@@ -315,7 +314,7 @@ class FunctionAnalyser(ast.NodeVisitor):
         self.model.add_msg(
             "AR6-1",
             yield_type,
-            a_utils.get_parent(node, cnf.FUNC).name,
+            self.model.tree_index.get_parent(node, cnf.FUNC).name,
             lineno=node.lineno
         )
 
@@ -433,7 +432,7 @@ class FunctionAnalyser(ast.NodeVisitor):
             local_functions = self._exclude_imported_functions(func_dict)
             for func_name, func_obj in local_functions.items():
                 if (temp := self.recursive_calls.get(func_name)):
-                    for node in temp.get_recursive_calls():
+                    for node in temp:
                         self.model.add_msg(
                             "AR4",
                             lineno=node.lineno,
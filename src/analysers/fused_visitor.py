@@ -0,0 +1,113 @@
+"""Class file. Contains FusedVisitor class."""
+
+import ast
+
+class FusedVisitor():
+    """
+    Class to walk an Abstract Syntax Tree once and dispatch each node to
+    the visit_* methods of several ast.NodeVisitor objects. Result of
+    each visitor is the same as if visitor.visit(tree) would have been
+    called separately for each of them.
+
+    Visit methods are expected to follow the convention used in ASPA
+    analysers, i.e. node is first checked and self.generic_visit(node)
+    is called as the last statement. If visit method does not call
+    generic_visit, children of the node are not visited by that
+    visitor (e.g. BasicsAnalyser.visit_Return).
+
+    Errors are isolated per visitor. When visitor raises an exception,
+    the exception is stored to 'errors' and visitor is skipped for the
+    rest of the walk, while other visitors continue normally.
+    """
+
+   # ------------------------------------------------------------------------- #
+   # Initialisation
+    def __init__(self, visitors, on_switch=None):
+        """
+        Arguments:
+        1. visitors - ast.NodeVisitor objects in dispatch order - Iterable
+        2. on_switch - Optional callable which is called with index of
+           the visitor before its visit method is called. Used e.g. to
+           direct results of each analyser to its own result list.
+        """
+
+        self.visitors = tuple(visitors)
+        self.errors = {}
+        self._on_switch = on_switch
+        self._all = (1 << len(self.visitors)) - 1 # Bitmask of all visitors
+        self._failed = 0
+        self._descended = False
+        self._handlers = {}  # Node class -> tuple of (bit, index, method)
+
+   # ------------------------------------------------------------------------- #
+   # General methods
+    def _get_handlers(self, node_class):
+        """
+        Method to get visit methods registered for node_class. Methods
+        inherited from ast.NodeVisitor (e.g. visit_Constant) are
+        excluded because they only do generic visit.
+        """
+
+        try:
+            return self._handlers[node_class]
+        except KeyError:
+            pass
+
+        name = "visit_" + node_class.__name__
+        handlers = []
+        for i, visitor in enumerate(self.visitors):
+            method = getattr(type(visitor), name, None)
+            if method is not None and method is not getattr(ast.NodeVisitor, name, None):
+                handlers.append((1 << i, i, getattr(visitor, name)))
+        self._handlers[node_class] = handlers = tuple(handlers)
+        return handlers
+
+    def _mark_descend(self, node):
+        """Replaces visitors' generic_visit during the walk."""
+
+        self._descended = True
+
+    def _walk(self, node, active):
+        active &= ~self._failed
+        for bit, i, method in self._get_handlers(node.__class__):
+            if not active & bit:
+                continue
+
+            if self._on_switch:
+                self._on_switch(i)
+
+            self._descended = False
+            try:
+                method(node)
+            except Exception as e:
+                self.errors[i] = e
+                self._failed |= bit
+                self._descended = False
+
+            if not self._descended:
+                active &= ~bit
+
+        if active:
+            for child in ast.iter_child_nodes(node):
+                self._walk(child, active)
+
+    def visit(self, tree):
+        """
+        Method to walk the tree and dispatch nodes to all visitors.
+
+        Return: errors - dict where key is index of failed visitor and
+        value is the raised exception. Empty dict if all succeeded.
+        """
+
+        self.errors = {}
+        self._failed = 0
+        for visitor in self.visitors:
+            visitor.generic_visit = self._mark_descend
+
+        try:
+            self._walk(tree, self._all)
+        finally:
+            for visitor in self.visitors:
+                del visitor.generic_visit
+
+        return self.errors
@@ -0,0 +1,218 @@
+"""
+Class file. Contains Instrumentation and InstrumentedVisitor classes,
+which measure where analysis time is spent. Instrumentation is opt-in,
+see "instrumentation" setting, and when it is not in use these classes
+are not imported at all.
+"""
+
+import time
+
+import src.analysers.fused_visitor as fused_visitor
+
+WALK = "walk"  # Method name of the whole walk of a single visitor
+
+
+class Instrumentation():
+    """
+    Class to collect cumulative time, call counts and node counts of
+    analysis methods, and counts of results per violation ID.
+
+    Time of a method includes the time of methods it calls, e.g.
+    BasicsAnalyser.visit_Assign includes BasicsAnalyser.check_valid_name.
+    Visit methods are timed without their child nodes, because children
+    are walked by InstrumentedVisitor and not by the visit method. Time
+    of a visitor's walk (e.g. FunctionAnalyser.walk) is the sum of its
+    visit methods and node count of the walk is the number of nodes the
+    visitor was active in.
+    """
+
+    def __init__(self):
+        self.methods = {}     # Method name -> [calls, nodes, seconds]
+        self.violations = {}  # Violation ID -> [results, violations]
+
+   # ------------------------------------------------------------------------- #
+   # Measurements
+    def add_time(self, name, seconds, calls=1, nodes=0):
+        try:
+            entry = self.methods[name]
+        except KeyError:
+            entry = self.methods[name] = [0, 0, 0.0]
+        entry[0] += calls
+        entry[1] += nodes
+        entry[2] += seconds
+
+    def add_result(self, code, status):
+        """Method to count result added with Model.add_msg."""
+
+        try:
+            entry = self.violations[code]
+        except KeyError:
+            entry = self.violations[code] = [0, 0]
+        entry[0] += 1
+        if not status:
+            entry[1] += 1
+
+    def wrap(self, name, method):
+        """
+        Method to wrap callable such that its calls are measured.
+
+        Return: Wrapped callable.
+        """
+
+        add_time = self.add_time
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                add_time(name, time.perf_counter() - start)
+
+        timed.__wrapped__ = method
+        return timed
+
+    def wrap_checks(self, obj):
+        """
+        Method to replace check_* methods of the object with measured
+        ones. Methods are replaced on the object, i.e. class and other
+        objects of the class are not changed.
+        """
+
+        class_name = type(obj).__name__
+        for name in dir(type(obj)):
+            if name.startswith("check_") and callable(getattr(obj, name)):
+                setattr(obj, name, self.wrap(f"{class_name}.{name}", getattr(obj, name)))
+
+   # ------------------------------------------------------------------------- #
+   # Results
+    def get_data(self):
+        """
+        Return: Measurements sorted by time and violation IDs sorted by
+        count in JSON serialisable format - dict
+        """
+
+        return {
+            "methods": {
+                name: {"calls": calls, "nodes": nodes, "seconds": seconds}
+                for name, (calls, nodes, seconds) in sorted(
+                    self.methods.items(), key=lambda x: x[1][2], reverse=True
+                )
+            },
+            "violations": {
+                code: {"results": results, "violations": violations}
+                for code, (results, violations) in sorted(
+                    self.violations.items(), key=lambda x: (-x[1][0], x[0])
+                )
+            }
+        }
+
+    def merge(self, data):
+        """
+        Method to add measurements of get_data format, e.g. from worker
+        processes of parallel bulk analysis.
+        """
+
+        for name, entry in data["methods"].items():
+            self.add_time(name, entry["seconds"], calls=entry["calls"], nodes=entry["nodes"])
+
+        for code, entry in data["violations"].items():
+            counts = self.violations.setdefault(code, [0, 0])
+            counts[0] += entry["results"]
+            counts[1] += entry["violations"]
+
+    def format_report(self, data=None):
+        """
+        Method to format measurements as a text table.
+
+        Return: Report - str
+        """
+
+        if data is None:
+            data = self.get_data()
+
+        lines = [
+            "{:<40} {:>9} {:>10} {:>11} {:>9}".format(
+                "Method", "calls", "nodes", "total ms", "mean us"
+            )
+        ]
+        for name, entry in data["methods"].items():
+            lines.append("{:<40} {:>9} {:>10} {:>11.2f} {:>9.2f}".format(
+                name,
+                entry["calls"],
+                entry["nodes"],
+                entry["seconds"] * 1000,
+                entry["seconds"] * 1e6 / max(entry["calls"], 1)
+            ))
+
+        lines.append("")
+        lines.append("{:<40} {:>9} {:>10}".format("Violation ID", "results", "violations"))
+        for code, entry in data["violations"].items():
+            lines.append("{:<40} {:>9} {:>10}".format(
+                code, entry["results"], entry["violations"]
+            ))
+        return "\n".join(lines)
+
+    def clear(self):
+        self.methods.clear()
+        self.violations.clear()
+
+
+class InstrumentedVisitor(fused_visitor.FusedVisitor):
+    """
+    FusedVisitor which measures visit methods of each visitor and counts
+    nodes each visitor is active in, see Instrumentation.
+    """
+
+    def __init__(self, visitors, instrumentation, on_switch=None):
+        super().__init__(visitors, on_switch=on_switch)
+        self.instrumentation = instrumentation
+        self._names = tuple(type(visitor).__name__ for visitor in self.visitors)
+        self._nodes = [0] * len(self.visitors)
+        self._seconds = [0.0] * len(self.visitors)
+
+    def _get_handlers(self, node_class):
+        try:
+            return self._handlers[node_class]
+        except KeyError:
+            handlers = super()._get_handlers(node_class)
+
+        self._handlers[node_class] = handlers = tuple(
+            (bit, i, self._timed(i, method)) for bit, i, method in handlers
+        )
+        return handlers
+
+    def _timed(self, i, method):
+        """Return: Visit method which time is added to the visitor i."""
+
+        add_time = self.instrumentation.add_time
+        name = f"{self._names[i]}.{method.__name__}"
+        seconds = self._seconds
+
+        def timed(node):
+            start = time.perf_counter()
+            try:
+                return method(node)
+            finally:
+                elapsed = time.perf_counter() - start
+                seconds[i] += elapsed
+                add_time(name, elapsed, nodes=1)
+
+        return timed
+
+    def _walk(self, node, active):
+        active &= ~self._failed
+        for i in range(len(self._nodes)):
+            if active & (1 << i):
+                self._nodes[i] += 1
+        super()._walk(node, active)
+
+    def visit(self, tree):
+        try:
+            return super().visit(tree)
+        finally:
+            for i, name in enumerate(self._names):
+                self.instrumentation.add_time(
+                    f"{name}.{WALK}", self._seconds[i], nodes=self._nodes[i]
+                )
+                self._nodes[i] = 0
+                self._seconds[i] = 0.0
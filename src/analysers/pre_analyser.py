@@ -16,7 +16,7 @@ class PreAnalyser(ast.NodeVisitor):
 
    # ------------------------------------------------------------------------- #
    # Initialisation
-    def __init__(self, library=None):
+    def __init__(self, library=None, tree_index=None):
         self.import_dict = {}
         self.class_dict = {}
         self.function_dict = {}
@@ -24,8 +24,11 @@ class PreAnalyser(ast.NodeVisitor):
         self.constant_dict = {}
         self.call_dict = {}     # Global scope calls
         self.file_list = []     # Opened filehandles
+        # Function node -> {filehandle: (open linenos, close linenos)}
+        self.file_handle_dict = {}
         self.local_global_dict = {} # Local variables with same name as global
         self.library = library
+        self.tree_index = tree_index  # TreeIndex of the visited tree
 
         self._possible_constant_dict = {}
         self._list_mod_attrs = a_utils.LIST_MODIFICATION_ATTRIBUTES
@@ -56,9 +59,13 @@ class PreAnalyser(ast.NodeVisitor):
     def get_local_global_dict(self):
         return dict(self.local_global_dict)
 
+    def get_file_handle_dict(self):
+        return dict(self.file_handle_dict)
+
    # ------------------------------------------------------------------------- #
    # General methods
     def clear_all(self):
+        self.tree_index = None
         self.import_dict.clear()
         self.function_dict.clear()
         self.class_dict.clear()
@@ -68,6 +75,7 @@ class PreAnalyser(ast.NodeVisitor):
         self.call_dict.clear()
         self.file_list.clear()
         self.local_global_dict.clear()
+        self.file_handle_dict.clear()
         # del self.library
 
     def lock_constants(self):
@@ -123,7 +131,7 @@ class PreAnalyser(ast.NodeVisitor):
                     continue
 
                 elif (var.col_offset == 0
-                        or a_utils.get_parent(node, cnf.CLS_FUNC) is None):
+                        or self.tree_index.get_parent(node, cnf.CLS_FUNC) is None):
 
                     if name in self._possible_constant_dict:
                         self.global_dict[name] = self._possible_constant_dict.pop(name, None)
@@ -153,7 +161,7 @@ class PreAnalyser(ast.NodeVisitor):
                     self.global_dict[name] = self._possible_constant_dict.pop(name, None)
 
                 elif (name in self._possible_constant_dict
-                        and a_utils.get_parent(var, cnf.CLS_FUNC) is not None):
+                        and self.tree_index.get_parent(var, cnf.CLS_FUNC) is not None):
                     self.local_global_dict[name] = templates.NodeTemplate(
                         name,
                         var.lineno,
@@ -180,7 +188,7 @@ class PreAnalyser(ast.NodeVisitor):
                 and (name := node.target.value.id) in self._possible_constant_dict):
             self.global_dict[name] = self._possible_constant_dict.pop(name, None)
         elif ((node.col_offset == 0
-             or a_utils.get_parent(node, cnf.CLS_FUNC) is None)
+             or self.tree_index.get_parent(node, cnf.CLS_FUNC) is None)
                 and (name := node.target.id) in self._possible_constant_dict):
             # If we get here and variable used in AugAssign does not exist it
             # would be NameError when analysed code is executed.
@@ -189,7 +197,7 @@ class PreAnalyser(ast.NodeVisitor):
     def _store_class(self, node):
         imported = False
         key = node.name
-        parent = a_utils.get_parent(node, cnf.CLS_FUNC)
+        parent = self.tree_index.get_parent(node, cnf.CLS_FUNC)
         if(parent):
             key = f"{parent.name}.{key}"
         if(self.library):
@@ -208,7 +216,7 @@ class PreAnalyser(ast.NodeVisitor):
         pos_args = [i.arg for i in node.args.args]
         kw_args = [i.arg for i in node.args.kwonlyargs]
 
-        parent = a_utils.get_parent(node, cnf.CLS_FUNC)
+        parent = self.tree_index.get_parent(node, cnf.CLS_FUNC)
         if parent:
             key = f"{parent.name}.{key}"
         if self.library:
@@ -229,7 +237,7 @@ class PreAnalyser(ast.NodeVisitor):
     def _store_call(self, node):
         try:
             if (node.col_offset == 0
-                    or a_utils.get_parent(node, cnf.CLS_FUNC) is None):
+                    or self.tree_index.get_parent(node, cnf.CLS_FUNC) is None):
                 self.call_dict[node.func.id] = templates.CallTemplate(
                     node.func.id,
                     node.lineno,
@@ -250,18 +258,59 @@ class PreAnalyser(ast.NodeVisitor):
             pass
 
         try:
-            if node.func.id == "open" and isinstance(node.parent_node, ast.Assign):
+            if (node.func.id == "open"
+                    and isinstance(
+                        _parent := self.tree_index.get_parent_node(node), ast.Assign
+                    )):
                 # If Call is open call e.g. filehandle = open("filename")
-                for opened_file in node.parent_node.targets:
+                for opened_file in _parent.targets:
                     self.file_list.append(templates.FilehandleTemplate(
                         name=a_utils.get_attribute_name(opened_file),
                         lineno=opened_file.lineno,
-                        astree=node # or node.parent_node?
+                        astree=node # or parent node?
                     ))
         except AttributeError:
             pass
 
 
+    def _store_file_handle(self, node, filehandle, closed=False):
+        """
+        Method to store line number of opening or closing of filehandle
+        for the function containing the node and all its outer functions,
+        i.e. for each function the index contains all filehandles opened
+        and closed anywhere inside the function.
+        """
+
+        func = self.tree_index.get_parent(node, cnf.FUNC)
+        while func is not None:
+            handles = self.file_handle_dict.setdefault(func, {})
+            handles.setdefault(filehandle, ([], []))[closed].append(node.lineno)
+            func = self.tree_index.get_parent(func, cnf.FUNC)
+
+    def _store_file_open(self, node):
+        try:
+            if node.value.func.id == "open":
+                # When filehandle is assigned for open()-call value.
+                self._store_file_handle(
+                    node,
+                    a_utils.get_attribute_name(node.targets[0])
+                )
+        except AttributeError:
+            pass
+
+    def _store_file_close(self, node):
+        try:
+            if node.attr == "close":
+                # E.g. file_h.close, where filehandle is file_h
+                self._store_file_handle(
+                    node,
+                    a_utils.get_attribute_name(node, omit_n_last=1),
+                    closed=True
+                )
+        except AttributeError:
+            pass
+
+
    # ------------------------------------------------------------------------- #
    # Visits
     # Imports
@@ -277,6 +326,11 @@ class PreAnalyser(ast.NodeVisitor):
     # Assigns
     def visit_Assign(self, node):
         self._store_assign(node)
+        self._store_file_open(node)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        self._store_file_close(node)
         self.generic_visit(node)
 
     def visit_AugAssign(self, node):
@@ -15,6 +15,7 @@ class StructureDetector(ast.NodeVisitor):
 
     def __init__(self):
         self.structures = []
+        self.tree_index = None  # TreeIndex of the visited tree
         self._file_operations = {
             "read": "D05B001",
             "readline": "D05B002",
@@ -48,6 +49,7 @@ class StructureDetector(ast.NodeVisitor):
 
   # General methods
     def clear_all(self):
+        self.tree_index = None
         self.structures.clear()
 
     def _has_arguments(self, arguments):
@@ -204,7 +206,7 @@ class StructureDetector(ast.NodeVisitor):
         # element of parent-if's orelse list.
 
         try:
-            _parent = node.parent_node
+            _parent = self.tree_index.get_parent_node(node)
 
             if _parent.orelse[0] is node and node.col_offset == _parent.col_offset:
                 # Found an elif branch
@@ -322,7 +324,7 @@ class StructureDetector(ast.NodeVisitor):
             pass
         else:
             if _id == "open":
-                if (parent := a_utils.get_parent(node, ast.With)) is None:
+                if (parent := self.tree_index.get_parent(node, ast.With)) is None:
                     self.structures.append(
                         templates.StructureTemplate(
                             identifier="D05A001",
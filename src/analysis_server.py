@@ -0,0 +1,346 @@
+"""
+Module containing long-running analysis server for the web interface.
+Source code is analysed in memory by a pool of worker processes, each
+of which has its own warm Model, i.e. analysers are imported and
+created only once when the server starts.
+"""
+
+import collections
+import concurrent.futures
+import http.server
+import json
+import multiprocessing
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+
+import src.analysers.analysis_lib as analysis  # Model
+import src.config.config as cnf
+import src.utils_lib as utils
+
+# Constants
+WARM_UP_CONTENT = (
+    "def main():\n"
+    "    print('ASPA')\n"
+    "    return None\n"
+    "\n"
+    "main()\n"
+)
+LATENCY_SAMPLES = 1000  # Number of latest requests used in statistics
+
+
+_WARM_UP_BARRIER = None  # Barrier of the warm up of the current worker process
+
+
+class ServerBusy(Exception):
+    """Raised when all workers are busy and request queue is full."""
+
+
+def _init_server_worker(settings, barrier, pid_queue):
+    """
+    Initialiser of analysis server worker process. Process ID is sent
+    to pid_queue, so that the server can terminate the worker.
+    """
+
+    global _WARM_UP_BARRIER
+    _WARM_UP_BARRIER = barrier
+    pid_queue.put(os.getpid())
+    analysis._init_worker(settings)
+
+
+def _warm_up_worker(timeout):
+    """
+    Function to warm up worker by analysing small program with all
+    analysers. Worker waits until all workers have analysed it, i.e.
+    each warm up job is analysed in a different worker.
+
+    Return: Process ID of the worker.
+    """
+
+    selections = {key: 1 for key in cnf.CHECKBOX_OPTIONS}
+    analysis._analyse_source(selections, WARM_UP_CONTENT, "warm_up.py")
+    _WARM_UP_BARRIER.wait(timeout)
+    return os.getpid()
+
+
+def _terminate_processes(pid_queue):
+    """
+    Function to terminate worker processes of a recycled pool. Process
+    IDs are the ones which the workers have sent to pid_queue.
+    """
+
+    while not pid_queue.empty():
+        try:
+            os.kill(pid_queue.get(), signal.SIGTERM)
+        except OSError:  # Worker has already exited
+            pass
+    pid_queue.close()
+
+
+class AnalysisServer():
+    """
+    Class for pool of warm Model objects. Each Model is in own worker
+    process because Model and analysers store per file state, which
+    is not safe to share between concurrent requests.
+
+    Back-pressure: at most workers + max_pending requests are accepted
+    at the same time, after which analyse raises ServerBusy. Request
+    holds its slot until the worker has finished it, also after the
+    request has timed out. When a request times out, new requests are
+    given to a new pool and workers of the old pool are terminated
+    after they have had the timeout to finish their other requests.
+    """
+
+    def __init__(self, settings, workers=None, max_pending=None):
+        self.settings = settings
+        if workers is None:
+            workers = settings.get("server_workers", 0)
+        if max_pending is None:
+            max_pending = settings.get("server_max_pending", 32)
+        if not workers or workers < 0:
+            workers = os.cpu_count() or 1
+
+        self.workers = workers
+        self.timeout = settings.get("server_timeout", 30)
+        self._slots = threading.BoundedSemaphore(workers + max(max_pending, 0))
+        self._lock = threading.Lock()
+        self._executor, self._pid_queue = self._create_executor()
+
+        # Statistics
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._requests = 0
+        self._rejected = 0
+        self._failed = 0
+        self._recycled = 0
+
+    def _create_executor(self):
+        """Return: Pool and queue of process IDs of its workers - tuple"""
+
+        pid_queue = multiprocessing.SimpleQueue()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_server_worker,
+            initargs=(self.settings, multiprocessing.Barrier(self.workers), pid_queue)
+        )
+        return executor, pid_queue
+
+    def start(self):
+        """
+        Method to start and warm up all worker processes before the
+        first request. Each worker analyses a small program, and the
+        warm up jobs wait for each other so that every worker has run
+        its initialiser and analysers.
+        """
+
+        futures = [
+            self._executor.submit(_warm_up_worker, self.timeout)
+            for _ in range(self.workers)
+        ]
+        for future in futures:
+            future.result()
+        return None
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._pid_queue.close()
+        return None
+
+    def _release_slot(self, future):
+        self._slots.release()
+
+    def _recycle(self, executor):
+        """
+        Method to replace the pool which has a stuck worker. Old pool
+        does not get new requests and its workers are terminated after
+        the timeout, which releases the slots of the stuck requests.
+        """
+
+        with self._lock:
+            if executor is not self._executor:  # Already recycled
+                return None
+            pid_queue = self._pid_queue
+            self._executor, self._pid_queue = self._create_executor()
+            self._recycled += 1
+
+        executor.shutdown(wait=False)
+        timer = threading.Timer(self.timeout, _terminate_processes, args=(pid_queue,))
+        timer.daemon = True
+        timer.start()
+        return None
+
+    def analyse(self, content, selections, filename="main.py"):
+        """
+        Method to analyse source code.
+
+        Arguments:
+        1. content - Analysed source code - str
+        2. selections - Analysis selections, key is checkbox option and
+           value is 1 or 0 - dict
+        3. filename - Name shown in messages - str
+
+        Return: dict with keys
+        1. results - Formatted results, see Model.format_violations_web
+        2. latency_ms - Time from request to result
+        3. analysis_ms - Time of the analysis in worker
+        """
+
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ServerBusy()
+
+        try:
+            with self._lock:
+                executor = self._executor
+            future = executor.submit(
+                analysis._analyse_source, selections, content, filename
+            )
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._failed += 1
+            raise
+
+        # Slot is released when the worker has finished, not on timeout
+        future.add_done_callback(self._release_slot)
+        try:
+            results, analysis_time = future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self._failed += 1
+            self._recycle(executor)
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._requests += 1
+            self._latencies.append(latency)
+
+        return {
+            "results": results,
+            "latency_ms": round(latency * 1000, 3),
+            "analysis_ms": round(analysis_time * 1000, 3)
+        }
+
+    def get_statistics(self):
+        """
+        Return: Request counts and latency statistics in milliseconds of
+        the latest requests - dict
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "requests": self._requests,
+                "rejected": self._rejected,
+                "failed": self._failed,
+                "recycled": self._recycled
+            }
+
+        if latencies:
+            stats["latency_ms"] = {
+                "mean": round(statistics.fmean(latencies) * 1000, 3),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3)
+            }
+        return stats
+
+
+########################################################################
+# HTTP interface
+
+class AnalysisRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    HTTP request handler:
+    1. POST /analyse with JSON body {"content": str, "selections": dict,
+       "filename": str}. Selections and filename are optional, if
+       selections are not given all analysers are selected.
+    2. GET /statistics returns AnalysisServer.get_statistics.
+
+    Status 503 is returned when server is busy.
+    """
+
+    analysis_server = None  # Set in serve
+
+    def _send_json(self, status, data):
+        content = json.dumps(data, ensure_ascii=False).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path == "/statistics":
+            self._send_json(200, self.analysis_server.get_statistics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/analyse":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("UTF-8"))
+            content = request["content"]
+            selected = request.get("selections")
+            if selected is None:
+                selected = dict.fromkeys(cnf.CHECKBOX_OPTIONS, 1)
+            selections = {
+                key: int(bool(selected.get(key, 0))) for key in cnf.CHECKBOX_OPTIONS
+            }
+            filename = str(request.get("filename", "main.py"))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._send_json(400, {"error": "invalid request"})
+            return
+
+        try:
+            response = self.analysis_server.analyse(content, selections, filename)
+        except ServerBusy:
+            self._send_json(503, {"error": "server busy"})
+        except concurrent.futures.TimeoutError:
+            self._send_json(504, {"error": "analysis timeout"})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+        else:
+            self._send_json(200, response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(settings):
+    """Function to run analysis server until interrupted."""
+
+    analysis_server = AnalysisServer(settings)
+    analysis_server.start()
+    AnalysisRequestHandler.analysis_server = analysis_server
+
+    address = (settings.get("server_host", "127.0.0.1"), settings.get("server_port", 8000))
+    httpd = http.server.ThreadingHTTPServer(address, AnalysisRequestHandler)
+    print(f"{cnf.TOOL_NAME_SHORT} analysis server at http://{address[0]}:{address[1]}"
+          f" with {analysis_server.workers} workers.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        analysis_server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve(utils.init_settings()))
@@ -1,8 +1,12 @@
 import pathlib
 import json
 import copy
+import os
 import re
+import tarfile
+import zipfile
 from collections import Counter
+from collections.abc import Mapping
 
 import src.config.templates as templates
 
@@ -68,6 +72,19 @@ class Student:
     def add_assignment(self, assignment_id, assignment_obj):
         self.assignments[assignment_id] = assignment_obj
 
+    def update_results(self, analysed_student):
+        """
+        Method to add violations and feedback from analysed copy of this
+        student, e.g. copy analysed in a worker process, into the
+        assignments of this student.
+        """
+
+        for assignment_id, analysed_obj in analysed_student.get_assignments().items():
+            assignment_obj = self.assignments[assignment_id]
+            assignment_obj.update_violations(analysed_obj.get_violations())
+            if (feedback := analysed_obj.get_feedback()):
+                assignment_obj.append_feedback(feedback)
+
 class Assignment:
     def __init__(self, assignment_name, filepath):
         self._assignment_name = assignment_name
@@ -102,6 +119,12 @@ class Assignment:
     def get_filepaths(self):
         return self._filepaths
 
+    def clear_results(self):
+        """Method to release violations and feedback after writing."""
+
+        self.violations = Counter()
+        self.feedback = None
+
     def add_filepath(self, filepath):
         self._filepaths.append(filepath)
 
@@ -115,6 +138,11 @@ def parse_metadata(metadata_path, student_dict):
     except OSError as err:
         print(f"Error while opening a file at path '{metadata_path}'\n{err}")
 
+    return add_student(data, student_dict)
+
+def add_student(data, student_dict):
+    """Function to add student from parsed metadata to student_dict."""
+
     user_info = data[USER_FIELD]
     student_dict[user_info[STUDENT_NUMBER_FIELD]] = Student(
         user_info[STUDENT_NUMBER_FIELD],
@@ -124,8 +152,33 @@ def parse_metadata(metadata_path, student_dict):
 
     return user_info[STUDENT_NUMBER_FIELD]
 
+def get_assignment_name(path, assignment_patt, lib_patt):
+    """Function to get assignment name from the name of the file."""
+
+    # Normally named weekly assignments
+    if (match := assignment_patt.match(path.stem)):
+        assignment_name = match.group("assignment_name")
+
+    # Normally named course project's libarary file
+    elif (LIB_FILE_NAME in path.stem
+        and (match := lib_patt.match(path.stem))):
+
+        assignment_name = "".join([match.group("before"), match.group("after")])
+
+    else:
+        assignment_name = path.stem
+
+    return assignment_name
+
 def parse_students_and_filepaths(root: pathlib.Path) -> dict:
-    """Expects each student being in different directory starting from root."""
+    """
+    Expects each student being in different directory starting from
+    root. Root can also be zip or tar archive, see
+    parse_students_from_archive.
+    """
+
+    if root.is_file() and is_archive(root):
+        return parse_students_from_archive(root)
 
     if not root.is_dir():
         print(f"Invalid filepath for bulkanalysis '{root}' is not a directory. Give path to root directory.")
@@ -149,27 +202,203 @@ def parse_students_and_filepaths(root: pathlib.Path) -> dict:
         # Get python file paths
         temp_assignment_dict = {}
         for path in student_dir.glob("**/*.py"):
-            # Normally named weekly assignments
-            if (match := assignment_patt.match(path.stem)):
-                assignment_name = match.group("assignment_name")
-                # print("0", assignment_name)
+            assignment_name = get_assignment_name(path, assignment_patt, lib_patt)
+
+            filepath_template_obj = templates.FilepathTemplate(
+                path=path,
+                student=student_id,
+                course=root.stem  # Name of root directory
+            )
 
-            # Normally named course project's libarary file
-            elif (LIB_FILE_NAME in path.stem
-                and (match := lib_patt.match(path.stem))):
+            if (temp := temp_assignment_dict.setdefault(assignment_name)):
+                temp.add_filepath(filepath_template_obj)
+            else:
+                temp_assignment_dict[assignment_name] = Assignment(
+                    assignment_name,
+                    filepath_template_obj
+                )
 
-                assignment_name = "".join([match.group("before"), match.group("after")])
-                # print("1", assignment_name)
+        # Add assignments to students
+        for assignment_name, assignment_obj in temp_assignment_dict.items():
+            student_dict[student_id].add_assignment(assignment_name, assignment_obj)
 
+    return student_dict
+
+
+# ---------------------------------------------------------------------------- #
+# Archives
+
+_ARCHIVES = {}  # Opened archives of this process, archive path -> ArchiveReader
+
+def is_archive(path):
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+class ArchiveReader:
+    """
+    Class to read files from zip or tar archive without extracting it.
+    Zip archives are read with random access by using the central
+    directory as an index of the files. Tar archives do not have an
+    index, therefore members are streamed once and only Python files
+    and metadata files are kept in memory.
+    """
+
+    def __init__(self, archive_path):
+        self.path = pathlib.Path(archive_path)
+        self.pid = os.getpid()  # Forked processes can't share file offset
+        self._zip = None
+        self._contents = {}     # Member name -> bytes, used with tar
+        self._directories = {}  # Member directory -> {filename: member name}
+
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            names = [i.filename for i in self._zip.infolist() if not i.is_dir()]
+        else:
+            with tarfile.open(self.path, mode="r|*") as tar:
+                for member in tar:
+                    if member.isfile() and self._is_read(member.name):
+                        self._contents[member.name] = tar.extractfile(member).read()
+            names = list(self._contents.keys())
+
+        self.names = [name for name in names if self._is_read(name)]
+        for name in self.names:
+            member = pathlib.PurePosixPath(name)
+            self._directories.setdefault(member.parent, {})[member.name] = name
+
+    def _is_read(self, name):
+        return name.endswith(".py") or pathlib.PurePosixPath(name).name == METADATA_FILENAME
+
+    def read_text(self, name):
+        """
+        Method to read member as UTF-8 text. Newlines are converted
+        similarly as when file is read in text mode.
+
+        Return: Content as string or None if member can't be read.
+        """
+
+        try:
+            if self._zip is not None:
+                data = self._zip.read(name)
             else:
-                assignment_name = path.stem
-                # print("2", assignment_name)
+                data = self._contents[name]
+            return data.decode("UTF-8").replace("\r\n", "\n").replace("\r", "\n")
+        except (KeyError, OSError, UnicodeDecodeError, zipfile.BadZipFile):
+            print(f"Error while reading '{name}' from archive '{self.path}'.")
+            return None
+
+    def read_modules(self, member_path):
+        """
+        Method to read Python file and get other Python files in the
+        same directory of the archive.
+
+        Return: Tuple of (content, modules), where modules is mapping
+        with filename as key and content as value, see
+        Model.analyse_source. Modules are read only when accessed.
+        """
+
+        member_path = pathlib.PurePosixPath(member_path)
+        modules = ArchiveModules(self, self._directories.get(member_path.parent, {}))
+        return modules.get(member_path.name), modules
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        self._contents.clear()
+
+class ArchiveModules(Mapping):
+    """
+    Read-only mapping of Python files in one directory of the archive.
+    Content of a file is read when it is accessed first time.
+    """
+
+    def __init__(self, reader, members):
+        self._reader = reader
+        self._members = members  # Filename -> member name
+        self._contents = {}
+
+    def __getitem__(self, filename):
+        try:
+            return self._contents[filename]
+        except KeyError:
+            content = self._contents[filename] = self._reader.read_text(self._members[filename])
+            return content
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __len__(self):
+        return len(self._members)
+
+def open_archive(archive_path):
+    """
+    Function to get ArchiveReader of the archive. Archive is opened only
+    once per process and kept open until close_archives is called.
+    """
+
+    archive_path = pathlib.Path(archive_path)
+    reader = _ARCHIVES.get(archive_path)
+    if reader is None or reader.pid != os.getpid():
+        reader = _ARCHIVES[archive_path] = ArchiveReader(archive_path)
+    return reader
+
+def close_archives():
+    for reader in _ARCHIVES.values():
+        if reader.pid == os.getpid():
+            reader.close()
+    _ARCHIVES.clear()
+
+def parse_students_from_archive(archive_path: pathlib.Path) -> dict:
+    """
+    Function to parse students and filepaths from zip or tar archive in
+    the same way as parse_students_and_filepaths parses directory. If
+    all files are in one top-level directory, it is the root directory,
+    otherwise archive itself is the root.
+    """
+
+    reader = open_archive(archive_path)
+    members = [pathlib.PurePosixPath(name) for name in reader.names]
+
+    course = archive_path.name.split(".")[0]
+    prefix = 0
+    if len({member.parts[0] for member in members}) == 1:
+        course = members[0].parts[0]
+        prefix = 1
+
+    # Group members by student directories in archive order
+    student_members = {}
+    for member in members:
+        if len(member.parts) > prefix + 1:
+            student_members.setdefault(member.parts[prefix], []).append(member)
+
+    assignment_patt = re.compile(ASSIGNMENT_PATT)
+    lib_patt = re.compile(LIB_PATT)
+    student_dict = {}
+    for student_dir, paths in student_members.items():
+        # Find metadata only once
+        for path in paths:
+            if path.name == METADATA_FILENAME:
+                metadata_path = path
+                break
+        else:
+            print(f"No metadata file '{METADATA_FILENAME}' found in directory tree starting from '{student_dir}' in '{archive_path}'.")
+            continue
+
+        student_id = add_student(
+            json.loads(reader.read_text(str(metadata_path))),
+            student_dict
+        )
 
+        # Get python file paths
+        temp_assignment_dict = {}
+        for path in paths:
+            if path.suffix != ".py":
+                continue
+            assignment_name = get_assignment_name(path, assignment_patt, lib_patt)
 
             filepath_template_obj = templates.FilepathTemplate(
                 path=path,
                 student=student_id,
-                course=root.stem  # Name of root directory
+                course=course,
+                archive=archive_path
             )
 
             if (temp := temp_assignment_dict.setdefault(assignment_name)):
@@ -190,27 +419,142 @@ def parse_students_and_filepaths(root: pathlib.Path) -> dict:
 # ---------------------------------------------------------------------------- #
 # Writing
 
+def student_to_dict(student_obj):
+    """
+    Function to create result dictionary of a single student.
+
+    Return: Dictionary with student's metadata and violation counters
+    of each assignment.
+    """
+
+    student_data = {
+        "name": student_obj.name,
+        "codegrade_id": student_obj.codegrade_id,
+        "student_number": student_obj.student_number,
+        "assignments": {}
+    }
+
+    # Loop assignments and add violation counters to assignment
+    for assignment_id, assignment_obj in student_obj.get_assignments().items():
+        violations_dict = assignment_obj.get_violations(return_copy=True)
+        student_data["assignments"].setdefault(assignment_id, Counter()).update(violations_dict)
+
+    return student_data
+
+
 def write_results(json_path, student_dict, root_dir_name):
 
     # Loop students and add them metadata and init assignments dict
     temp = {}
     for student, student_obj in student_dict.items():
-        student_data = temp.setdefault(
-            student, {
-                # If new student add name, id, studentnumber
-                "name": student_obj.name,
-                "codegrade_id": student_obj.codegrade_id,
-                "student_number": student_obj.student_number,
-                "assignments": {}
+        temp.setdefault(student, student_to_dict(student_obj))
+
+    to_json_data = {root_dir_name: temp}
+    write_json(json_path, to_json_data)
+
+
+class StreamingResultWriter:
+    """
+    Class to write bulk analysis results student by student into JSON
+    Lines file. Each line is flushed as soon as all assignments of the
+    student are analysed, therefore interrupted run loses at most the
+    students under analysis. Complete result file in same format as
+    write_results creates is made with merge_results.
+
+    Line format:
+    {"student": ID, "course": course, "data": {...}, "feedback": {...}}
+    """
+
+    def __init__(self, jsonl_path, resume=False):
+        self.path = pathlib.Path(jsonl_path)
+        self.completed = set()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.is_file():
+            # Partially written last line of interrupted run is removed
+            valid_size = 0
+            for line in self.path.read_bytes().splitlines(keepends=True):
+                try:
+                    if not line.endswith(b"\n"):
+                        break
+                    self.completed.add(json.loads(line)["student"])
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError):
+                    break
+                valid_size += len(line)
+
+            with open(self.path, mode="r+b") as fhandle:
+                fhandle.truncate(valid_size)
+            self._fhandle = open(self.path, mode="a", encoding="UTF-8")
+        else:
+            self._fhandle = open(self.path, mode="w", encoding="UTF-8")
+
+    def is_completed(self, student):
+        return student in self.completed
+
+    def write_student(self, student, student_obj, course_id):
+        """
+        Method to write results of single student and release them from
+        the student object.
+        """
+
+        record = {
+            "student": student,
+            "course": course_id,
+            "data": student_to_dict(student_obj),
+            "feedback": {
+                assignment_id: assignment_obj.get_feedback()
+                for assignment_id, assignment_obj in student_obj.get_assignments().items()
             }
-        )
+        }
+        self._fhandle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fhandle.flush()
+        os.fsync(self._fhandle.fileno())
+        self.completed.add(student)
+
+        for assignment_obj in student_obj.get_assignments().values():
+            assignment_obj.clear_results()
+        return None
+
+    def close(self):
+        self._fhandle.close()
+
+
+def read_result_lines(jsonl_path):
+    """
+    Generator to read results written by StreamingResultWriter. Lines
+    which are not valid JSON, e.g. last line of interrupted run, are
+    skipped.
+
+    Yield: Tuples of (student, record)
+    """
+
+    with open(jsonl_path, mode="r", encoding="UTF-8") as fhandle:
+        for line in fhandle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield record["student"], record
+
+
+def merge_results(jsonl_path, json_path, order=None):
+    """
+    Function to merge JSON Lines results into single JSON file in the
+    same format as write_results creates. If order (iterable of student
+    IDs) is given, students are written in that order.
+    """
+
+    course_id = None
+    temp = {}
+    for student, record in read_result_lines(jsonl_path):
+        if not course_id:
+            course_id = record["course"]
+        temp[student] = record["data"]
 
-        # Loop assignments and add violation counters to assignment
-        for assignment_id, assignment_obj in student_obj.get_assignments().items():
-            violations_dict = assignment_obj.get_violations(return_copy=True)
-            student_data["assignments"].setdefault(assignment_id, Counter()).update(violations_dict)
+    if order is not None:
+        temp = {student: temp[student] for student in order if student in temp}
 
-    to_json_data = {root_dir_name: temp}
+    to_json_data = {course_id: temp}
     write_json(json_path, to_json_data)
 
 
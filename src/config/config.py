@@ -17,7 +17,10 @@ DEFAULT_SETTINGS = {
     "result_file": "results.txt",
     "yaml_result_file": "ASPA_tulokset.yaml",
     "statistics_file": "statistics.json",
+    "statistics_csv_file": "statistics.csv",
+    "statistics_summary_file": "statistics_summary.json",
     "bulk_result_file": "bulk_result.json",
+    "bulk_stream_file": "bulk_result.jsonl",
     "settings_file": "settings.json",
     "BKT_file": "BKTA.csv",
     "structure_file": "structures.csv",
@@ -34,7 +37,25 @@ DEFAULT_SETTINGS = {
     "BKT_decimal_places": 3,
     "BKT_decimal_separator": ",",
     "BKT_cell_separator": ";",
-    "structure_cell_separator": ";"
+    "BKT_fit_parameters": False, # Fit guess, slip, transit and L0 of each skill from the students
+    "BKT_use_fitted_parameters": False, # Use parameters fitted in a previous BKT analysis
+    "BKT_parameters_file": "BKT_parameters.json",
+    "BKT_incremental": False, # Continue BKT values of previous runs and analyse only new files
+    "BKT_state_file": "BKT_state.json",
+    "structure_cell_separator": ";",
+    "statistics_cell_separator": ";",
+    "bulk_workers": 1, # Worker processes in bulk analysis, 0 means one per CPU core
+    "bulk_resume": False, # Continue interrupted bulk analysis from last written student
+    "server_host": "127.0.0.1",
+    "server_port": 8000,
+    "server_workers": 0, # Worker processes in analysis server, 0 means one per CPU core
+    "server_max_pending": 32, # Requests waiting for a worker before new ones are rejected
+    "server_timeout": 30, # Seconds to wait for analysis result
+    "result_cache": False, # Store results of unchanged files between runs
+    "result_cache_file": "result_cache.sqlite3",
+    "result_cache_max_mb": 100,
+    "instrumentation": False, # Measure time spent in each analyser method and rule
+    "instrumentation_file": "instrumentation.json"
 }
 
 # -----------------------------------------------------------------------------#
@@ -180,6 +201,7 @@ GUI = {
         "results": "Näytä tulokset",
         "BKTA": "Tee BKT-analyysi",
         "bulk_analysis": "Tee bulkki-analyysi",
+        "clear_cache": "Tyhjennä tulosvälimuisti",
         "help": "Käyttöohje",
         "helpmenu": "Ohjeet",
         "select_analysis_title": "Valitse tarkistukset",
@@ -195,7 +217,13 @@ GUI = {
         "analysis_result": "Analyysin tulokset",
         "back": "Takaisin",
         "settings": "Asetukset",
-        "not_ready_note": "Työn alla"
+        "not_ready_note": "Työn alla",
+        "cancel": "Peruuta",
+        "cancelling": "Peruutetaan...",
+        "progress": "{done}/{total} tiedostoa, aikaa jäljellä {eta}",
+        "previous_page": "Edellinen",
+        "next_page": "Seuraava",
+        "result_lines": "Rivit {first}-{last}/{total}"
     },
     "ENG": {
         "exit": "Exit",
@@ -203,6 +231,7 @@ GUI = {
         "results": "Show results",
         "BKTA": "Execute BKT analysis",
         "bulk_analysis": "Execute bulk analysis",
+        "clear_cache": "Clear result cache",
         "help": "User guide",
         "helpmenu": "Help",
         "select_analysis_title": "Select analyses",
@@ -218,13 +247,20 @@ GUI = {
         "analysis_result": "Analysis results",
         "back": "Back",
         "settings": "Settings",
-        "not_ready_note": "Under construction"
+        "not_ready_note": "Under construction",
+        "cancel": "Cancel",
+        "cancelling": "Cancelling...",
+        "progress": "{done}/{total} files, time left {eta}",
+        "previous_page": "Previous",
+        "next_page": "Next",
+        "result_lines": "Lines {first}-{last} of {total}"
     }
 }
 
 
 TOOL_NAME = "ASPA - Abstrakti SyntaksiPuu Analysaattori"
 TOOL_NAME_SHORT = "ASPA"
+TOOL_VERSION = "0.2.11" # Same as __version__ in ASPA_main.py
 BG_COLOR = None #"#bababa" #None # "#383838"
 FRAME_COLOR = None #"#ffcfcf"
 PAD = 5
@@ -241,6 +277,8 @@ HIGHLIGHT = {
     WARNING: "#ff7700", #"orange",
     ERROR: "#dd0000" #"red"
 }
+RESULT_PAGE_LINES = 2000   # Result lines shown at a time in result page
+RESULT_INSERT_CHUNK = 500  # Result lines inserted into textbox with single insert
 
 # THERE ARE ALSO predefined fonts like these
     # TkDefaultFont The default for all GUI items not otherwise specified.
@@ -282,6 +320,8 @@ TITLE_TO_EXAMPLES = {
 
 # -----------------------------------------------------------------------------#
 # (Default) Violation messages
+MSG_CACHE_SIZE = 4096    # Number of latest rendered messages kept in memory
+TITLE_CACHE_SIZE = 256   # Number of rendered category titles kept in memory
 MSG = {
     "ENG": {
         "default": ("Error occured!", ERROR),
@@ -631,12 +671,14 @@ CLI_ERROR = {
         "NO_FILES": "Please select files to be analysed.",
         "NO_SELECTIONS": "Please select analysis to be executed.",
         # Technically error below should never occur if FIN is default
-        "NO_LANGUAGE": "Please define language in settings. By default FIN is used."
+        "NO_LANGUAGE": "Please define language in settings. By default FIN is used.",
+        "ANALYSIS_ERROR": "Analysis failed: {}"
     },
     "FIN": {
         "NO_FILES": "Ole hyvä ja valitse ensin analysoitavat tiedostot.",
         "NO_SELECTIONS": "Ole hyvä ja valitse ensin suoritettavat analyysit.",
-        "NO_LANGUAGE": "Ole hyvä ja määrittele käytettävä kieli asetuksista. Oletusasetus on FIN."
+        "NO_LANGUAGE": "Ole hyvä ja määrittele käytettävä kieli asetuksista. Oletusasetus on FIN.",
+        "ANALYSIS_ERROR": "Analyysi epäonnistui: {}"
     }
 }
 
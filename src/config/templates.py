@@ -6,6 +6,10 @@ like objects.
 
  # TODO Move ViolationTemplate somewhere else because it is not a Template
  # anymore but rather a real class. Same time utils are not needed anymore.
+import array
+import threading
+import types
+
 from .. import utils_lib as utils
 
 class NodeTemplate():
@@ -149,16 +153,247 @@ class ViolationTemplate():
         return self._msg_tuple
 
 
+class ResultBuffer():
+    """
+    Class to store analysis results in columns instead of creating a
+    ViolationTemplate for each result. Violation IDs are stored as
+    interned integers, and line numbers, statuses and message arguments
+    in their own columns. Messages are created only when violations are
+    formatted, see get_msg.
+
+    Results are added to the buffer and grouped into categories (e.g.
+    results of one analyser) with save_category. Passed results, i.e.
+    status True, can be only counted with add_passed when they are not
+    needed, e.g. formatting and statistics use only violations.
+
+    Integers of the violation IDs are specific to the process, therefore
+    only violation IDs are given out of the buffer. New IDs are interned
+    under a lock, because buffers are used also in threads, e.g. GUI
+    analysis worker.
+    """
+
+    _ids = {}    # Violation ID -> interned integer
+    _codes = []  # Interned integer -> violation ID
+    _intern_lock = threading.Lock()
+
+    def __init__(self):
+        self.codes = array.array("i")
+        self.args = []
+        self.linenos = array.array("i")
+        self.statuses = bytearray()
+        self.passed = {}      # Violation ID -> count of only counted passed results
+        self.categories = []  # Tuples of (title, start, end, passed)
+
+    @classmethod
+    def _intern(cls, code):
+        try:
+            return cls._ids[code]
+        except KeyError:
+            with cls._intern_lock:
+                i = cls._ids.get(code)
+                if i is None:
+                    # Code is added before its integer is given out
+                    i = len(cls._codes)
+                    cls._codes.append(code)
+                    cls._ids[code] = i
+            return i
+
+   # ------------------------------------------------------------------------- #
+   # Adding results
+    def add(self, code, args, lineno, status):
+        self.codes.append(self._intern(code))
+        self.args.append(args)
+        self.linenos.append(lineno)
+        self.statuses.append(1 if status else 0)
+
+    def add_passed(self, code):
+        """Method to count passed result without storing it."""
+
+        self.passed[code] = self.passed.get(code, 0) + 1
+
+    def save_category(self, title, buffer=None):
+        """
+        Method to save results added after the previous category as a
+        new category. If buffer is given, its results are moved to the
+        category and buffer is cleared.
+
+        Arguments:
+        1. title - Title key of the category, e.g. checkbox option - str
+        2. buffer - Results of the category - ResultBuffer
+        """
+
+        if buffer is not None:
+            self.codes.extend(buffer.codes)
+            self.args.extend(buffer.args)
+            self.linenos.extend(buffer.linenos)
+            self.statuses.extend(buffer.statuses)
+            for code, count in buffer.passed.items():
+                self.passed[code] = self.passed.get(code, 0) + count
+            buffer.clear()
+
+        start = self.categories[-1][2] if self.categories else 0
+        self.categories.append((title, start, len(self.codes), self.passed))
+        self.passed = {}
+
+    def extend(self, other):
+        """Method to append categories of other buffer."""
+
+        offset = len(self.codes)
+        self.codes.extend(other.codes)
+        self.args.extend(other.args)
+        self.linenos.extend(other.linenos)
+        self.statuses.extend(other.statuses)
+        self.categories.extend(
+            (title, start + offset, end + offset, dict(passed))
+            for title, start, end, passed in other.categories
+        )
+
+    def copy(self):
+        buffer = ResultBuffer()
+        buffer.extend(self)
+        return buffer
+
+    def clear(self):
+        del self.codes[:]
+        self.args.clear()
+        del self.linenos[:]
+        self.statuses.clear()
+        self.passed = {}
+        self.categories.clear()
+
+   # ------------------------------------------------------------------------- #
+   # Reading results
+    def get_titles(self):
+        return [category[0] for category in self.categories]
+
+    def get_msg(self, i, lang):
+        """
+        Return: Message tuple of the result i, see utils.create_msg.
+        """
+
+        return utils.create_msg(
+            self._codes[self.codes[i]],
+            *self.args[i],
+            lineno=self.linenos[i],
+            lang=lang
+        )
+
+    def iter_violations(self):
+        """
+        Yield: Tuple of (title, indexes of the violations) for each
+        category.
+        """
+
+        statuses = self.statuses
+        for title, start, end, _ in self.categories:
+            yield title, [i for i in range(start, end) if not statuses[i]]
+
+    def iter_results(self):
+        """Yield: Tuple of (violation ID, status) of each stored result."""
+
+        codes = self._codes
+        for code, status in zip(self.codes, self.statuses):
+            yield codes[code], bool(status)
+
+    def count_violations(self):
+        """
+        Return: Dict where key is violation ID and value is number of
+        violations in the order of first occurrence.
+        """
+
+        counts = {}
+        codes = self._codes
+        for code, status in zip(self.codes, self.statuses):
+            if not status:
+                code = codes[code]
+                counts[code] = counts.get(code, 0) + 1
+        return counts
+
+    _JSON_TYPES = (str, int, float, bool, type(None))
+
+    @classmethod
+    def _encode_arg(cls, value):
+        """
+        Return: Message argument in JSON types. Tuples are stored as
+        {"tuple": [...]}, so that they are not read back as lists.
+        """
+
+        if type(value) in cls._JSON_TYPES:
+            return value
+        if type(value) is tuple:
+            return {"tuple": [cls._encode_arg(i) for i in value]}
+        if type(value) is list:
+            return [cls._encode_arg(i) for i in value]
+        raise TypeError(f"Message argument of type {type(value).__name__} is not serialisable")
+
+    @classmethod
+    def _decode_arg(cls, value):
+        if type(value) is list:
+            return [cls._decode_arg(i) for i in value]
+        if type(value) is dict:
+            return tuple(cls._decode_arg(i) for i in value["tuple"])
+        return value
+
+    def to_rows(self):
+        """
+        Return: List of (title, list of (violation ID, args, lineno,
+        status)) tuples in JSON types, e.g. to store results as JSON.
+        from_rows creates equal results from the rows.
+
+        Raise: TypeError if message argument is not str, int, float,
+        bool, None or tuple or list of them.
+        """
+
+        codes = self._codes
+        encode = self._encode_arg
+        return [
+            (title, [
+                (codes[self.codes[i]], [encode(arg) for arg in self.args[i]],
+                 self.linenos[i], bool(self.statuses[i]))
+                for i in range(start, end)
+            ])
+            for title, start, end, _ in self.categories
+        ]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Return: ResultBuffer created from rows of to_rows format."""
+
+        buffer = cls()
+        decode = cls._decode_arg
+        for title, results in rows:
+            for code, args, lineno, status in results:
+                buffer.add(code, tuple(decode(arg) for arg in args), lineno, status)
+            buffer.save_category(title)
+        return buffer
+
+    def __iter__(self):
+        """
+        Yield: Tuple of (title, tuple of ViolationTemplates) for each
+        category. Templates are created on each iteration.
+        """
+
+        codes = self._codes
+        for title, start, end, _ in self.categories:
+            yield title, tuple(
+                ViolationTemplate(codes[self.codes[i]], self.args[i],
+                                  self.linenos[i], bool(self.statuses[i]))
+                for i in range(start, end)
+            )
+
+
 class FilepathTemplate():
     """Template class for filepaths found during directory crawling."""
 
-    def __init__(self, path, student=None, week=None, exercise=None, course=None):
-        self._path = path # Pathlib object
+    def __init__(self, path, student=None, week=None, exercise=None, course=None,
+                 archive=None):
+        self._path = path # Pathlib object, member path if file is in archive
         self._filename = path.name
         self._student = student
         self._exercise = exercise
         self._week = week
         self._course = course
+        self._archive = archive # Path of zip/tar archive or None
 
     @property
     def path(self):
@@ -184,6 +419,10 @@ class FilepathTemplate():
     def course(self):
         return self._course
 
+    @property
+    def archive(self):
+        return self._archive
+
 
 class FilehandleTemplate(NodeTemplate):
     """Template class for filehandles found during file analysis."""
@@ -234,3 +473,100 @@ class StructureTemplate():
     @property
     def lineno(self):
         return self._lineno
+
+class AnalysisContext():
+    """
+    Read-only results of preanalysis, which analysers share through the
+    getters of Model. Dicts are mapping proxies, lists are tuples and
+    sets frozensets, therefore they can be given to analysers without
+    copying and the context can be shared between threads. New context
+    with changed values is created with replace.
+    """
+
+    MAPPINGS = (
+        "function_dict", "class_dict", "import_dict", "global_variables",
+        "constant_variables", "call_dict", "same_names_dict",
+        "file_handle_dict"
+    )
+    SEQUENCES = ("files_opened", "file_list", "lib_list")
+    SETS = ("local_variables",)
+
+    def __init__(self, **kwargs):
+        """
+        Keyword arguments are the names in MAPPINGS, SEQUENCES and SETS.
+        Given dicts are not copied, so they must not be modified after
+        the context is created.
+        """
+
+        for name in self.MAPPINGS:
+            value = kwargs.pop(name, None)
+            if not isinstance(value, types.MappingProxyType):
+                value = types.MappingProxyType(value if value is not None else {})
+            setattr(self, f"_{name}", value)
+
+        for name in self.SEQUENCES:
+            setattr(self, f"_{name}", tuple(kwargs.pop(name, ())))
+
+        for name in self.SETS:
+            setattr(self, f"_{name}", frozenset(kwargs.pop(name, ())))
+
+        if kwargs:
+            raise TypeError(f"Unknown context values: {', '.join(kwargs)}")
+
+    def replace(self, **kwargs):
+        """Return: New context where given values are replaced."""
+
+        values = {
+            name: getattr(self, f"_{name}")
+            for name in self.MAPPINGS + self.SEQUENCES + self.SETS
+        }
+        values.update(kwargs)
+        return AnalysisContext(**values)
+
+    @property
+    def function_dict(self):
+        return self._function_dict
+
+    @property
+    def class_dict(self):
+        return self._class_dict
+
+    @property
+    def import_dict(self):
+        return self._import_dict
+
+    @property
+    def global_variables(self):
+        return self._global_variables
+
+    @property
+    def constant_variables(self):
+        return self._constant_variables
+
+    @property
+    def call_dict(self):
+        return self._call_dict
+
+    @property
+    def same_names_dict(self):
+        return self._same_names_dict
+
+    @property
+    def file_handle_dict(self):
+        return self._file_handle_dict
+
+    @property
+    def files_opened(self):
+        return self._files_opened
+
+    @property
+    def file_list(self):
+        return self._file_list
+
+    @property
+    def lib_list(self):
+        return self._lib_list
+
+    @property
+    def local_variables(self):
+        return self._local_variables
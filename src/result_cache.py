@@ -0,0 +1,244 @@
+"""
+Module containing persistent result cache for analysis results. Results
+are stored into SQLite database and they are identified by content hash
+of the analysed file, analysis selections and version of the tool.
+Local imported libraries are stored as dependencies of each result, so
+that changed library invalidates results of the files importing it.
+"""
+
+import hashlib
+import json
+import pathlib
+import sqlite3
+import time
+
+import src.config.config as cnf
+import src.config.templates as templates
+
+
+_SOURCE_DIGEST = None
+
+def get_tool_digest():
+    """
+    Function to get version digest of the tool. Digest is created from
+    TOOL_VERSION and source files, therefore any change in analysers or
+    configuration invalidates cached results even if version is not
+    updated.
+
+    Return: hexdigest - str
+    """
+
+    global _SOURCE_DIGEST
+    if _SOURCE_DIGEST is None:
+        digest = hashlib.sha256(cnf.TOOL_VERSION.encode("UTF-8"))
+        src_dir = pathlib.Path(__file__).parent
+        for path in sorted(src_dir.glob("**/*.py")) + sorted(src_dir.glob("**/*.json")):
+            digest.update(path.relative_to(src_dir).as_posix().encode("UTF-8"))
+            digest.update(path.read_bytes())
+        _SOURCE_DIGEST = digest.hexdigest()
+    return _SOURCE_DIGEST
+
+
+class ResultCache():
+    """
+    Class for size bounded LRU cache of analysis results. Database
+    connection is opened on the first use, therefore creating an object
+    does not create any files.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._file_hashes = {}  # (path, mtime, size) -> hash of file
+        self._writes = 0
+        self._EVICT_INTERVAL = 100  # Eviction is checked every n writes
+
+   # ------------------------------------------------------------------------- #
+   # General methods
+    def _connect(self):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Connection is created in the thread which uses the cache first,
+            # e.g. GUI analysis worker, but cache is used by one thread at
+            # a time.
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=30,
+                check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+            )
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self.evict()
+            self._connection.close()
+            self._connection = None
+
+    def clear(self):
+        """Method to invalidate all cached results."""
+
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM results")
+        connection.execute("VACUUM")
+        self._file_hashes.clear()
+        return None
+
+    def evict(self):
+        """
+        Method to remove least recently used results until total size
+        of cached results is at most max_bytes.
+        """
+
+        connection = self._connect()
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return None
+
+        with connection:
+            for key, size in connection.execute(
+                    "SELECT key, size FROM results ORDER BY last_used").fetchall():
+                connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        return None
+
+    def _hash_file(self, path):
+        """
+        Method to get content hash of a file. Hashes are memoized by
+        path, modification time and size. Return None if there is no file.
+        """
+
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if (digest := self._file_hashes.get(key)) is None:
+            try:
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                return None
+            self._file_hashes[key] = digest
+        return digest
+
+    def create_key(self, content, filename, selections, modules=None):
+        """
+        Method to create cache key from file content, filename, selected
+        analysers and tool version. If modules (see Model.analyse_source)
+        is given, names and contents of the other modules are part of the
+        key instead of library dependencies, e.g. files in archives.
+        """
+
+        selected = ",".join(sorted(opt for opt, value in selections.items() if value))
+        parts = [get_tool_digest(), filename, selected, content]
+        for name in sorted(modules or ()):
+            if name != filename:
+                parts.extend((name, modules[name] or ""))
+
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("UTF-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key, dir_path):
+        """
+        Method to get cached results. Result is valid only if all local
+        library dependencies are unchanged.
+
+        Return: Tuple (results, structures) or None if there is no valid
+        cached result. Results are in same format as returned by
+        Model.execute_analysis. Structures are None if structure
+        detection failed.
+        """
+
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT value FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        data = json.loads(row[0])
+        for lib, digest in data["dependencies"].items():
+            if self._hash_file(pathlib.Path(dir_path).joinpath(lib)) != digest:
+                return None
+
+        with connection:
+            connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?",
+                (time.time(), key)
+            )
+
+        results = templates.ResultBuffer.from_rows(data["results"])
+
+        structures = None
+        if data["structures"] is not None:
+            structures = [
+                templates.StructureTemplate(identifier, lineno, None)
+                for identifier, lineno in data["structures"]
+            ]
+        return results, structures
+
+    def set(self, key, dir_path, libraries, results, structures):
+        """
+        Method to store analysis results.
+
+        Arguments:
+        1. key - Key created with create_key - str
+        2. dir_path - Directory of the analysed file, None if there are
+           no libraries - Path
+        3. libraries - Names of the imported modules - Iterable[str]
+        4. results - Results of Model.execute_analysis - ResultBuffer
+        5. structures - Detected structures or None - list
+
+        Results which message arguments cannot be stored as JSON are
+        not cached, see ResultBuffer.to_rows.
+        """
+
+        try:
+            rows = results.to_rows()
+        except TypeError:
+            return None
+
+        dependencies = {}
+        for lib in libraries:
+            filename = f"{lib}.py"
+            dependencies[filename] = self._hash_file(pathlib.Path(dir_path).joinpath(filename))
+
+        value = json.dumps({
+            "dependencies": dependencies,
+            "results": rows,
+            "structures": None if structures is None else [
+                (s.identifier, s.lineno) for s in structures
+            ]
+        })
+
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time())
+            )
+
+        self._writes += 1
+        if self._writes % self._EVICT_INTERVAL == 0:
+            self.evict()
+        return None
@@ -1,17 +1,17 @@
 """Module containing utility functions general use."""
 
 # import ast
+import functools
 import json
 import os       # os.walk is used for convenient directory exclusion possibility
 import pathlib  # Used for all the other path operations
 import re
-import yaml     # Used for bulkanalysis
+import string
 from typing import List
 from collections import defaultdict
 
 import src.config.config as cnf
 import src.config.templates as templates
-import src.bulk_analysis_utils as bulk_utils
 
 
 MSG = cnf.MSG
@@ -62,10 +62,78 @@ def get_all_ignored_checks():
     return IGNORE
 
 
+class MessageFormatter():
+    """
+    Class for precompiled violation messages of a single language. Each
+    message is compiled into format method of the message, or into the
+    ready message if it does not have replacement fields.
+    """
+
+    def __init__(self, lang):
+        messages = MSG[lang]
+        self.line = f"{messages['LINE'][0]} "
+        self.default = messages["default"]
+        self.error = messages["error_error"][0]
+        self.formats = {}  # Violation ID -> (format method or str, severity)
+
+        formatter = string.Formatter()
+        for code, (msg, severity) in messages.items():
+            if all(field is None for _, field, _, _ in formatter.parse(msg)):
+                self.formats[code] = (msg.format(), severity)
+            else:
+                self.formats[code] = (msg.format, severity)
+
+    def format(self, code, args, lineno):
+        """Return: Message tuple, see create_msg."""
+
+        prefix = ""
+        if lineno >= 0:
+            prefix = f"{self.line}{lineno}: "
+
+        try:
+            msg, severity = self.formats[code]
+        except KeyError:
+            msg = prefix + self.default[0]
+            return msg, self.default[1], len(prefix), len(msg)
+
+        if not isinstance(msg, str):
+            try:
+                msg = msg(*args)
+            except IndexError:
+                return self.error, severity, len(prefix), len(self.error)
+
+        msg = prefix + msg
+        return msg, severity, len(prefix), len(msg)
+
+
+_FORMATTERS = {}  # Language -> MessageFormatter
+
+
+def get_formatter(lang):
+    """
+    Return: MessageFormatter of the language, which is compiled when
+    the language is used first time.
+    """
+
+    try:
+        return _FORMATTERS[lang]
+    except KeyError:
+        formatter = _FORMATTERS[lang] = MessageFormatter(lang)
+        return formatter
+
+
+@functools.lru_cache(maxsize=cnf.MSG_CACHE_SIZE, typed=True)
+def _create_cached_msg(code, lineno, lang, *args):
+    return get_formatter(lang).format(code, args, lineno)
+
+
 def create_msg(code, *args, lineno=-1, lang="FIN"):
     """
     Function to create violation message based on given violation code,
     message parameters (e.g. variable name), linenumber and language.
+    Messages are created with precompiled MessageFormatter and latest
+    messages are cached, because same messages are repeated in the
+    feedback of many files.
 
     Return:
     1. msg - violation message - string
@@ -77,31 +145,10 @@ def create_msg(code, *args, lineno=-1, lang="FIN"):
         - integer number
     """
 
-    msg = ""
-    start = 0
-    end = 0
-    severity = MSG[lang]["default"][1]
-    # if lineno < 0:
-    #     pass
-    if lineno >= 0 and lang:
-        msg = f"{MSG[lang]['LINE'][0]} {lineno}: "
-        start = len(msg)
-
-    # TODO change to list and join
     try:
-        msg += MSG[lang][code][0]
-        severity = MSG[lang][code][1]
-    except KeyError:
-        msg += MSG[lang]["default"][0]
-    else:
-        try:
-            msg = msg.format(*args)
-        except IndexError:
-            msg = MSG[lang]["error_error"][0]
-    finally:
-        end = len(msg)
-
-    return msg, severity, start, end
+        return _create_cached_msg(code, lineno, lang, *args)
+    except TypeError:  # Unhashable message parameters are not cached
+        return get_formatter(lang).format(code, args, lineno)
 
 
 def get_title(title_key, lang):
@@ -116,10 +163,12 @@ def get_title(title_key, lang):
         return None
 
 
+@functools.lru_cache(maxsize=cnf.TITLE_CACHE_SIZE)
 def create_title(code, title_key, lang="FIN"):
     """
     Function to create title string message based on given title code,
-    title_key and language.
+    title_key and language. Titles are cached, because same titles are
+    created for every analysed file.
 
     Arguments:
     1. code - ID of title - str
@@ -262,6 +311,7 @@ def directory_crawler(
             add_file(file_structure, path_obj)
 
     elif output_format == "bulk_dict":
+        import src.bulk_analysis_utils as bulk_utils  # Imported only when needed
         file_structure = {}
 
         for path in paths:
@@ -300,6 +350,7 @@ def read_file(filepath, encoding="UTF-8", settings_file=False):
 
 
 def write_yaml_file(filepath, data, encoding="utf-8"):
+    import yaml  # Imported only when needed, because of slow import
     try:
         with open(filepath, "w", encoding=encoding) as f_handle:
             # yaml.dump(data, f_handle, indent=4, allow_unicode=True)
@@ -390,6 +441,21 @@ def combine_integer_dicts(*args: dict) -> dict:
             merged[key] += value
     return merged
 
+
+def natural_sort_key(text):
+    """
+    Function to create sort key where numbers in the text are compared
+    as numbers, e.g. 'week2' is before 'week10'.
+
+    Return: Key for sorted and list.sort - tuple
+    """
+
+    # Split gives text parts at even and numbers at odd indices,
+    # therefore compared elements have always the same type.
+    return tuple(
+        int(part) if i % 2 else part for i, part in enumerate(re.split(r"(\d+)", text))
+    )
+
 ########################################################################
 # Getter functions for static values
 
@@ -430,9 +496,18 @@ def add_fixed_settings(settings):
     settings["result_path"] = result_dir.joinpath(settings["result_file"])
     settings["yaml_result_path"] = result_dir.joinpath(settings["yaml_result_file"])
     settings["bulk_result_path"] = result_dir.joinpath(settings["bulk_result_file"])
+    settings["bulk_stream_path"] = result_dir.joinpath(settings["bulk_stream_file"])
     settings["BKT_path"] = result_dir.joinpath(settings["BKT_file"])
+    settings["BKT_parameters_path"] = result_dir.joinpath(settings["BKT_parameters_file"])
+    settings["BKT_state_path"] = result_dir.joinpath(settings["BKT_state_file"])
     settings["structure_path"] = result_dir.joinpath(settings["structure_file"])
     settings["statistics_path"] = result_dir.joinpath(settings["statistics_file"])
+    settings["statistics_csv_path"] = result_dir.joinpath(settings["statistics_csv_file"])
+    settings["statistics_summary_path"] = result_dir.joinpath(
+        settings["statistics_summary_file"]
+    )
+    settings["result_cache_path"] = result_dir.joinpath(settings["result_cache_file"])
+    settings["instrumentation_path"] = result_dir.joinpath(settings["instrumentation_file"])
 
     # Combine BKT_ignored_staff and excluded_directories which are basically
     # doing the same thing (in current directory structure).
@@ -440,13 +515,18 @@ def add_fixed_settings(settings):
     return None
 
 
-def init_settings() -> dict:
+def init_settings(overrides=None) -> dict:
     """
     Function to initialise settings dictionary. Settings are based on
     default settings which are then updated by values from settings.json
     file. If there is no settings file, new settings.json file is
     created.
 
+    Arguments:
+    1. overrides - Optional settings which override values of the
+       settings file without saving them, e.g. command line arguments
+       - dict
+
     Return: settings dictionary.
     """
 
@@ -462,6 +542,9 @@ def init_settings() -> dict:
     else:
         content = json.dumps(settings, indent=4)
         write_file(settings_path, content, mode="w")
+
+    if overrides:
+        settings.update(overrides)
     add_fixed_settings(settings)
 
     return settings
@@ -74,6 +74,11 @@ class MainFrame(tk.Frame):
             page.grid(row=0, column=0, sticky=tk.NSEW)
         self.show_page(AnalysePage)
 
+        # Progress of running analysis, shown only during the analysis
+        self.progress_panel = ProgressPanel(self, self.LANG)
+        self.progress_panel.grid(row=1, column=0, sticky=tk.EW)
+        self.progress_panel.grid_remove()
+
        # --------------------------------------------------------------------- #
        # Menubar
         menubar = tk.Menu(self)
@@ -103,6 +108,12 @@ class MainFrame(tk.Frame):
                 analysis_type="bulk"
             )
         )
+        # Add option to invalidate cached analysis results
+        filemenu.add_command(
+            label=cnf.GUI[self.LANG]["clear_cache"],
+            font=NORMAL_FONT,
+            command=controller.clear_result_cache
+        )
         # Add guit option
         filemenu.add_command(
             label=cnf.GUI[self.LANG]["exit"],
@@ -321,6 +332,75 @@ class ControlPanel(tk.Frame):
         # exit_button.grid(row=0, column=1, padx=PAD, pady=PAD, sticky=tk.W)
 
 
+################################################################################
+class ProgressPanel(tk.Frame):
+    """
+    Class to view progress bar, number of analysed files and estimated
+    remaining time of running analysis, and button to cancel it.
+    """
+
+    def __init__(self, parent, lang):
+        tk.Frame.__init__(self, parent, bd=BD, relief=BD_STYLE)
+        self.LANG = lang
+        self.grid_columnconfigure(0, weight=1)
+
+        self.progressbar = ttk.Progressbar(
+            self,
+            orient=tk.HORIZONTAL,
+            mode="determinate"
+        )
+        self.progressbar.grid(row=0, column=0, padx=PAD, pady=PAD, sticky=tk.EW)
+
+        self.progress_label = tk.Label(
+            self,
+            text="",
+            bg=BG_COLOR,
+            fg=FONT_COLOR,
+            font=NORMAL_FONT
+        )
+        self.progress_label.grid(row=0, column=1, padx=PAD, pady=PAD)
+
+        self.cancel_button = ttk.Button(
+            self,
+            text=cnf.GUI[self.LANG]["cancel"]
+        )
+        self.cancel_button.grid(row=0, column=2, padx=PAD, pady=PAD, sticky=tk.E)
+
+    def start(self, cancel_command):
+        """Method to show panel for new analysis."""
+
+        self.cancel_button.config(command=cancel_command, state="normal")
+        self.update_progress(0, 0, None)
+        self.grid()
+
+    def update_progress(self, done, total, eta):
+        """
+        Method to update progress bar and label. ETA is remaining time
+        in seconds or None if it is not known yet.
+        """
+
+        self.progressbar.config(maximum=max(total, 1), value=done)
+        if str(self.cancel_button.cget("state")) == "disabled":
+            return None
+
+        if eta is None:
+            eta = "-"
+        else:
+            eta = f"{int(eta) // 60}:{int(eta) % 60:02}"
+        self.progress_label.config(
+            text=cnf.GUI[self.LANG]["progress"].format(done=done, total=total, eta=eta)
+        )
+
+    def cancel(self):
+        self.cancel_button.config(state="disabled")
+        self.progress_label.config(text=cnf.GUI[self.LANG]["cancelling"])
+
+    def finish(self):
+        """Method to hide panel when analysis is finished."""
+
+        self.grid_remove()
+
+
 ################################################################################
 class AnalysePage(tk.Frame):
     """Class to view analyse page. Usage clarification:
@@ -379,13 +459,18 @@ class ResultPage(tk.Frame):
     """Class to view result page. Usage clarification:
     in __init__ the self (i.e. tk.Frame typed class)
     is a master to all elements in this frame.
+
+    All result lines are stored, but only lines of the shown page are
+    inserted into the textbox, so that large result sets do not slow
+    down the textbox. Pages are changed with page buttons.
     """
 
     def __init__(self, parent, controller, settings):
         tk.Frame.__init__(self, parent)
         self.LANG = controller.get_lang()
         self.settings = controller.get_settings()# settings
-        self.line_counter = 0
+        self.lines = []  # Message tuples of all results
+        self.page = 0    # Index of the shown page
 
         # Title label
         label = tk.Label(
@@ -419,6 +504,13 @@ class ResultPage(tk.Frame):
         scrollbar.grid(column=1, row=0, sticky=tk.NS, pady=PAD)
         self.result_textbox.configure(yscrollcommand=scrollbar.set)
 
+        # Severity tags are configured once, tags of other severities
+        # when they are used first time, see get_tag.
+        self.tags = set()
+        for severity, color in HIGHLIGHT.items():
+            self.result_textbox.tag_configure(str(severity), foreground=color)
+            self.tags.add(str(severity))
+
         # Control buttons
         button_group = tk.Frame(master=self, bg=FRAME_COLOR)
         button_group.pack(side=tk.BOTTOM)
@@ -432,11 +524,30 @@ class ResultPage(tk.Frame):
         # exit_button = ttk.Button(button_group, text="Sulje ohjelma", command=quit)
         # exit_button.grid(row=0, column=1, padx=PAD, pady=PAD, sticky=tk.W)
 
-    def set_line_counter(self, counter, update=False):
-        if update:
-            self.line_counter += counter
-        else:
-            self.line_counter = counter
+        # Page buttons
+        self.previous_button = ttk.Button(
+            button_group,
+            text=cnf.GUI[self.LANG]["previous_page"],
+            command=lambda: self.show_result_page(self.page - 1)
+        )
+        self.previous_button.grid(row=0, column=1, padx=PAD, pady=PAD)
+
+        self.page_label = tk.Label(
+            button_group,
+            text="",
+            bg=BG_COLOR,
+            fg=FONT_COLOR,
+            font=NORMAL_FONT
+        )
+        self.page_label.grid(row=0, column=2, padx=PAD, pady=PAD)
+
+        self.next_button = ttk.Button(
+            button_group,
+            text=cnf.GUI[self.LANG]["next_page"],
+            command=lambda: self.show_result_page(self.page + 1)
+        )
+        self.next_button.grid(row=0, column=3, padx=PAD, pady=PAD, sticky=tk.W)
+        self.update_page_controls()
 
     def show_info(self):
         infos = [
@@ -447,44 +558,89 @@ class ResultPage(tk.Frame):
         self.display_result(infos)
         infos.clear()
 
-    def display_result(self, messages, counter=0):
-        if not counter:
-            counter = self.line_counter
-        line_counter = counter
+    def display_result(self, messages):
+        """
+        Method to add messages to the results. Messages are inserted
+        into textbox only if they are on the shown page.
+        """
 
-        self.result_textbox.config(state="normal")
-        for msg in messages:
-            # Text box lines start from 1 therefore add at the beginning
-            line_counter += 1
-            self.result_textbox.insert(tk.END, f"{msg[0]}\n")
-            if len(msg) >= 4:
-                s = f"{line_counter}.0 + {msg[2]}c"
-                e = f"{line_counter}.0 + {msg[3]}c"
-                self.colour_text(msg[1], start=s, end=e)
+        first = len(self.lines)
+        self.lines.extend(messages)
 
-        self.result_textbox.config(state="disabled")
-        self.line_counter = line_counter
+        start = self.page * cnf.RESULT_PAGE_LINES
+        end = start + cnf.RESULT_PAGE_LINES
+        if first < end:
+            self.insert_lines(self.lines[max(first, start):end])
+        self.update_page_controls()
+
+    def get_tag(self, severity):
+        tag = str(severity)
+        if tag not in self.tags:
+            self.result_textbox.tag_configure(tag, foreground=FONT_COLOR)
+            self.tags.add(tag)
+        return tag
+
+    def insert_lines(self, messages):
+        """
+        Method to insert messages at the end of the textbox. Messages
+        are inserted in chunks, where each chunk is a single insert of
+        text segments and their severity tags.
+        """
 
-    def colour_text(self, tag, start="1.0", end=tk.END):
         textbox = self.result_textbox
-        try:
-            color = HIGHLIGHT[tag]
-        except KeyError:
-            color = FONT_COLOR
-
-        textbox.tag_configure(
-            tag,
-            font=font.Font(textbox, textbox.cget("font")),
-            foreground=color
+        textbox.config(state="normal")
+        for i in range(0, len(messages), cnf.RESULT_INSERT_CHUNK):
+            segments = []
+            plain = []  # Untagged text after the previous tagged segment
+            for msg in messages[i:i + cnf.RESULT_INSERT_CHUNK]:
+                text = msg[0]
+                if len(msg) >= 4 and msg[2] < msg[3]:
+                    plain.append(text[:msg[2]])
+                    segments.extend(("".join(plain), ()))
+                    segments.extend((text[msg[2]:msg[3]], (self.get_tag(msg[1]),)))
+                    plain = [text[msg[3]:], "\n"]
+                else:
+                    plain.extend((text, "\n"))
+            segments.extend(("".join(plain), ()))
+            textbox.insert(tk.END, *segments)
+
+        textbox.config(state="disabled")
+
+    def get_page_count(self):
+        return max(1, -(-len(self.lines) // cnf.RESULT_PAGE_LINES))
+
+    def show_result_page(self, page):
+        """Method to show lines of the given page in the textbox."""
+
+        self.page = min(max(page, 0), self.get_page_count() - 1)
+        start = self.page * cnf.RESULT_PAGE_LINES
+
+        self.result_textbox.config(state="normal")
+        self.result_textbox.delete(1.0, tk.END)
+        self.insert_lines(self.lines[start:start + cnf.RESULT_PAGE_LINES])
+        self.update_page_controls()
+
+    def update_page_controls(self):
+        start = self.page * cnf.RESULT_PAGE_LINES
+        self.page_label.config(text=cnf.GUI[self.LANG]["result_lines"].format(
+            first=min(start + 1, len(self.lines)),
+            last=min(start + cnf.RESULT_PAGE_LINES, len(self.lines)),
+            total=len(self.lines)
+        ))
+        self.previous_button.config(state="normal" if self.page > 0 else "disabled")
+        self.next_button.config(
+            state="normal" if self.page < self.get_page_count() - 1 else "disabled"
         )
-        textbox.tag_add(tag, start, end)
 
     def clear_result(self):
         """Method to clear results textbox."""
 
+        self.lines.clear()
+        self.page = 0
         self.result_textbox.config(state="normal")
         self.result_textbox.delete(1.0, tk.END)
         self.result_textbox.config(state="disabled")
+        self.update_page_controls()
 
     def show_results(self, line_list):
         """Method to show analysis results in selected output channels."""
@@ -596,7 +752,7 @@ class CLI():
 
     def print_error(self, error_code, *args, error_type="error"):
         if error_type == "error":
-            print(cnf.CLI_ERROR[self.LANG][error_code])
+            print(cnf.CLI_ERROR[self.LANG][error_code].format(*args))
 
         elif error_type == "conflict":
             print(cnf.SETTINGS_CONFLICTS[self.LANG][error_code])
\ No newline at end of file
@@ -41,8 +41,18 @@ class WEB_INTERFACE_CLASS():
         to execute selected analysis type.
         """
 
-        results = []
-        
+        #selections = {'basic': 1, 'function': 1, 'file_handling': 1, 'data_structure': 1, 'library': 1, 'exception_handling': 1}
+        selections = selected_analysis
+
+        #if not self.check_selection_validity(selected_analysis, filepaths):
+        #    return None
+
+        # Default analysis is done in memory, i.e. without temporary file.
+        # For concurrent requests use analysis_server.AnalysisServer.
+        if analysis_type != "BKTA":
+            results = self.model.analyse_source(content, selections)
+            return self.model.format_violations_web(results)
+
         temp_dir = USER_FILES_PATH
 
         if not os.path.exists(temp_dir):
@@ -57,39 +67,22 @@ class WEB_INTERFACE_CLASS():
 
         my_filepaths = {temp_file_path}
 
-        #selections = {'basic': 1, 'function': 1, 'file_handling': 1, 'data_structure': 1, 'library': 1, 'exception_handling': 1}
-        selections = selected_analysis
-        
-        #if not self.check_selection_validity(selected_analysis, filepaths):
-        #    return None
-
-        if analysis_type == "BKTA":
-            output_format = "dict"
-        else:  # default
-            output_format = "list"
-
         file_structure = utils.directory_crawler(
             my_filepaths,
             only_leaf_files=self.settings["only_leaf_files"],
             excluded_dirs=self.settings["excluded_directories"],
             excluded_files=self.settings["excluded_files"],
-            output_format=output_format
+            output_format="dict"
         )
 
-        if analysis_type == "BKTA":
-            self.model.BKT_analyse(
-                selections,
-                file_structure
-            )
+        self.model.BKT_analyse(
+            selections,
+            file_structure
+        )
 
-            self.model.count_structures(file_structure)
-        else:
-            results = self.model.default_analyse_web(
-                selections,
-                file_structure
-            )
+        self.model.count_structures(file_structure)
 
         # Remove the temporary user uploaded file
         os.unlink(temp_file_path)
 
-        return results
\ No newline at end of file
+        return []
@@ -0,0 +1,61 @@
+"""Test file for TR3-1 and TR3-2 checks.
+Objects with the same name are created in several functions and in
+nested definitions. Object belongs to the nearest function containing
+the creation, therefore the checks of each function must see only its
+own objects.
+
+Include AR2-1, non-global function definition.
+"""
+
+class ITEM():
+    value = 0
+
+def create_outside(items):
+    # TR3-2: object is created outside the loop and added to the list
+    # inside the loop.
+    obj = ITEM()
+    for i in range(3):
+        obj.value = i
+        items.append(obj)
+    return items
+
+def create_inside(items):
+    # These are fine, object with the same name as in create_outside is
+    # created inside the loop.
+    for i in range(3):
+        obj = ITEM()
+        obj.value = i
+        items.append(obj)
+    return items
+
+def attribute_to_list(values):
+    # TR3-1: attribute of the object is added to a list inside a loop.
+    item = ITEM()
+    while True:
+        values.append(item.value)
+        values += [item.value]
+        break
+
+    # These are fine, name 'other' is created only in the nested
+    # function.
+    def nested():
+        other = ITEM()
+        return other
+
+    for _ in range(2):
+        values.append(other.value)
+    return values
+
+def before_nested(values):
+    # TR3-1: object is created before a nested definition and used
+    # deeper in the tree than the nested definition.
+    for _ in range(2):
+        first = ITEM()
+        values.append(first.value)
+
+    def nested():
+        return None
+
+    return values
+
+# create_outside([])
@@ -0,0 +1,88 @@
+"""
+Helper functions for unit tests. Tests use the files and expected output
+files of the tests directory, see README.md.
+"""
+
+import copy
+import pathlib
+
+import src.analysers.analysis_lib as analysis
+import src.config.config as cnf
+import src.config.templates as templates
+import src.utils_lib as utils
+
+TESTS_DIR = pathlib.Path(__file__).resolve().parents[1] / "tests"
+RESULT_SEPARATOR = "=" * 80
+
+
+class Controller():
+    """Minimal controller which gives settings to the Model."""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_settings(self):
+        return self.settings
+
+    def propagate_error_message(self, *args, **kwargs):
+        pass
+
+
+def create_settings(result_dir, language="ENG", **overrides):
+    """
+    Function to create default settings where result files are written
+    into result_dir.
+
+    Return: Settings - dict
+    """
+
+    settings = copy.deepcopy(cnf.DEFAULT_SETTINGS)
+    settings["language"] = language
+    settings["result_dir"] = str(result_dir)
+    settings["excluded_directories"] = list(settings["excluded_directories"])
+    settings.update(overrides)
+    utils.add_fixed_settings(settings)
+    return settings
+
+
+def create_model(result_dir, language="ENG", **overrides):
+    return analysis.Model(Controller(create_settings(result_dir, language, **overrides)))
+
+
+def all_selected():
+    return {option: 1 for option in cnf.CHECKBOX_OPTIONS}
+
+
+def analyse_file(model, path, selections=None):
+    """
+    Function to analyse single file and clear the analysis data of the
+    model afterwards.
+
+    Return: Formatted result lines of the file - list
+    """
+
+    results = model.execute_analysis(
+        templates.FilepathTemplate(path=pathlib.Path(path)),
+        all_selected() if selections is None else selections
+    )
+    lines = [line[0] for line in model.format_violations(results)]
+    model.clear_analysis_data()
+    return lines
+
+
+def read_expected_output(filepath):
+    """
+    Function to read expected output file, which is result file of
+    default analysis.
+
+    Return: Dict where key is filename and value is list of result lines.
+    """
+
+    content = pathlib.Path(filepath).read_text(encoding="utf-8")
+    expected = {}
+    # The first part is timestamp of the analysis
+    for block in content.split(RESULT_SEPARATOR + "\n")[1:]:
+        lines = block.rstrip("\n").split("\n")
+        # Lines are path, filename and results
+        expected[lines[1]] = lines[2:]
+    return expected
@@ -0,0 +1,90 @@
+"""
+Tests of BKT analysis. Default analysis must give the same results as
+before, and incremental BKT analysis must give the same results as
+analysing all files at once.
+"""
+
+import contextlib
+import io
+import itertools
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+import src.utils_lib as utils
+from unit_tests import helpers
+
+
+class TestBKTAnalysis(unittest.TestCase):
+    def test_full_run_equals_expected_output(self):
+        # Files are given in reverse order, which must be kept, i.e. the
+        # result differs when files are sorted.
+        file_dict = utils.directory_crawler([str(helpers.TESTS_DIR)], output_format="dict")
+        file_dict = {
+            student_name: sorted(filepaths, key=lambda filepath: str(filepath.path), reverse=True)
+            for student_name, filepaths in sorted(file_dict.items())
+        }
+        with tempfile.TemporaryDirectory() as result_dir:
+            model = helpers.create_model(result_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                model.BKT_analyse(helpers.all_selected(), file_dict)
+            result = pathlib.Path(model.settings["BKT_path"]).read_text(encoding="utf-8")
+
+        expected = (helpers.TESTS_DIR / "BKTA_expected_tests_ENG.csv").read_text(encoding="utf-8")
+        self.assertEqual(result, expected)
+
+
+class TestIncrementalBKT(unittest.TestCase):
+    WEEKS = ("week1", "week2", "week10")
+    EXERCISES = ("ex1", "ex2", "ex10")
+    STUDENTS = ("student1", "student2", "student3")
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = pathlib.Path(temp_dir.name)
+
+        # Course directory structure week/exercise/student/file, files
+        # are taken from tests directory.
+        self.all_files = self.temp_dir / "all"
+        sources = itertools.cycle(sorted(helpers.TESTS_DIR.glob("*/*.py")))
+        for week in self.WEEKS:
+            for exercise in self.EXERCISES:
+                for student in self.STUDENTS:
+                    path = self.all_files / week / exercise / student
+                    path.mkdir(parents=True)
+                    shutil.copy(next(sources), path / "main.py")
+
+    def _analyse(self, path, result_dir, **settings):
+        """Return: Content of BKT and structure result files - tuple"""
+
+        model = helpers.create_model(result_dir, **settings)
+        file_dict = utils.directory_crawler([str(path)], output_format="dict")
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.BKT_analyse(helpers.all_selected(), file_dict)
+            model.count_structures(file_dict)
+        return (
+            pathlib.Path(model.settings["BKT_path"]).read_text(encoding="utf-8"),
+            pathlib.Path(model.settings["structure_path"]).read_text(encoding="utf-8")
+        )
+
+    def test_incremental_run_equals_full_run(self):
+        full = self._analyse(self.all_files, self.temp_dir / "full", BKT_incremental=True)
+
+        # Weeks are added one by one, i.e. week10 is added last although
+        # it is before week2 in plain string order.
+        incremental_files = self.temp_dir / "incremental"
+        result_dir = self.temp_dir / "incremental_results"
+        for week in self.WEEKS:
+            shutil.copytree(self.all_files / week, incremental_files / week)
+            incremental = self._analyse(incremental_files, result_dir, BKT_incremental=True)
+        self.assertEqual(incremental, full)
+
+        # Nothing new to analyse
+        again = self._analyse(incremental_files, result_dir, BKT_incremental=True)
+        self.assertEqual(again, full)
+
+
+if __name__ == "__main__":
+    unittest.main()
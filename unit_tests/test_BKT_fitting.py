@@ -0,0 +1,52 @@
+"""
+Tests of BKT parameter fitting. Fitting must recover known parameters
+from synthetic observation sequences.
+"""
+
+import random
+import unittest
+
+import src.BKT.BKT_fitting as BKT_F
+
+
+def simulate(parameters, students, length, rng):
+    """
+    Function to create observation sequences of students with BKT
+    model, i.e. skill may be learned after each observation and it is
+    not forgotten.
+
+    Return: Sequences of 1 (success) and 0 (failure) values - list
+    """
+
+    pG, pS, pT, pL0 = parameters
+    sequences = []
+    for _ in range(students):
+        known = rng.random() < pL0
+        sequence = []
+        for _ in range(length):
+            sequence.append(int(rng.random() >= pS) if known else int(rng.random() < pG))
+            known = known or rng.random() < pT
+        sequences.append(bytes(sequence))
+    return sequences
+
+
+class TestBKTFitting(unittest.TestCase):
+    def test_fit_recovers_parameters(self):
+        for seed, parameters in enumerate(((0.2, 0.1, 0.15, 0.3), (0.1, 0.2, 0.3, 0.1))):
+            with self.subTest(parameters=parameters):
+                sequences = simulate(parameters, 2000, 12, random.Random(seed))
+                fitted, log_likelihood, iterations = BKT_F.fit_skill(sequences)
+
+                self.assertLess(iterations, BKT_F.MAX_ITERATIONS)
+                self.assertLess(log_likelihood, 0)
+                for name, value, expected in zip(BKT_F.PARAMETER_NAMES, fitted, parameters):
+                    self.assertAlmostEqual(value, expected, delta=0.03, msg=name)
+
+    def test_fit_without_observations(self):
+        parameters, log_likelihood, iterations = BKT_F.fit_skill([])
+        self.assertEqual((log_likelihood, iterations), (0.0, 0))
+        self.assertEqual(len(parameters), len(BKT_F.PARAMETER_NAMES))
+
+
+if __name__ == "__main__":
+    unittest.main()
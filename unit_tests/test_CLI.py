@@ -0,0 +1,94 @@
+"""
+Tests of command line interface. Settings file is not read or written,
+settings are created from the default settings instead.
+"""
+
+import contextlib
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import src.CLI as CLI
+from unit_tests import helpers
+
+CODE = """def paaohjelma():
+    print("Hei")
+    return None
+
+paaohjelma()
+"""
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.result_dir = pathlib.Path(temp_dir.name) / "results"
+        self.filepath = pathlib.Path(temp_dir.name) / "main.py"
+        self.filepath.write_text(CODE, encoding="utf-8")
+
+        patcher = mock.patch.object(
+            CLI.utils,
+            "init_settings",
+            lambda overrides=None: helpers.create_settings(self.result_dir, **(overrides or {}))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _main(self, *argv):
+        """Return: Exit code, standard output and standard error - tuple"""
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                code = CLI.main(list(argv))
+            except SystemExit as error:
+                code = error.code
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def _is_cached(self):
+        model = helpers.create_model(self.result_dir, result_cache=True)
+        self.addCleanup(model.result_cache.close)
+        key = model.result_cache.create_key(
+            self.filepath.read_text(encoding="utf-8"), self.filepath.name, helpers.all_selected()
+        )
+        return model.result_cache.get(key, self.filepath.parent) is not None
+
+    def test_clear_cache(self):
+        self.assertEqual(self._main("--cache", "-q", str(self.filepath))[0], CLI.EXIT_OK)
+        self.assertTrue(self._is_cached())
+
+        # Without paths only the cache is cleared
+        self.assertEqual(self._main("--clear-cache")[0], CLI.EXIT_OK)
+        self.assertFalse(self._is_cached())
+
+        # With paths the cache is cleared before the analysis
+        self.assertEqual(self._main("--cache", "-q", str(self.filepath))[0], CLI.EXIT_OK)
+        code, stdout, _ = self._main("--cache", "--clear-cache", str(self.filepath))
+        self.assertEqual(code, CLI.EXIT_OK)
+        self.assertIn(self.filepath.name, stdout)
+        self.assertTrue(self._is_cached())
+
+    def test_paths_are_required_without_clear_cache(self):
+        code, _, stderr = self._main()
+        self.assertEqual(code, CLI.EXIT_USAGE)
+        self.assertIn("paths", stderr)
+
+    def test_json_format(self):
+        code, stdout, _ = self._main("-f", "json", str(self.filepath))
+        self.assertIn(code, (CLI.EXIT_OK, CLI.EXIT_VIOLATIONS))
+        self.assertIsInstance(json.loads(stdout), (list, dict))
+
+    def test_quiet_json_is_usage_error(self):
+        code, stdout, stderr = self._main("-q", "-f", "json", str(self.filepath))
+        self.assertEqual(code, CLI.EXIT_USAGE)
+        self.assertEqual(stdout, "")
+        self.assertIn("-f json", stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
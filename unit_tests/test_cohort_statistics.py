@@ -0,0 +1,56 @@
+"""Tests of violation statistics of the students, see cohort_statistics.py."""
+
+import unittest
+
+from src.analysers.cohort_statistics import CohortStatistics
+
+
+class TestCohortStatistics(unittest.TestCase):
+    def setUp(self):
+        self.statistics = CohortStatistics()
+        self.statistics.add_file("week1/student1", {"PT1": 2}, course="C1")
+        self.statistics.add_file("week1/student2", {}, course="C1")
+        self.statistics.add_file("week1/student1", {"AR1": 1, "PT1": 1}, course="C1")
+
+    def test_rows_have_same_length(self):
+        self.statistics.add_file("week1/student3", {"TR2-3": 4})
+        for row in self.statistics.rows:
+            self.assertEqual(len(row), len(self.statistics.codes))
+
+    def test_merge(self):
+        other = CohortStatistics()
+        other.add_file("week1/student2", {"MR1": 1}, course="C1")
+        other.add_file("week1/student4", {"PT1": 3}, course="C2")
+        self.statistics.merge(other)
+
+        for row in self.statistics.rows:
+            self.assertEqual(len(row), len(self.statistics.codes))
+        self.assertEqual(self.statistics.get_column("PT1"), [3, 0, 3])
+        self.assertEqual(self.statistics.get_column("MR1"), [0, 1, 0])
+
+    def test_statistics_file_format(self):
+        self.assertEqual(self.statistics.to_dict(), {
+            "ALL": {"PT1": 2, "AR1": 1, "all_ok": 1, "file_count": 3},
+            "week1/student1": {"PT1": 3, "AR1": 1, "all_ok": 0, "file_count": 2},
+            "week1/student2": {"all_ok": 1, "file_count": 1}
+        })
+
+    def test_violation_statistics(self):
+        statistics = self.statistics.get_violation_statistics("PT1")
+        self.assertEqual(statistics["total"], 3)
+        self.assertEqual(statistics["files"], 2)
+        self.assertEqual(statistics["students"], 1)
+        self.assertEqual(statistics["prevalence"], 0.5)
+        self.assertEqual(statistics["p50"], 1.5)
+
+    def test_csv(self):
+        self.assertEqual(
+            self.statistics.to_csv(),
+            "student;course;files;files_ok;AR1;PT1\n"
+            "week1/student1;C1;2;0;1;3\n"
+            "week1/student2;C1;1;1;0;0\n"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
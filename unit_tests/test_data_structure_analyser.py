@@ -0,0 +1,55 @@
+"""
+Tests of data structure analyser. Results of the files in
+tests/TR_data_structure are compared to the expected output files of the
+directory. TR3 checks depend on objects detected once per module,
+therefore their results are also checked not to depend on previously
+analysed files.
+"""
+
+import tempfile
+import unittest
+
+from unit_tests import helpers
+
+TR_DIR = helpers.TESTS_DIR / "TR_data_structure"
+
+
+class TestDataStructureAnalyser(unittest.TestCase):
+    def setUp(self):
+        self._result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._result_dir.cleanup)
+
+    def test_expected_output(self):
+        for language in ("ENG", "FIN"):
+            model = helpers.create_model(self._result_dir.name, language)
+            expected = helpers.read_expected_output(
+                TR_DIR / f"excepted_output_TR_{language}.txt"
+            )
+            self.assertTrue(any(i.startswith("TR3") for i in expected))
+            for filename, lines in expected.items():
+                with self.subTest(language=language, filename=filename):
+                    self.assertEqual(
+                        helpers.analyse_file(model, TR_DIR / filename), lines
+                    )
+
+    def test_TR3_results_do_not_depend_on_analysed_files(self):
+        files = sorted(TR_DIR.glob("TR3*.py"))
+        model = helpers.create_model(self._result_dir.name)
+        results = {i.name: helpers.analyse_file(model, i) for i in files}
+
+        # Same model analyses the files again in reverse order
+        for filepath in reversed(files):
+            with self.subTest(filename=filepath.name):
+                self.assertEqual(helpers.analyse_file(model, filepath),
+                                 results[filepath.name])
+
+        # Each file alone with a new model
+        for filepath in files:
+            with self.subTest(filename=filepath.name, model="new"):
+                model = helpers.create_model(self._result_dir.name)
+                self.assertEqual(helpers.analyse_file(model, filepath),
+                                 results[filepath.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests of FusedVisitor. Visitors walked together with FusedVisitor must
+give the same results as when each visitor visits the tree separately,
+which is checked with the files of tests directory.
+"""
+
+import ast
+import tempfile
+import unittest
+
+import src.analysers.analysis_utils as a_utils
+import src.analysers.fused_visitor as fused_visitor
+import src.analysers.pre_analyser as pre_analyser
+import src.analysers.structure_detector as structure_detector
+import src.config.config as cnf
+import src.config.templates as templates
+import src.utils_lib as utils
+from unit_tests import helpers
+
+
+def get_trees():
+    """Yield: Tuple of (path, tree) of each parseable file in tests."""
+
+    for path in sorted(helpers.TESTS_DIR.glob("**/*.py")):
+        try:
+            yield path, ast.parse(utils.read_file(path), path.name)
+        except (SyntaxError, ValueError):
+            continue
+
+
+def get_preanalysis(analyser, detector):
+    """Return: Comparable results of preanalyser and structure detector."""
+
+    return (
+        {
+            name: list(getattr(analyser, f"get_{name}")().keys())
+            for name in ("import_dict", "class_dict", "function_dict",
+                         "global_dict", "constant_dict", "call_dict",
+                         "file_handle_dict", "local_global_dict")
+        },
+        [i.name for i in analyser.get_file_list()],
+        [(i.identifier, i.lineno) for i in detector.get_structures()]
+    )
+
+
+class TestFusedVisitor(unittest.TestCase):
+    def setUp(self):
+        self._result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._result_dir.cleanup)
+
+    def _create_model(self, path, tree):
+        """Return: Model where the tree is preanalysed for analysers."""
+
+        model = helpers.create_model(self._result_dir.name)
+        model.tree_index = a_utils.TreeIndex(tree)
+        model.pre_analyse_tree(tree, model.get_files_in_dir(path.parent), path.parent)
+        return model
+
+    def _analyse(self, model, tree, fused):
+        """
+        Method to walk the tree with all analysers of the model either
+        with FusedVisitor or separately.
+
+        Return: Tuple of results of each analyser and indexes and types
+        of failed analysers.
+        """
+
+        options = cnf.CHECKBOX_OPTIONS
+        buffers = [templates.ResultBuffer() for _ in options]
+        analysers = [model.get_analyser(opt) for opt in options]
+
+        def switch(i):
+            model._category_results = buffers[i]
+
+        if fused:
+            errors = fused_visitor.FusedVisitor(analysers, on_switch=switch).visit(tree)
+        else:
+            errors = {}
+            for i, analyser in enumerate(analysers):
+                switch(i)
+                try:
+                    analyser.visit(tree)
+                except Exception as e:
+                    errors[i] = e
+
+        results = []
+        for opt, buffer in zip(options, buffers):
+            buffer.save_category(opt)
+            results.append((buffer.to_rows(), buffer.categories[0][3]))
+        return results, {i: type(e) for i, e in errors.items()}
+
+    def test_preanalysis_walk(self):
+        for path, tree in get_trees():
+            with self.subTest(filename=path.name):
+                index = a_utils.TreeIndex(tree)
+                separate = (pre_analyser.PreAnalyser(), structure_detector.StructureDetector())
+                fused = (pre_analyser.PreAnalyser(), structure_detector.StructureDetector())
+                for visitor in separate + fused:
+                    visitor.tree_index = index
+
+                for visitor in separate:
+                    visitor.visit(tree)
+                errors = fused_visitor.FusedVisitor(fused).visit(tree)
+
+                self.assertEqual(errors, {})
+                self.assertEqual(get_preanalysis(*fused), get_preanalysis(*separate))
+
+    def test_analyser_walk(self):
+        for path, tree in get_trees():
+            with self.subTest(filename=path.name):
+                fused = self._analyse(self._create_model(path, tree), tree, True)
+                separate = self._analyse(self._create_model(path, tree), tree, False)
+                self.assertEqual(fused, separate)
+
+
+if __name__ == "__main__":
+    unittest.main()
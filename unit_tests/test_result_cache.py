@@ -0,0 +1,108 @@
+"""
+Tests of persistent result cache. Cached results of a file must be
+invalidated when a local library imported by the file changes, also
+when the files are in an archive.
+"""
+
+import pathlib
+import tempfile
+import unittest
+import zipfile
+
+import src.bulk_analysis_utils as bulk_utils
+import src.config.templates as templates
+from unit_tests import helpers
+
+MAIN = """import lib
+
+def paaohjelma():
+    lib.laske(1, 2)
+    return None
+
+paaohjelma()
+"""
+LIBRARY = """def laske(a, b):
+    return a + b
+"""
+CHANGED_LIBRARY = """def laske(a):
+    return a
+"""
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self._result_dir = tempfile.TemporaryDirectory()
+        self._source_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._result_dir.cleanup)
+        self.addCleanup(self._source_dir.cleanup)
+        self.main = pathlib.Path(self._source_dir.name) / "main.py"
+        self.library = pathlib.Path(self._source_dir.name) / "lib.py"
+        self.main.write_text(MAIN, encoding="utf-8")
+        self.library.write_text(LIBRARY, encoding="utf-8")
+
+    def _create_model(self, cache=True):
+        model = helpers.create_model(self._result_dir.name, result_cache=cache)
+        if cache:
+            self.addCleanup(model.result_cache.close)
+        return model
+
+    def _get_cached(self, model):
+        cache = model.result_cache
+        key = cache.create_key(
+            self.main.read_text(encoding="utf-8"), self.main.name, helpers.all_selected()
+        )
+        return cache.get(key, self.main.parent)
+
+    def test_changed_library_invalidates_result(self):
+        expected = helpers.analyse_file(self._create_model(cache=False), self.main)
+        model = self._create_model()
+        self.assertEqual(helpers.analyse_file(model, self.main), expected)
+        self.assertIsNotNone(self._get_cached(model))
+
+        # Results of unchanged files come from the cache
+        self.assertEqual(helpers.analyse_file(self._create_model(), self.main), expected)
+
+        self.library.write_text(CHANGED_LIBRARY, encoding="utf-8")
+        model = self._create_model()
+        self.assertIsNone(self._get_cached(model))
+
+        changed = helpers.analyse_file(self._create_model(cache=False), self.main)
+        self.assertNotEqual(changed, expected)
+        self.assertEqual(helpers.analyse_file(model, self.main), changed)
+        self.assertIsNotNone(self._get_cached(model))
+
+    def test_changed_library_in_archive_invalidates_result(self):
+        archive = pathlib.Path(self._source_dir.name) / "course.zip"
+        filepath = templates.FilepathTemplate(
+            path=pathlib.PurePosixPath("course/student/main.py"),
+            archive=archive
+        )
+
+        def analyse(library, cache=True):
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("course/student/main.py", MAIN)
+                zip_file.writestr("course/student/lib.py", library)
+            bulk_utils.close_archives()  # Archive is read again
+            model = self._create_model(cache=cache)
+            lines = [
+                line[0] for line in
+                model.format_violations(model.execute_analysis(filepath, helpers.all_selected()))
+            ]
+            model.clear_analysis_data()
+            return lines, model.result_cache
+
+        self.addCleanup(bulk_utils.close_archives)
+        expected = analyse(LIBRARY, cache=False)[0]
+        self.assertEqual(analyse(LIBRARY)[0], expected)
+        lines, cache = analyse(LIBRARY)
+        self.assertEqual(lines, expected)
+        key = cache.create_key(MAIN, "main.py", helpers.all_selected(), modules={"lib.py": LIBRARY})
+        self.assertIsNotNone(cache.get(key, None))
+
+        changed = analyse(CHANGED_LIBRARY, cache=False)[0]
+        self.assertNotEqual(changed, expected)
+        self.assertEqual(analyse(CHANGED_LIBRARY)[0], changed)
+
+
+if __name__ == "__main__":
+    unittest.main()